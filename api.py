@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from data_cache import LRUCache
+from data_loader import data_version
+from district_index import DistrictIndex, _canon_code, build_regions
+from metrics import compute_24_gap, compute_summary_metrics, compute_trend_series
+from schema import CODE_COLUMNS, widen_float
+from shared import open_shared
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 1024
+
+
+class ApiError(Exception):
+    """HTTP 상태 코드와 함께 JSON 오류 응답으로 바뀌는 예외."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------- 직렬화 ----------
+
+def _records(df: pd.DataFrame) -> list:
+    """
+    DataFrame → JSON 레코드 목록 (NaN은 null, 날짜는 ISO 문자열).
+    압축 로드된 표도 응답 모양이 같도록 정수 코드는 문자열로, float32는 float32의 최단 표기(32.27)로 돌린다.
+    """
+    if df is None or df.empty:
+        return []
+    df = df.copy()
+    for c in df.columns:
+        if c in CODE_COLUMNS and pd.api.types.is_integer_dtype(df[c]):
+            df[c] = df[c].astype(str)
+        else:
+            df[c] = widen_float(df[c])
+    return json.loads(df.to_json(orient="records", force_ascii=False, date_format="iso"))
+
+
+def _jsonable(v: Any) -> Any:
+    if isinstance(v, dict):
+        return {str(k): _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and np.isnan(v):
+        return None
+    return v
+
+
+# ---------- 데이터 ----------
+
+class DistrictApi:
+    """
+    대시보드와 같은 로더/지표 위에서 경로별 응답(dict)을 만든다. HTTP와 무관하게 호출 가능.
+    응답은 (경로, 쿼리, data_version) 키로 LRU에 보관하고, ETag도 같은 키에서 만들기 때문에
+    If-None-Match가 맞으면 표를 읽거나 직렬화하지 않고 304로 끝난다.
+    """
+
+    # (경로 패턴, 응답 이름, 받는 쿼리 파라미터). 코드는 경로/쿼리 모두 표준 코드로 바꿔 캐시 키를 맞춘다.
+    ROUTES = (
+        (re.compile(r"^/districts/?$"), "districts", ()),
+        (re.compile(r"^/district/(?P<code>[^/]+)/results/?$"), "results", ()),
+        (re.compile(r"^/trend/?$"), "trend", ("code",)),
+        (re.compile(r"^/incumbent/?$"), "incumbent", ("code",)),
+        (re.compile(r"^/population/?$"), "population", ("code",)),
+        (re.compile(r"^/stats/?$"), "stats", ()),
+    )
+
+    def __init__(self, data_dir: Union[str, Path], cache_size: int = DEFAULT_CACHE_SIZE):
+        self.data_dir = Path(data_dir)
+        self.responses = LRUCache(maxsize=cache_size)
+
+    # ----- 데이터 (파일 지문이 바뀔 때만 다시 읽음) -----
+    def version(self) -> Tuple:
+        return data_version(self.data_dir)
+
+    def index(self) -> DistrictIndex:
+        return open_shared(self.data_dir).index
+
+    def table(self, name: str) -> pd.DataFrame:
+        idx = self.index()
+        return idx[name] if name in idx else pd.DataFrame()
+
+    def _rows(self, name: str, code: Optional[str]) -> pd.DataFrame:
+        if code is None:
+            return self.table(name)
+        rows = self.index().get(name, code)
+        if rows.empty:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"{name}에 코드 {code}가 없습니다")
+        return rows
+
+    # ----- 경로 -----
+    def resolve(self, path: str, query: Dict[str, str]) -> Tuple[Hashable, Callable[[], dict]]:
+        """(캐시 키, 응답 생성 함수). 모르는 경로면 ApiError(404)."""
+        for pattern, name, params in self.ROUTES:
+            m = pattern.match(path)
+            if m:
+                args = dict(m.groupdict())
+                args.update((k, query[k]) for k in params if query.get(k))
+                args = {k: _canon_code(v) for k, v in args.items()}
+                handler = getattr(self, f"get_{name}")
+                return (name, tuple(sorted(args.items()))), (lambda: handler(**args))
+        raise ApiError(HTTPStatus.NOT_FOUND, f"알 수 없는 경로: {path}")
+
+    def respond(self, path: str, query: Dict[str, str],
+                if_none_match: Optional[str] = None) -> Tuple[HTTPStatus, bytes, Dict[str, str]]:
+        """(상태, 본문, 헤더). stats는 캐시하지 않는다."""
+        key, build = self.resolve(path, query)
+        if key[0] == "stats":
+            return HTTPStatus.OK, _dump(build()), {"Cache-Control": "no-store"}
+
+        version = self.version()
+        etag = '"' + hashlib.sha1(repr((key, version)).encode("utf-8")).hexdigest()[:20] + '"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        tags = [t.strip() for t in if_none_match.split(",")] if if_none_match else []
+        headers["X-Cache"] = "hit" if (key, version) in self.responses else "miss"
+        # 304보다 먼저 만든다: 없는 코드면 여기서 ApiError(404)가 난다(If-None-Match: * 포함).
+        body = self.responses.get_or_build((key, version), lambda: _dump(build()))
+        if "*" in tags or etag in tags:
+            return HTTPStatus.NOT_MODIFIED, b"", headers
+        return HTTPStatus.OK, body, headers
+
+    # ----- 응답 -----
+    def get_districts(self) -> dict:
+        idx = self.index()
+        present = {n: frozenset(idx.codes(n)) for n in idx.frames}
+        regions = build_regions(self.table("population"), self.table("vote_trend"),
+                                self.table("results_2024"), self.table("current_info"))
+        codes = regions["코드"].map(_canon_code)
+        return {"count": int(len(regions)),
+                "districts": [{"code": c, "label": label,
+                               "datasets": [n for n, have in present.items() if c in have]}
+                              for c, label in zip(codes, regions["라벨"])]}
+
+    def get_results(self, code: str) -> dict:
+        df_24, df_trend = self.table("results_2024"), self.table("vote_trend")
+        rows = self._rows("results_2024", code)
+        return {"code": code, "results_2024": _records(rows), "gap_24": compute_24_gap(df_24, code),
+                "summary": _jsonable(compute_summary_metrics(df_trend, df_24, self.table("index_sample"), code))}
+
+    def get_trend(self, code: Optional[str] = None) -> dict:
+        if code is None:
+            return {"trend": _records(self.table("vote_trend"))}
+        ts = compute_trend_series(self.table("vote_trend"), code)
+        if ts.empty:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"vote_trend에 코드 {code}가 없습니다")
+        return {"code": code, "trend": _records(ts)}
+
+    def get_incumbent(self, code: Optional[str] = None) -> dict:
+        return {"code": code, "incumbent": _records(self._rows("current_info", code))}
+
+    def get_population(self, code: Optional[str] = None) -> dict:
+        """행정동 행 + 숫자 컬럼 합계 (code가 있을 때)."""
+        rows = self._rows("population", code)
+        out = {"code": code, "rows": _records(rows)}
+        if code is not None:
+            nums = rows.select_dtypes("number")
+            nums = nums.drop(columns=[c for c in nums.columns if c in CODE_COLUMNS])
+            out["totals"] = _jsonable(nums.sum().to_dict())
+        return out
+
+    def get_stats(self) -> dict:
+        return {"responses": self.responses.stats(), "data_version": [list(v) for v in self.version()]}
+
+
+def _dump(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+# ---------- HTTP ----------
+
+class _Handler(BaseHTTPRequestHandler):
+    api: DistrictApi  # make_server에서 서브클래스에 지정
+    quiet = False
+    protocol_version = "HTTP/1.1"  # keep-alive (응답마다 Content-Length를 보낸다)
+    disable_nagle_algorithm = True  # 헤더/본문을 따로 쓰므로 켜 두면 keep-alive 응답마다 ~40ms 지연 ACK 대기
+
+    def do_GET(self) -> None:  # noqa: N802 (BaseHTTPRequestHandler 규약)
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            status, body, headers = self.api.respond(parts.path, query, self.headers.get("If-None-Match"))
+        except ApiError as e:
+            status, body, headers = e.status, _dump({"error": str(e)}), {}
+        except Exception as e:  # 로더/지표 오류도 JSON으로 돌려준다
+            status, body, headers = HTTPStatus.INTERNAL_SERVER_ERROR, _dump({"error": f"{type(e).__name__}: {e}"}), {}
+        self.send_response(status)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(data_dir: Union[str, Path], host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                cache_size: int = DEFAULT_CACHE_SIZE, quiet: bool = False) -> ThreadingHTTPServer:
+    """요청마다 스레드 하나 (port=0이면 빈 포트). serve_forever()는 호출측에서."""
+    handler = type("Handler", (_Handler,), {"api": DistrictApi(data_dir, cache_size), "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_thread(data_dir: Union[str, Path], **kwargs) -> Tuple[ThreadingHTTPServer, str]:
+    """백그라운드 스레드로 띄우고 (server, base_url) 반환 (부하 테스트용). 끝나면 server.shutdown()."""
+    server = make_server(data_dir, **kwargs)
+    threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    사용법: python api.py [--data-dir data] [--host 127.0.0.1] [--port 8765] [--cache-size N] [--quiet]
+    GET /districts, /district/{code}/results, /trend[?code=], /incumbent[?code=], /population[?code=], /stats
+    """
+    parser = argparse.ArgumentParser(description="지역구 데이터 JSON API")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="응답 LRU 항목 수")
+    parser.add_argument("--quiet", action="store_true", help="요청 로그 끄기")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.data_dir, args.host, args.port, args.cache_size, args.quiet)
+    server.RequestHandlerClass.api.index()  # 첫 요청 전에 데이터를 읽어 둔다
+    print(f"serving {args.data_dir} on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
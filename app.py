@@ -31,33 +31,60 @@ except Exception:
     pass
 # =============================================================
 
-import re
 import streamlit as st
 import pandas as pd
 from pathlib import Path
+from uuid import uuid4
 
 
+import instrument
+from watcher import ensure_watcher
+from shared import open_shared
+from data_cache import CACHE
+
 from data_loader import (
-    load_population_agg,
-    load_party_labels,       # ✅ party_labels.csv
-    load_vote_trend,         # ✅ vote_trend.csv
-    load_results_2024,       # ✅ 5_na_dis_results.csv
-    load_current_info,       # ✅ current_info.csv
-    load_index_sample,       # ✅ index_sample1012.csv (선택)
+    CsvReadError,
+    data_version,
+    lazy_tables,
+    load_tables_timed,       # ✅ population / party_labels / vote_trend / 5_na_dis_results / current_info / index_sample1012
 )
 
 from metrics import (
     compute_trend_series,
+    compute_trend_many,
     compute_summary_metrics,
+    compute_summary_many,
     compute_24_gap,
 )
 
+from cube import load_vote_cube
+from tensor import district_vote_tensor, load_vote_tensor, tensor_version
+from ranking import DEFAULT_WEIGHTS, FEATURES, POPULATION_COLUMNS, ranking_model
+from simulation import DEFAULT_DRAWS, win_probabilities
+from ecology import DEMOGRAPHIC_COLUMNS, KIND_NAMES, ecological_model
+
+from district_index import (
+    SIDO_CANDIDATES,
+    DistrictIndex,
+    _canon_code,
+    _detect_col,
+    _first_nonempty,
+    RegionCatalog,
+    canon_codes,
+)
+
 from charts import (
     render_population_box,
     render_vote_trend_chart,
     render_results_2024_card,
     render_incumbent_card,
     render_prg_party_box,
+    render_dong_drilldown,
+    render_compare_trend_chart,
+    build_comparison_table,
+    build_dong_heatmap_spec,
+    cached_spec,
+    INCUMBENT_COLUMNS,
 )
 
 # -----------------------------
@@ -75,141 +102,114 @@ st.caption("에스티아이")
 st.sidebar.header("메뉴 선택")
 menu = st.sidebar.radio(
     "페이지",
-    ["종합", "지역별 분석", "데이터 설명"],
+    ["종합", "지역별 분석", "지역 비교", "지역 순위", "승률 시뮬레이션", "인구 대비 득표", "데이터 설명"],
     index=0
 )
 
 DATA_DIR = Path("data")
+# DSS_BACKEND=sqlite → 행정동 원자료를 data/.store/archive.sqlite에서 지역구 단위로 조회 (전체를 메모리에 올리지 않음)
+BACKEND = os.environ.get("DSS_BACKEND", "memory").strip().lower()
+# 새 원자료가 들어오면 그 파일만 반영해 텐서/큐브를 갱신 (DSS_WATCH_INTERVAL=0이면 끔).
+# 저장소에 있는 vote_trend.csv까지 다시 쓰는 것은 DSS_WATCH_TREND=1일 때만 (python watcher.py는 항상 씀).
+_WATCH_INTERVAL = float(os.environ.get("DSS_WATCH_INTERVAL", "2") or 0)
+_WATCH_TREND = os.environ.get("DSS_WATCH_TREND", "0").strip() == "1"
+WATCHER = ensure_watcher(DATA_DIR, _WATCH_INTERVAL, _WATCH_TREND) if _WATCH_INTERVAL > 0 else None
+TABLES = lazy_tables(DATA_DIR)  # 데이터셋별 지연 핸들 (만들 때는 아무것도 읽지 않음)
+# 데이터 버전당 표 한 벌을 프로세스 전체(+ data/.shared 파일 매핑으로 같은 호스트의 다른 프로세스)가 공유.
+# 공유 표도 PAGE_TABLES 프로젝션에 든 컬럼만 pandas로 만든다. DSS_SHARED=0이면 페이지 프로젝션별로 CSV/스냅샷에서 읽는다.
+SHARED = os.environ.get("DSS_SHARED", "1").strip() != "0"
+
+# 페이지별로 쓸 {데이터셋: 컬럼}. None = 전체, 목록 = 그 컬럼 + 식별 컬럼(코드/지역명/시도)만.
+# 공유 모드에서는 매핑한 표에서 이 컬럼만 변환해 보이고(처음 요청한 페이지가 만들고 이후 페이지가 같이 씀),
+# DSS_SHARED=0이면 이 컬럼만 읽는다. 데이터 설명 페이지는 헤더만 보므로 본문을 읽지 않는다.
+PAGE_TABLES = {
+    "종합": {name: [] for name in TABLES},
+    "지역별 분석": {
+        "population": None, "party_labels": None, "vote_trend": None, "results_2024": None,
+        "current_info": INCUMBENT_COLUMNS,   # 총선경력/최근경력 등 긴 텍스트는 제외
+        "index_sample": None,
+    },
+    "지역 비교": {
+        "population": POPULATION_COLUMNS, "vote_trend": None, "results_2024": None,
+        "current_info": INCUMBENT_COLUMNS, "index_sample": None,
+    },
+    "지역 순위": {
+        "population": POPULATION_COLUMNS, "vote_trend": None, "results_2024": None,
+        "current_info": [], "index_sample": None,
+    },
+    "승률 시뮬레이션": {
+        "population": [], "vote_trend": None, "results_2024": [], "current_info": [],
+    },
+    "인구 대비 득표": {
+        "population": DEMOGRAPHIC_COLUMNS, "vote_trend": [], "results_2024": [], "current_info": [],
+    },
+    "데이터 설명": {},
+}
+
+# DSS_PROFILE=1 일 때만 rerun별 단계 시간을 기록 (꺼져 있으면 no-op)
+instrument.begin_run(page=menu, session=st.session_state.setdefault("_session_id", uuid4().hex[:12]))
+
+
+def _stop():
+    instrument.end_run(stopped=True)
+    st.stop()
 
 # -----------------------------
-# 공통 유틸
+# Load Data
 # -----------------------------
-CODE_CANDIDATES = ["코드", "지역구코드", "선거구코드", "지역코드", "code", "CODE"]
-NAME_CANDIDATES = ["지역구", "선거구", "선거구명", "지역명", "district", "지역구명", "region", "지역"]
-SIDO_CANDIDATES = ["시/도", "시도", "광역", "sido", "province"]
-
-def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or len(df) == 0:
-        return pd.DataFrame() if df is None else df
-    df2 = df.copy()
-    df2.columns = [str(c).strip().replace("\n", "").replace("\r", "") for c in df2.columns]
-    return df2
-
-def _detect_col(df: pd.DataFrame, candidates: list) -> str | None:
-    for c in candidates:
-        if c in df.columns:
-            return c
-    cols = [str(c).strip().replace("\n", "").replace("\r", "") for c in df.columns]
-    for cand in candidates:
-        if cand in cols:
-            return df.columns[cols.index(cand)]
-    return None
-
-def _canon_code(x: object) -> str:
-    """하이픈/공백 제거, 대소문자 무시, 선행 0 제거 → 코드 표준화"""
-    s = str(x).strip()
-    s = re.sub(r"[^0-9A-Za-z]", "", s)
-    s = s.lstrip("0")
-    return s.lower()
-
-def ensure_code_col(df: pd.DataFrame) -> pd.DataFrame:
-    """여러 이름의 코드 컬럼을 '코드'(str)로 표준화."""
-    if df is None:
-        return pd.DataFrame()
-    if len(df) == 0:
-        return df
-    df2 = _normalize_columns(df)
-    if "코드" not in df2.columns:
-        found = _detect_col(df2, CODE_CANDIDATES)
-        if found:
-            df2 = df2.rename(columns={found: "코드"})
-    if "코드" not in df2.columns:
-        idx_name = df2.index.name
-        if idx_name and idx_name in CODE_CANDIDATES + ["코드"]:
-            df2 = df2.reset_index().rename(columns={idx_name: "코드"})
-    if "코드" in df2.columns:
-        df2["코드"] = df2["코드"].astype(str)
-    else:
-        df2["__NO_CODE__"] = True
-    return df2
-
-def get_by_code(df: pd.DataFrame, code: str) -> pd.DataFrame:
-    """코드 컬럼 자동 탐지 + 표준화 비교로 해당 code 행만 반환(없으면 빈 DF)."""
-    if df is None or len(df) == 0:
-        return pd.DataFrame()
-    df2 = _normalize_columns(df)
-    code_col = "코드" if "코드" in df2.columns else _detect_col(df2, CODE_CANDIDATES)
-    if not code_col:
-        return pd.DataFrame()
+with st.spinner("데이터 불러오는 중..."):
+    # 파일 지문이 그대로면 재파싱/재표준화 없이 프로세스 캐시에서 바로 반환
     try:
-        key = _canon_code(code)
-        sub = df2[df2[code_col].astype(str).map(_canon_code) == key]
-        return sub if len(sub) else pd.DataFrame()
-    except Exception:
-        return pd.DataFrame()
-
-def _first_nonempty(*dfs: pd.DataFrame) -> pd.DataFrame | None:
-    for d in dfs:
-        if isinstance(d, pd.DataFrame) and len(d) > 0:
-            return d
-    return None
+        _version = data_version(DATA_DIR)
+        # 이 페이지가 선언한 데이터셋/컬럼만 씀 (공유 표의 컬럼 단위 변환, 또는 파일 지문 + 프로젝션 단위 캐시 로드)
+        _projection = PAGE_TABLES[menu]
+        if SHARED and _projection:
+            STORE = open_shared(DATA_DIR)
+            _frames, _timings = None, STORE.page_timings(_projection)
+        else:
+            _frames, _timings = load_tables_timed(DATA_DIR, _projection)
+    except CsvReadError as e:
+        # 읽기 실패는 빈 화면 대신 어떤 파일이 어느 단계에서 실패했는지 보여준다
+        st.error(f"데이터 파일을 읽지 못했습니다: {e.path.name} ({e.stage}, encoding={e.encoding})")
+        st.json(e.as_dict())
+        _stop()
+
+_file_versions = dict(_version)
+
+with st.sidebar.expander("데이터 로드 시간", expanded=False):
+    st.caption(f"전체 {_timings['wall_ms']:.0f} ms · 동시 {_timings['workers']}개")
+    _last = WATCHER.status()["last"] if WATCHER is not None else None
+    if _last is not None:
+        st.caption(f"최근 반영 {_last['ts']} · {', '.join(_last['files']) or _last.get('error', '')} ({_last['ms']:.0f} ms)")
+    st.dataframe(
+        pd.DataFrame.from_dict(_timings["files"], orient="index").round({"ms": 1}),
+        use_container_width=True,
+    )
 
-def build_regions(primary_df: pd.DataFrame, *fallback_dfs: pd.DataFrame) -> pd.DataFrame:
-    """
-    사이드바 선택용 지역 목록: 코드 + 라벨(시/도 + 지역구).
-    primary_df가 비어있으면 fallback들(df_24, df_trend, df_curr 등)에서 생성.
-    """
-    base = _first_nonempty(primary_df, *fallback_dfs)
-    if base is None:
-        return pd.DataFrame(columns=["코드", "라벨"])
-    dfp = ensure_code_col(_normalize_columns(base))
-
-    name_col = _detect_col(dfp, NAME_CANDIDATES)
-    if not name_col:
-        return (
-            dfp.loc[:, ["코드"]]
-               .assign(라벨=dfp["코드"])
-               .drop_duplicates()
-               .sort_values("라벨")
-               .reset_index(drop=True)
-        )
+# 표준화 + 코드 인덱스 (페이지 프로젝션별로, 데이터 버전당 한 번만)
+with instrument.stage("district_index"):
+    _proj_key = tuple((name, None if cols is None else tuple(cols)) for name, cols in _projection.items())
+    DISTRICTS = CACHE.get_or_load(("district_index", str(DATA_DIR), menu), (_version, _proj_key),
+                                  lambda: STORE.view(_projection) if _frames is None else DistrictIndex(_frames))
 
-    sido_col = _detect_col(dfp, SIDO_CANDIDATES)
-
-    def _label(row):
-        nm = str(row[name_col]).strip()
-        if sido_col and sido_col in row.index and pd.notna(row[sido_col]):
-            sido = str(row[sido_col]).strip()
-            return nm if nm.startswith(sido) else f"{sido} {nm}"
-        return nm
-
-    out = (
-        dfp.assign(라벨=dfp.apply(_label, axis=1))
-           .loc[:, ["코드", "라벨"]]
-           .drop_duplicates()
-           .sort_values("라벨")
-           .reset_index(drop=True)
-    )
-    return out
 
-# -----------------------------
-# Load Data
-# -----------------------------
-with st.spinner("데이터 불러오는 중..."):
-    df_pop   = load_population_agg(DATA_DIR)       # population.csv
-    df_party = load_party_labels(DATA_DIR)         # party_labels.csv
-    df_trend = load_vote_trend(DATA_DIR)           # vote_trend.csv
-    df_24    = load_results_2024(DATA_DIR)         # 5_na_dis_results.csv
-    df_curr  = load_current_info(DATA_DIR)         # current_info.csv
-    df_idx   = load_index_sample(DATA_DIR)         # index_sample1012.csv (선택)
-
-# 표준화
-df_pop   = ensure_code_col(df_pop)
-df_party = ensure_code_col(df_party)
-df_trend = ensure_code_col(df_trend)
-df_24    = ensure_code_col(df_24)
-df_curr  = ensure_code_col(df_curr)
-df_idx   = ensure_code_col(df_idx)
+def _table(name: str) -> pd.DataFrame:
+    return DISTRICTS[name] if name in DISTRICTS else pd.DataFrame()
+
+
+df_pop   = _table("population")
+df_party = _table("party_labels")
+df_trend = _table("vote_trend")
+df_24    = _table("results_2024")
+df_curr  = _table("current_info")
+df_idx   = _table("index_sample")
+
+
+def _catalog() -> RegionCatalog:
+    """시/도 → 지역구 → 행정동 카탈로그 (페이지 프로젝션별로, 데이터 버전당 한 번만)."""
+    with instrument.stage("region_catalog"):
+        return CACHE.get_or_load(("region_catalog", str(DATA_DIR), menu), (_version, _proj_key),
+                                 lambda: RegionCatalog.build(df_pop, df_trend, df_24, df_curr))
 
 # -----------------------------
 # Page: 종합
@@ -217,11 +217,7 @@ df_idx   = ensure_code_col(df_idx)
 if menu == "종합":
     c1, c2, c3 = st.columns(3)
     with c1:
-        n_regions = 0
-        if "코드" in df_trend.columns and len(df_trend) > 0:
-            n_regions = df_trend["코드"].astype(str).map(_canon_code).nunique()
-        elif "코드" in df_pop.columns and len(df_pop) > 0:
-            n_regions = df_pop["코드"].astype(str).map(_canon_code).nunique()
+        n_regions = len(DISTRICTS.codes("vote_trend")) or len(DISTRICTS.codes("population"))
         st.metric("지역 수", f"{n_regions:,}")
     with c2:
         st.metric("데이터 소스(표) 수", f"{sum([len(x) > 0 for x in [df_pop, df_24, df_curr, df_trend, df_party, df_idx]])}/6")
@@ -229,17 +225,26 @@ if menu == "종합":
         st.metric("최근 파일 로드 상태", "OK" if any(len(x) > 0 for x in [df_pop, df_24, df_curr, df_trend]) else "확인 필요")
 
     st.divider()
-    base_for_sido = _first_nonempty(df_pop, df_trend, df_24, df_curr)
-    if base_for_sido is not None:
-        base_for_sido = _normalize_columns(base_for_sido)
-        base_for_sido = ensure_code_col(base_for_sido)
-        sido_col = _detect_col(base_for_sido, SIDO_CANDIDATES)
+    # 원자료가 있으면 사전 집계 큐브(원자료 지문이 바뀔 때만 재합산)에서 바로 읽는다
+    with instrument.stage("vote_cube"):
+        CUBE = load_vote_cube(DATA_DIR)
+    if not CUBE.empty:
+        st.subheader("시/도별 지역구 개수")
+        latest = CUBE.elections[-1]
+        vc = CUBE.district_counts().to_frame().join(
+            CUBE.slice(election=latest).set_index("시/도")[["선거인수", "투표율"]]
+            .rename(columns={"선거인수": f"선거인수({latest})", "투표율": f"투표율({latest})"})
+        )
+        st.dataframe(vc.round(2))
+    else:
+        base_for_sido = _first_nonempty(df_pop, df_trend, df_24, df_curr)
+        sido_col = _detect_col(base_for_sido, SIDO_CANDIDATES) if base_for_sido is not None else None
         if sido_col:
             st.subheader("시/도별 지역구 개수")
             vc = (
                 base_for_sido[[sido_col, "코드"]].dropna()
-                .assign(코드=base_for_sido["코드"].astype(str).map(_canon_code))
-                .groupby(sido_col)["코드"].nunique()
+                .assign(코드=canon_codes(base_for_sido["코드"]))
+                .groupby(sido_col, observed=True)["코드"].nunique()
                 .sort_values(ascending=False)
                 .rename("지역구수")
                 .to_frame()
@@ -250,23 +255,30 @@ if menu == "종합":
 # Page: 지역별 분석
 # -----------------------------
 elif menu == "지역별 분석":
-    regions = build_regions(df_pop, df_trend, df_24, df_curr)
-    if regions.empty:
+    CATALOG = _catalog()
+    if CATALOG.empty:
         st.error("지역 목록을 만들 수 없습니다. (어느 데이터셋에도 '코드' 및 지역명 컬럼이 없음)")
-        st.stop()
+        _stop()
 
+    # 시/도 → 지역구 순으로 좁혀서 고른다 (전국 데이터에서도 목록이 시/도 하나 분량)
     st.sidebar.header("지역 선택")
-    sel_label = st.sidebar.selectbox("선거구를 선택하세요", regions["라벨"].tolist())
-    sel_code = regions.loc[regions["라벨"] == sel_label, "코드"].iloc[0]
+    sidos = CATALOG.sidos()
+    sel_sido = st.sidebar.selectbox("시/도", sidos, key="sel_sido") if len(sidos) > 1 else None
+    sel_label = st.sidebar.selectbox("선거구를 선택하세요", CATALOG.districts(sel_sido)["라벨"].tolist(),
+                                     key="sel_district")
+    sel_code = CATALOG.code_of(sel_label)
+    n_dongs = len(CATALOG.dongs(sel_code))
+    if n_dongs:
+        st.sidebar.caption(f"행정동 {n_dongs}개")
 
     col_left, col_right = st.columns([1.2, 1])
     with col_left:
         st.subheader("24년 총선결과")
-        res_row = get_by_code(df_24, sel_code)
+        res_row = DISTRICTS.get("results_2024", sel_code)
         render_results_2024_card(res_row, df_24=df_24, code=sel_code)
     with col_right:
         st.subheader("현직정보")
-        cur_row = get_by_code(df_curr, sel_code)
+        cur_row = DISTRICTS.get("current_info", sel_code)
         render_incumbent_card(cur_row)
 
     st.divider()
@@ -274,13 +286,14 @@ elif menu == "지역별 분석":
     col_a, col_b = st.columns([0.9, 1.1])
     with col_a:
         st.subheader("진보당 현황")
-        prg_row = get_by_code(df_party, sel_code)   # ✅ party_labels에서 필요 필드 사용
-        pop_row = get_by_code(df_pop, sel_code)
-        render_prg_party_box(prg_row, pop_row)
+        prg_row = DISTRICTS.get("party_labels", sel_code)   # ✅ party_labels에서 필요 필드 사용
+        pop_row = DISTRICTS.get("population", sel_code)
+        render_prg_party_box(prg_row, pop_row, prg_table=df_party, pop_table=df_pop)
     with col_b:
         st.subheader("정당성향별 득표추이")
-        ts = compute_trend_series(df_trend, sel_code)
-        render_vote_trend_chart(ts)
+        # 파일 버전이 같으면 이전에 만든 차트 spec을 그대로 렌더링
+        render_vote_trend_chart(lambda: compute_trend_series(df_trend, sel_code),
+                                code=sel_code, version=_file_versions["vote_trend"])
 
     summary = compute_summary_metrics(df_trend, df_24, df_idx, sel_code)
     prg_val = summary.get("PL_prg_str")
@@ -291,9 +304,171 @@ elif menu == "지역별 분석":
     swing_txt = str(swing_val) if swing_val is not None else "N/A"
     st.caption(f"요약지표 · 진보정당득표력: {prg_text} · 유동성B: {swing_txt} · 경합도B: {gap_text}")
 
+    # 전 지역구를 한 번에 시뮬레이션한 결과(데이터 버전당 한 번)에서 이 지역구 행만 꺼낸다
+    sim = win_probabilities(df_trend)
+    sim_row = sim.district(sel_code)
+    if sim_row is not None:
+        st.subheader("승리 확률 (시뮬레이션)")
+        sim_cols = st.columns(len(sim_row["p_win"]) + 1)
+        for col, (lab, p) in zip(sim_cols, sim_row["p_win"].items()):
+            col.metric(f"{lab} 승리확률", f"{p * 100:.1f}%")
+        sim_cols[-1].metric(f"뒤집힐 확률 (최근 1위 {sim_row['leader']})", f"{sim_row['flip'] * 100:.1f}%")
+        st.dataframe(sim_row["intervals"].round(1), use_container_width=True)
+        st.caption(f"최근 선거 득표율 + 전국 공통 스윙 + 지역구 스윙 {sim.draws:,}회 추출. "
+                   "구간은 득표율(%) 5/50/95 분위수.")
+
     st.divider()
     st.subheader("인구 정보")
-    render_population_box(get_by_code(df_pop, sel_code))
+    render_population_box(DISTRICTS.get("population", sel_code),
+                          code=sel_code, version=_file_versions["population"])
+
+    st.divider()
+    st.subheader("행정동 드릴다운")
+    with st.spinner("행정동 원자료 집계 중..."):
+        if BACKEND == "sqlite":
+            # 선택 지역구 행만 SQL로 읽어 작은 텐서를 만든다 (지역구 × 저장소 버전 단위 캐시)
+            VT = district_vote_tensor(DATA_DIR, sel_code)
+        else:
+            # 동 × 선거 × 계열 텐서는 원자료 지문이 바뀔 때만 다시 만든다
+            VT = load_vote_tensor(DATA_DIR)
+    dd_label = st.radio("정당 계열", VT.labels, index=VT.labels.index("진보") if "진보" in VT.labels else 0,
+                        horizontal=True, key="dong_label")
+    dd_district = VT.summary("district", dd_label)
+    dd_key = _canon_code(sel_code)
+    render_dong_drilldown(
+        VT.dong_table(sel_code, dd_label),
+        cached_spec(sel_code, f"dong_heatmap:{dd_label}", tensor_version(DATA_DIR),
+                    lambda: build_dong_heatmap_spec(VT.dong_shares_long(sel_code, dd_label), dd_label)),
+        dd_district.loc[dd_key] if dd_key in dd_district.index else None,
+    )
+
+    # 전 행정동 텐서가 있을 때만 (sqlite 백엔드의 지역구 텐서로는 회귀할 표본이 부족)
+    if BACKEND != "sqlite":
+        eco_fit = ecological_model(VT, df_pop).fit()
+        eco_table = eco_fit.district_table(dd_label)
+        if dd_key in eco_table.index:
+            eco_row = eco_table.loc[dd_key]
+            st.markdown(f"**인구 구성 대비 {dd_label} 득표율** ({eco_row['최근 선거']})")
+            eco_cols = st.columns(3)
+            eco_cols[0].metric("실제", f"{eco_row['실제(%)']:.2f}%")
+            eco_cols[1].metric("인구 구성 기대", f"{eco_row['기대(%)']:.2f}%")
+            eco_cols[2].metric("차이", f"{eco_row['차이(%p)']:+.2f}p",
+                               help=f"적합한 선거 전체 평균 차이 {eco_row['평균 차이(%p)']:+.2f}p")
+            st.dataframe(eco_fit.dong_table(sel_code, dd_label).set_index("행정동").round(2),
+                         use_container_width=True)
+
+# -----------------------------
+# Page: 지역 비교
+# -----------------------------
+elif menu == "지역 비교":
+    CATALOG = _catalog()
+    if CATALOG.empty:
+        st.error("지역 목록을 만들 수 없습니다. (어느 데이터셋에도 '코드' 및 지역명 컬럼이 없음)")
+        _stop()
+
+    st.sidebar.header("비교할 지역구")
+    all_labels = CATALOG.regions["라벨"].tolist()
+    sel_labels = st.sidebar.multiselect("지역구 (최대 10개)", all_labels, default=all_labels[:5],
+                                        max_selections=10, key="compare_districts")
+    if not sel_labels:
+        st.info("사이드바에서 비교할 지역구를 고르세요.")
+        _stop()
+
+    # 선택한 코드 묶음을 표마다 인덱스 조회 한 번 + 지표 표 reindex 한 번으로 처리
+    sel_codes = tuple(_canon_code(CATALOG.code_of(lab)) for lab in sel_labels)
+    names = dict(zip(sel_codes, sel_labels))
+
+    st.subheader("비교표")
+    summary = compute_summary_many(df_trend, df_24, df_idx, sel_codes)
+    table = build_comparison_table(DISTRICTS, sel_codes, summary, names)
+    st.dataframe(table.set_index("지역구").round(2), use_container_width=True)
+    st.caption("24년 격차: 1·2위 득표율 차이(%p). 진보득표력/유동성B/경합도B는 지역별 분석 요약지표와 같은 값.")
+
+    st.divider()
+    st.subheader("정당성향별 득표추이 비교")
+    render_compare_trend_chart(lambda: compute_trend_many(df_trend, sel_codes), codes=sel_codes,
+                               version=(_file_versions["vote_trend"], tuple(sel_labels)), names=names)
+
+# -----------------------------
+# Page: 지역 순위
+# -----------------------------
+elif menu == "지역 순위":
+    st.subheader("지역구 순위")
+    # 항목 표/표준화 행렬은 데이터 버전당 한 번, 가중치 변경은 행렬-벡터 곱 + 부분 정렬만
+    model = ranking_model(df_trend, df_24, df_idx, df_pop)
+    if model.features.empty:
+        st.info("순위를 계산할 지표가 없습니다.")
+    else:
+        st.sidebar.header("가중치")
+        weights = {
+            key: st.sidebar.slider(label, 0.0, 1.0, DEFAULT_WEIGHTS[key], 0.05, key=f"rank_w_{key}")
+            for key, (label, _) in FEATURES.items()
+        }
+        n_all = len(model.codes)
+        top_k = st.sidebar.number_input("상위 N개", min_value=1, max_value=n_all, value=min(20, n_all), step=1)
+
+        ranked = model.rank(weights, int(top_k))
+        names = _catalog().labels()
+        ranked.insert(1, "지역구", names.reindex(ranked.index).fillna(pd.Series(ranked.index, index=ranked.index)))
+        ranked = ranked.rename(columns={key: label for key, (label, _) in FEATURES.items()})
+        st.dataframe(ranked.round(2), use_container_width=True)
+        st.caption("점수: 항목별 표준화(z) 값의 가중 평균. 24년 격차·65세 이상 비율은 작을수록 높은 점수.")
+
+# -----------------------------
+# Page: 승률 시뮬레이션
+# -----------------------------
+elif menu == "승률 시뮬레이션":
+    st.subheader("지역구별 승리 확률")
+    st.sidebar.header("시뮬레이션")
+    draws = st.sidebar.number_input("시나리오 수", min_value=1_000, max_value=1_000_000, value=DEFAULT_DRAWS,
+                                    step=10_000, key="sim_draws")
+    seed = st.sidebar.number_input("난수 시드", min_value=0, value=0, step=1, key="sim_seed")
+    with st.spinner("시뮬레이션 중..."):
+        sim = win_probabilities(df_trend, int(draws), int(seed))
+    if not len(sim):
+        st.info("시뮬레이션할 득표 추이 데이터가 없습니다.")
+    else:
+        table = sim.table().sort_values("뒤집힐 확률(%)", ascending=False)
+        names = _catalog().labels()
+        table.insert(0, "지역구", names.reindex(table.index).fillna(pd.Series(table.index, index=table.index)))
+        st.dataframe(table.round(1), use_container_width=True)
+        st.caption(f"{len(sim)}개 지역구 × {sim.draws:,}회 · {sim.seconds:.2f}초. "
+                   "스윙 분포는 선거 간 득표율 변화의 분산(전국 공통 + 지역구별, 전체 값 쪽으로 수축)에서 추정.")
+
+# -----------------------------
+# Page: 인구 대비 득표
+# -----------------------------
+elif menu == "인구 대비 득표":
+    st.subheader("인구 구성 대비 득표 (생태학적 회귀)")
+    with st.spinner("행정동 원자료 집계 중..."):
+        VT = load_vote_tensor(DATA_DIR)
+    # 설계 행렬/득표율 배열은 데이터 버전당 한 번, 필터 변경은 정규방정식만 다시 푼다
+    eco = ecological_model(VT, df_pop)
+    if not len(eco):
+        st.info("행정동코드가 맞는 인구 자료가 없습니다.")
+        _stop()
+
+    st.sidebar.header("회귀 설정")
+    eco_label = st.sidebar.radio("정당 계열", VT.labels, index=VT.labels.index("진보") if "진보" in VT.labels else 0,
+                                 key="eco_label")
+    eco_sidos = sorted({str(s) for s in VT.district_sido})
+    eco_sido = st.sidebar.selectbox("시/도", ["전체"] + eco_sidos, key="eco_sido") if len(eco_sidos) > 1 else "전체"
+    eco_kinds = st.sidebar.multiselect("선거 종류", eco.kinds(), default=eco.kinds(),
+                                       format_func=lambda k: KIND_NAMES.get(k, k), key="eco_kinds")
+    if not eco_kinds:
+        st.info("사이드바에서 선거 종류를 하나 이상 고르세요.")
+        _stop()
+
+    fit = eco.fit(None if eco_sido == "전체" else eco_sido, eco_kinds)
+    table = fit.district_table(eco_label).sort_values("평균 차이(%p)", ascending=False)
+    names = _catalog().labels()
+    table.insert(0, "지역구", names.reindex(table.index).fillna(pd.Series(table.index, index=table.index)))
+    st.dataframe(table.round(2), use_container_width=True)
+    st.caption(f"행정동 {int(fit.dongs.sum()):,}개 × 선거 {len(fit.elections)}개 · 적합 {fit.seconds * 1000:.1f} ms. "
+               "기대: 행정동 2030/4050/65세 이상/2030 1인가구 비율로 선거마다 가중 최소제곱한 예측의 득표 수 가중 합. "
+               "차이가 +면 인구 구성보다 잘 나온 지역구.")
+    with st.expander("선거별 회귀 계수 (비율 1%p당 득표율 %p)", expanded=False):
+        st.dataframe(fit.coefficients(eco_label).round(3), use_container_width=True)
 
 # -----------------------------
 # Page: 데이터 설명
@@ -308,18 +483,34 @@ else:
     st.write("- index_sample1012.csv: 외부 지표(PL/EE 등) *선택*")
 
     with st.expander("각 DataFrame 컬럼 미리보기"):
-        def _cols(df, name):
-            st.markdown(f"**{name}**")
-            if df is None or len(df) == 0:
+        # 헤더만 읽는다 (본문 파싱 없음)
+        def _cols(name, title):
+            st.markdown(f"**{title}**")
+            columns = TABLES[name].columns
+            if not columns:
                 st.write("없음/빈 데이터")
             else:
-                st.code(", ".join(map(str, df.columns.tolist())))
-        _cols(df_pop,   "df_pop (population)")
-        _cols(df_24,    "df_24 (results_2024)")
-        _cols(df_curr,  "df_curr (current_info)")
-        _cols(df_trend, "df_trend (vote_trend)")
-        _cols(df_party, "df_party (party_labels)")
-        _cols(df_idx,   "df_idx (index_sample1012)")
+                st.code(", ".join(map(str, columns)))
+        _cols("population",   "df_pop (population)")
+        _cols("results_2024", "df_24 (results_2024)")
+        _cols("current_info", "df_curr (current_info)")
+        _cols("vote_trend",   "df_trend (vote_trend)")
+        _cols("party_labels", "df_party (party_labels)")
+        _cols("index_sample", "df_idx (index_sample1012)")
 
 st.write("")
 st.caption("© 2025 전략지역구 조사 · Streamlit 대시보드")
+
+# -----------------------------
+# Debug panel (DSS_PROFILE)
+# -----------------------------
+_run = instrument.end_run()
+if _run is not None:
+    with st.sidebar.expander("디버그: 단계별 시간", expanded=False):
+        st.caption(f"이번 실행 {_run['total_ms']:.0f} ms · 로그 {instrument.LOG_PATH}")
+        _stages = pd.DataFrame(_run["stages"])
+        if not _stages.empty:
+            _stages["stage"] = ["· " * d + n for d, n in zip(_stages.pop("depth"), _stages["stage"])]
+            st.dataframe(_stages, hide_index=True, use_container_width=True)
+        st.caption(f"최근 {len(instrument.recent_runs())}회 p50/p95")
+        st.dataframe(instrument.summarize(instrument.recent_runs()), use_container_width=True)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+
+# ---------- 요청 ----------
+
+def _get(conn: http.client.HTTPConnection, path: str, etag: Optional[str] = None):
+    headers = {"If-None-Match": etag} if etag else {}
+    conn.request("GET", path, headers=headers)
+    resp = conn.getresponse()
+    body = resp.read()
+    return resp.status, resp.getheader("ETag"), body
+
+
+def build_paths(base_url: str, districts: int) -> List[str]:
+    """/districts 목록 앞쪽 districts개 지역구에 대해 엔드포인트 4종 + /districts."""
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    status, _, body = _get(conn, "/districts")
+    conn.close()
+    if status != 200:
+        raise SystemExit(f"/districts → {status}")
+    codes = [d["code"] for d in json.loads(body)["districts"]][:districts]
+    paths = ["/districts"]
+    for c in codes:
+        q = quote(str(c))
+        paths += [f"/district/{q}/results", f"/trend?code={q}", f"/incumbent?code={q}", f"/population?code={q}"]
+    return paths
+
+
+def run_load(base_url: str, paths: List[str], concurrency: int = 8, duration: float = 10.0,
+             revalidate: bool = False) -> Dict[str, object]:
+    """
+    concurrency개 스레드가 각자 keep-alive 연결 하나로 paths를 돌아가며 duration초 동안 요청.
+    revalidate면 받은 ETag를 If-None-Match로 다시 보내 304 경로를 잰다.
+    """
+    parts = urlsplit(base_url)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset: int) -> None:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        etags: Dict[str, str] = {}
+        local, counts = [], Counter()
+        for path in itertools.islice(itertools.cycle(paths), offset, None):
+            if time.perf_counter() >= deadline:
+                break
+            t0 = time.perf_counter()
+            try:
+                status, etag, _ = _get(conn, path, etags.get(path) if revalidate else None)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                status, etag = "error", None
+            local.append((time.perf_counter() - t0) * 1000.0)
+            counts[status] += 1
+            if etag:
+                etags[path] = etag
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            statuses.update(counts)
+
+    threads = [threading.Thread(target=worker, args=(i * len(paths) // max(concurrency, 1),))
+               for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    lat = np.asarray(latencies) if latencies else np.zeros(1)
+    p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+    return {
+        "requests": len(latencies),
+        "seconds": round(wall, 3),
+        "rps": round(len(latencies) / wall, 1) if wall else None,
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(lat.max()), 3),
+        "status": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="api.py 부하 테스트 (처리량 + 지연 백분위)")
+    parser.add_argument("--url", help="이미 떠 있는 인스턴스 (예: http://127.0.0.1:8765). 없으면 --data-dir로 직접 띄움")
+    parser.add_argument("--data-dir", type=Path, default=ROOT / "data")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="단계별 측정 시간(초)")
+    parser.add_argument("--districts", type=int, default=50, help="요청에 섞을 지역구 수")
+    parser.add_argument("--out", type=Path, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        from api import serve_in_thread
+        server, base_url = serve_in_thread(args.data_dir, port=0, quiet=True)
+    try:
+        paths = build_paths(base_url, args.districts)
+        print(f"target: {base_url} · {len(paths)} paths · concurrency {args.concurrency}")
+        report = {"url": base_url, "paths": len(paths), "concurrency": args.concurrency}
+        # 첫 단계는 응답 캐시가 차는 구간을 포함하고, 둘째는 hit, 셋째는 ETag 재검증(304)
+        for phase, revalidate in (("cold", False), ("warm", False), ("revalidate", True)):
+            r = run_load(base_url, paths, args.concurrency, args.duration, revalidate)
+            report[phase] = r
+            print(f"  {phase:<10} {r['rps']:>9} req/s  p50 {r['p50_ms']:>7.2f}  p90 {r['p90_ms']:>7.2f}  "
+                  f"p99 {r['p99_ms']:>7.2f} ms  {r['status']}")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"results: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
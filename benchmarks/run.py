@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synth import SCALES, Scale, generate
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# ---------- 측정 ----------
+
+def measure(fn: Callable[[], object], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """fn을 warmup회 버리고 repeat회 실행한 ms 통계."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return {
+        "n": repeat,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def _sample_codes(codes: List[str], k: int) -> List[str]:
+    if len(codes) <= k:
+        return list(codes)
+    idx = np.linspace(0, len(codes) - 1, k).round().astype(int)
+    return [codes[i] for i in idx]
+
+
+def run_suite(data_dir: Path, repeat: int = 5, codes_per_case: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    data_dir 데이터셋으로 로더/코드 조회/지표/차트 빌더를 측정.
+    코드별 함수는 codes_per_case개 지역구를 한 번씩 도는 시간을 1회로 잰다.
+    """
+    import charts
+    import cube
+    import ecology
+    import ingest
+    import metrics
+    import ranking
+    import simulation
+    import tensor
+    from data_cache import CACHE
+    from data_loader import LazyTable, load_all, load_all_uncached, load_current_info, loader_settings
+    from district_index import DistrictIndex, RegionCatalog, build_regions, ensure_code_col, get_by_code
+
+    results = {}
+
+    def case(name: str, fn: Callable[[], object], calls: int = 1):
+        # 이름에 규모를 넣지 않아야 다른 규모/버전 결과와 같은 항목끼리 비교된다
+        results[name] = dict(measure(fn, repeat=repeat), calls=calls)
+        print(f"  {name:<36} {results[name]['median_ms']:>10.2f} ms" + (f"  ({calls} calls)" if calls > 1 else ""))
+
+    # 로드: 캐시 없음(CSV 파싱) / 프로세스 캐시 hit
+    case("load_all[csv,cold]", lambda: load_all_uncached(data_dir, use_snapshot=False))
+    case("load_all[csv,sequential]", lambda: load_all_uncached(data_dir, use_snapshot=False, max_workers=1))
+    CACHE.clear()
+    case("load_all[warm]", lambda: load_all(data_dir))
+
+    # 컬럼 프로젝션: current_info 전체 파싱 / 현직 카드가 쓰는 컬럼만
+    incumbent_cols = LazyTable(data_dir, "current_info").projection(charts.INCUMBENT_COLUMNS)
+    case("load_current_info[full]", lambda: load_current_info.uncached(data_dir))
+    case("load_current_info[projected]", lambda: load_current_info.uncached(data_dir, usecols=incumbent_cols))
+
+    frames = load_all(data_dir)
+    df_pop, df_trend = frames["population"], frames["vote_trend"]
+    df_24, df_curr, df_idx = frames["results_2024"], frames["current_info"], frames["index_sample"]
+
+    # 공유 표: 다른 프로세스가 만든 data/.shared 매핑(+코드 인덱스) / 페이지 프로젝션 view
+    import shared
+    tables = shared.open_shared(data_dir)
+    if tables.path is not None:
+        case("shared.map_tables", lambda: DistrictIndex(shared.map_tables(tables.path, loader_settings())))
+    case("SharedTables.view[page]", lambda: tables.view({"population": ["전체 유권자"], "vote_trend": None,
+                                                         "current_info": charts.INCUMBENT_COLUMNS}))
+
+    case("ensure_code_col[population]", lambda: ensure_code_col(df_pop))
+    case("build_regions[population]", lambda: build_regions(df_pop, df_trend, df_24, df_curr))
+    case("RegionCatalog.build", lambda: RegionCatalog.build(df_pop, df_trend, df_24, df_curr))
+    catalog = RegionCatalog.build(df_pop, df_trend, df_24, df_curr)
+    labels = catalog.regions["라벨"].tolist()
+    case("RegionCatalog.code_of", lambda: [catalog.code_of(lab) for lab in labels], len(labels))
+
+    codes = sorted(ensure_code_col(df_pop)["코드"].unique().tolist())
+    sample = _sample_codes(codes, codes_per_case)
+    case("get_by_code[population]", lambda: [get_by_code(df_pop, c) for c in sample], len(sample))
+
+    districts = DistrictIndex({"population": df_pop, "vote_trend": df_trend})
+    case("DistrictIndex.build", lambda: DistrictIndex({"population": df_pop, "vote_trend": df_trend}))
+    case("DistrictIndex.get[population]",
+         lambda: [districts.get("population", c) for c in sample], len(sample))
+
+    # 지표: 일괄 계산 / 코드별 조회(캐시 hit 경로)
+    case("compute_metrics_table", lambda: metrics.compute_metrics_table(df_trend, df_24, df_idx))
+    case("compute_trend_series",
+         lambda: [metrics.compute_trend_series(df_trend, c) for c in sample], len(sample))
+    case("compute_summary_metrics",
+         lambda: [metrics.compute_summary_metrics(df_trend, df_24, df_idx, c) for c in sample], len(sample))
+    case("compute_24_gap", lambda: [metrics.compute_24_gap(df_24, c) for c in sample], len(sample))
+
+    # 지역 비교(10개): 코드별 조회 반복 / get_many + 지표 표 reindex 한 번
+    shortlist = sample[:10]
+    case("compare[loop]", lambda: ([metrics.compute_trend_series(df_trend, c) for c in shortlist],
+                                   [metrics.compute_summary_metrics(df_trend, df_24, df_idx, c) for c in shortlist],
+                                   [districts.get("population", c) for c in shortlist]))
+    case("compare[batch]", lambda: (metrics.compute_trend_many(df_trend, shortlist),
+                                    metrics.compute_summary_many(df_trend, df_24, df_idx, shortlist),
+                                    districts.get_many("population", shortlist)))
+
+    # 순위: 항목 표 생성 / 가중치 변경 시 재순위
+    case("ranking.build", lambda: ranking.RankingModel(ranking.build_feature_table(df_trend, df_24, df_idx, df_pop)))
+    model = ranking.ranking_model(df_trend, df_24, df_idx, df_pop)
+    case("RankingModel.rank[top20]", lambda: model.rank(ranking.DEFAULT_WEIGHTS, 20))
+
+    # 승리 확률: 전 지역구 × 10만 시나리오 한 번
+    shares = simulation.BlocShares.from_trend(df_trend)
+    case("simulate[100k]", lambda: simulation.simulate(shares, 100_000))
+
+    # 행정동 텐서: 생성(원자료 melt 캐시 hit 이후) / 전 행정동 지표
+    long = ingest.load_dong_votes(data_dir)
+    case("build_vote_tensor", lambda: tensor.build_vote_tensor(long))
+    vt = tensor.build_vote_tensor(long)
+    case("VoteTensor.metrics[dong]", lambda: (vt.swing("dong"), vt.volatility("dong"), vt.trend_slope("dong")))
+    case("VoteTensor.metrics[district]",
+         lambda: (vt.swing("district"), vt.volatility("district"), vt.trend_slope("district")))
+
+    # 생태학적 회귀: 배열 준비 / 필터 변경 시 재적합
+    case("EcologicalModel.build", lambda: ecology.EcologicalModel(vt, df_pop))
+    eco = ecology.EcologicalModel(vt, df_pop)
+    case("EcologicalModel.fit", lambda: eco.fit().district_table("진보"))
+
+    # 사전 집계 큐브: 생성(텐서/집계 컬럼 준비 후) / 시도·선거 슬라이스
+    tallies = ingest.load_dong_tallies(data_dir)
+    case("VoteCube.build", lambda: cube.VoteCube(vt, cube.tally_array(vt, tallies)))
+    vc = cube.VoteCube(vt, cube.tally_array(vt, tallies))
+    sidos = vc.sidos()
+    case("VoteCube.slice[sido,election]",
+         lambda: [vc.slice(sido=s, election=vc.elections[-1], label="진보", level="district") for s in sidos],
+         len(sidos))
+
+    # SQLite 백엔드: 최초 적재 / 변경 없는 sync / 지역구 단위 조회
+    import store
+    from data_loader import query_votes
+    with tempfile.TemporaryDirectory(prefix="dss-store-") as tmp_store:
+        archive = store.ArchiveStore(Path(tmp_store) / store.STORE_NAME)
+        t0 = time.perf_counter()
+        archive.sync(data_dir)
+        results["ArchiveStore.sync[full]"] = {"n": 1, "median_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+                                              "calls": 1}
+        print(f"  {'ArchiveStore.sync[full]':<36} {results['ArchiveStore.sync[full]']['median_ms']:>10.2f} ms")
+        case("ArchiveStore.sync[noop]", lambda: archive.sync(data_dir))
+        case("ArchiveStore.votes[district]",
+             lambda: [archive.votes(district=c, by=("행정동", "election", "label")) for c in sample], len(sample))
+    query_votes(data_dir, district=sample[0])  # data_dir/.store 준비
+    case("tensor[district,sqlite]",
+         lambda: [tensor.build_vote_tensor(query_votes(data_dir, by=None, district=c)) for c in sample], len(sample))
+
+    # 차트 빌더: spec 생성 비용(캐시 미사용) / 캐시 hit
+    series = {c: metrics.compute_trend_series(df_trend, c) for c in sample}
+    pops = {c: districts.get("population", c) for c in sample}
+    case("build_vote_trend_spec", lambda: [charts.build_vote_trend_spec(series[c]) for c in sample], len(sample))
+    case("build_population_view", lambda: [charts.build_population_view(pops[c]) for c in sample], len(sample))
+    charts.CHART_CACHE.clear()
+    case("cached_spec[vote_trend,hit]",
+         lambda: [charts.cached_spec(c, "vote_trend", "bench", lambda c=c: charts.build_vote_trend_spec(series[c]))
+                  for c in sample], len(sample))
+    return results
+
+
+# ---------- 결과 파일 ----------
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """두 결과 파일의 공통 항목 median 비교 (baseline 대비 배수)."""
+    lines = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = cur["median_ms"] / base["median_ms"]
+        lines.append(f"  {name:<36} {base['median_ms']:>10.2f} → {cur['median_ms']:>10.2f} ms  (x{ratio:.2f})")
+    return lines
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="대시보드 데이터 경로 벤치마크 (합성 데이터)")
+    parser.add_argument("--scale", default="current", choices=sorted(SCALES), help="미리 정한 규모")
+    parser.add_argument("--districts", type=int, help="지역구 수 (scale 값을 덮어씀)")
+    parser.add_argument("--dongs", type=int, help="전체 행정동 수")
+    parser.add_argument("--elections", type=int, help="선거 수 (최대 16)")
+    parser.add_argument("--data-dir", type=Path, help="합성 데이터 대신 기존 데이터 디렉터리 사용")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, help="결과 JSON 경로 (기본: benchmarks/results/<rev>-<scale>.json)")
+    parser.add_argument("--compare", type=Path, help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    base = SCALES[args.scale]
+    scale = Scale(
+        districts=args.districts or base.districts,
+        dongs=args.dongs or base.dongs,
+        elections=args.elections or base.elections,
+    )
+    rev = _git_revision()
+
+    with tempfile.TemporaryDirectory(prefix="dss-bench-") as tmp:
+        if args.data_dir:
+            data_dir, synth = args.data_dir, None
+        else:
+            data_dir = Path(tmp)
+            t0 = time.perf_counter()
+            synth = generate(data_dir, scale, seed=args.seed)
+            synth["generate_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+        print(f"data: {data_dir} {synth or ''}")
+        results = run_suite(data_dir, repeat=args.repeat)
+        # 표 점유 메모리: 기존 표현(문자열 코드, 64비트 수치) 대비 압축 표현
+        from memory import compare_memory
+        memory = compare_memory(data_dir)
+        print(memory.round(3).to_string())
+
+    report = {
+        "meta": {
+            "revision": rev,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "data_dir": str(args.data_dir) if args.data_dir else None,
+            "synthetic": synth,
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "memory": {name: {k: (round(v, 4) if isinstance(v, float) else v) for k, v in row.items()}
+                   for name, row in memory.to_dict(orient="index").items()},
+    }
+    label = "custom" if args.data_dir else f"{scale.districts}d{scale.dongs}n{scale.elections}e"
+    out = args.out or RESULTS_DIR / f"{rev or 'local'}-{label}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"results: {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            lines = compare(report, json.load(f))
+        print(f"vs {args.compare}:")
+        print("\n".join(lines) if lines else "  (공통 항목 없음)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
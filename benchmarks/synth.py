@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# ---------- 규모 ----------
+
+@dataclass(frozen=True)
+class Scale:
+    """합성 데이터 크기: 지역구 수, 전체 행정동 수, 선거 수."""
+    districts: int
+    dongs: int
+    elections: int
+
+
+SCALES = {
+    "current": Scale(districts=3, dongs=40, elections=12),
+    "medium": Scale(districts=50, dongs=700, elections=12),
+    "national": Scale(districts=250, dongs=3500, elections=12),
+}
+
+# 최근 선거부터 채운다 (파일명 {연도}_{S|G}_{종류}.csv)
+ELECTIONS = [
+    (2025, "president"), (2024, "na_pro"), (2022, "president"), (2022, "loc_gov"),
+    (2022, "loc_pro"), (2020, "na_pro"), (2018, "loc_gov"), (2018, "loc_pro"),
+    (2017, "president"), (2016, "na_pro"), (2014, "loc_gov"), (2014, "loc_pro"),
+    (2012, "president"), (2012, "na_pro"), (2010, "loc_gov"), (2010, "loc_pro"),
+]
+# 후보형 컬럼('정당 이름')을 쓰는 선거 종류
+CANDIDATE_KINDS = {"president", "loc_gov"}
+RESULT_YEARS = [2008, 2012, 2016, 2020, 2024]
+
+# (정당, party_labels.csv 라벨, 기본 지지 가중치)
+PARTIES = [
+    ("더불어민주당", "민주", 40.0), ("국민의힘", "보수", 38.0), ("정의당", "진보", 4.0),
+    ("진보당", "진보당", 2.0), ("녹색당", "진보", 1.0), ("개혁신당", "기타", 4.0),
+    ("조국혁신당", "기타", 3.0), ("국가혁명당", "기타", 1.0),
+]
+# party_labels.csv에 없는 군소정당 (ingest에서 '기타'로 분류됨)
+MINOR_PARTIES = ["가가호호당", "미래연합당", "새희망당", "통일민주당"]
+SURNAMES = list("김이박최정강조윤장임한오서신권황안송류홍")
+GIVEN = ["민준", "서연", "지훈", "하은", "도윤", "수아", "예준", "지우", "시우", "서윤", "주원", "하준"]
+
+ID_COLS = ["시/도", "지역구", "지역구코드", "행정동", "행정동코드"]
+POP_COLS = ["전체 유권자", "2030", "4050", "65세 이상", "2030 남성", "2030 여성", "2030 1인가구"]
+RESULT_SLOTS = 7
+CURRENT_COLS = ["코드", "선거구", "이름", "정당", "성별", "연령", "총선직업", "총선학력", "총선경력",
+                "선수", "24년득표", "24년득표율", "최근경력", "인물경쟁력", "재출마가능성"]
+INDEX_COLS = ["region", "code", "유권자 수", "신규유입인구", "고령층 비율", "청년층 비율", "4-50대 비율",
+              "2030여성 비율", "진보정당 득표력", "진보당 당원수", "진보당 지방선거후보", "유동성A", "경합도A",
+              "유동성B", "경합도B", "현직 경쟁력", "민주당 득표력", "보수 득표력"]
+
+
+# ---------- 지역 골격 ----------
+
+def _thousands(a: np.ndarray) -> List[str]:
+    """정수 배열 → '12,345' 문자열 (원자료와 같은 천 단위 구분자)."""
+    return [f"{int(v):,}" for v in a]
+
+
+def _person(rng: np.random.Generator) -> str:
+    return rng.choice(SURNAMES) + rng.choice(GIVEN)
+
+
+def build_geography(scale: Scale, rng: np.random.Generator) -> pd.DataFrame:
+    """지역구 × 행정동 골격. 앞 절반은 서울(S), 나머지는 경기(G) 파일로 나뉜다."""
+    if scale.dongs < scale.districts:
+        raise ValueError("dongs는 districts 이상이어야 합니다.")
+    n_seoul = (scale.districts + 1) // 2
+    rows = []
+    for i, dongs in enumerate(np.array_split(np.arange(scale.dongs), scale.districts)):
+        sido = "서울" if i < n_seoul else "경기"
+        gu = f"합성{i + 1}구"
+        code = 2000 + i
+        for k, d in enumerate(dongs):
+            rows.append((sido, gu, code, f"{gu[:-1]}제{k + 1}동", 1100000000 + int(d) * 1000))
+    geo = pd.DataFrame(rows, columns=ID_COLS)
+    geo["_bias"] = geo["지역구코드"].map(dict(zip(range(2000, 2000 + scale.districts),
+                                                 rng.normal(0.0, 0.15, scale.districts))))
+    geo["선거인수"] = rng.integers(8_000, 40_000, len(geo))
+    return geo
+
+
+# ---------- 동 단위 원자료 ----------
+
+def election_frame(geo: pd.DataFrame, year: int, kind: str, rng: np.random.Generator) -> pd.DataFrame:
+    """선거 하나의 전체 행정동 표 (아직 서울/경기 분할 전, 숫자는 천 단위 문자열)."""
+    names = [p for p, _, _ in PARTIES] + MINOR_PARTIES[: 1 + year % len(MINOR_PARTIES)]
+    weights = np.array([w for _, _, w in PARTIES] + [0.5] * (len(names) - len(PARTIES)))
+    if kind in CANDIDATE_KINDS:
+        cols = [f"{p} {_person(rng)}" for p in names]
+    else:
+        cols = names
+
+    n = len(geo)
+    electors = geo["선거인수"].to_numpy()
+    turnout = rng.uniform(0.5, 0.78, n)
+    votes_cast = np.round(electors * turnout).astype("int64")
+    invalid = np.round(votes_cast * rng.uniform(0.005, 0.02, n)).astype("int64")
+    valid = votes_cast - invalid
+
+    # 지역구별 성향(bias)으로 민주/보수 가중치를 기울인 뒤 동마다 디리클레 추출
+    alpha = np.tile(weights, (n, 1))
+    tilt = np.exp(geo["_bias"].to_numpy())
+    alpha[:, 0] *= tilt
+    alpha[:, 1] /= tilt
+    share = _dirichlet_rows(alpha * 20.0, rng)
+    votes = np.floor(share * valid[:, None]).astype("int64")
+    votes[:, 0] += valid - votes.sum(axis=1)
+
+    out = geo[ID_COLS].copy()
+    out["선거인수"] = _thousands(electors)
+    out["투표수"] = _thousands(votes_cast)
+    for j, c in enumerate(cols):
+        out[c] = _thousands(votes[:, j])
+    out["계"] = _thousands(valid)
+    out["무효투표수"] = _thousands(invalid)
+    out["기권수"] = _thousands(electors - votes_cast)
+    return out
+
+
+def _dirichlet_rows(alpha: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """행마다 다른 α의 디리클레를 감마 표본으로 한 번에 추출."""
+    g = rng.gamma(alpha)
+    return g / g.sum(axis=1, keepdims=True)
+
+
+def write_election_files(geo: pd.DataFrame, elections: List[Tuple[int, str]], out_dir: Path,
+                         rng: np.random.Generator, cp949_every: int = 2) -> List[Path]:
+    """
+    선거별로 서울/경기 파일을 쓴다. cp949_every번째 선거마다 cp949, 나머지는 utf-8 BOM.
+    (인코딩 판정/천 단위 해석 경로를 함께 측정하기 위함)
+    """
+    paths = []
+    for i, (year, kind) in enumerate(elections):
+        df = election_frame(geo, year, kind, rng)
+        encoding = "cp949" if cp949_every and i % cp949_every == cp949_every - 1 else "utf-8-sig"
+        for region, sido in (("S", "서울"), ("G", "경기")):
+            part = df[df["시/도"] == sido]
+            if part.empty:
+                continue
+            path = out_dir / f"{year}_{region}_{kind}.csv"
+            part.to_csv(path, index=False, encoding=encoding)
+            paths.append(path)
+    return paths
+
+
+def write_party_labels(elections: List[Tuple[int, str]], out_dir: Path) -> Path:
+    rows = [(f"{year}_{kind}", p, lab) for year, kind in elections for p, lab, _ in PARTIES]
+    path = out_dir / "party_labels.csv"
+    pd.DataFrame(rows, columns=["file_name", "party_name", "label"]).to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+# ---------- 지역구 단위 표 ----------
+
+def write_population(geo: pd.DataFrame, out_dir: Path, rng: np.random.Generator) -> Path:
+    n = len(geo)
+    total = geo["선거인수"].to_numpy()
+    mix = rng.dirichlet([3.5, 3.5, 2.0, 1.0], n)
+    y2030 = np.round(total * mix[:, 0]).astype("int64")
+    y4050 = np.round(total * mix[:, 1]).astype("int64")
+    y65 = np.round(total * mix[:, 2]).astype("int64")
+    male = np.round(y2030 * rng.uniform(0.45, 0.55, n)).astype("int64")
+    single = np.round(y2030 * rng.uniform(0.15, 0.45, n)).astype("int64")
+    out = geo[ID_COLS].copy()
+    for col, arr in zip(POP_COLS, [total, y2030, y4050, y65, male, y2030 - male, single]):
+        out[col] = _thousands(arr)
+    path = out_dir / "population.csv"
+    out.to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+def _districts(geo: pd.DataFrame) -> pd.DataFrame:
+    return geo.groupby("지역구코드", sort=True).agg(
+        sido=("시/도", "first"), name=("지역구", "first"), bias=("_bias", "first"), electors=("선거인수", "sum"),
+    ).reset_index()
+
+
+def write_results(geo: pd.DataFrame, out_dir: Path, rng: np.random.Generator) -> Path:
+    """5_na_dis_results.csv: 지역구 × 총선 연도, 후보 슬롯 7개(빈 슬롯은 공란)."""
+    rows = []
+    for d in _districts(geo).itertuples(index=False):
+        for year in RESULT_YEARS:
+            electors = int(d.electors * rng.uniform(0.9, 1.1))
+            cast = int(electors * rng.uniform(0.44, 0.7))
+            invalid = int(cast * rng.uniform(0.005, 0.015))
+            valid = cast - invalid
+            k = int(rng.integers(2, RESULT_SLOTS + 1))
+            share = rng.dirichlet([8.0 * np.exp(d.bias), 8.0 / np.exp(d.bias)] + [0.6] * (k - 2))
+            votes = np.floor(share * valid).astype("int64")
+            row = [d.sido, d.name, d.지역구코드, year, f"{electors:,}", f"{cast:,}", f"{round(cast / electors * 100)}%"]
+            for j in range(RESULT_SLOTS):
+                if j < k:
+                    party = PARTIES[j][0] if j < len(PARTIES) else "무소속"
+                    row += [f"{party} {_person(rng)}", f"{int(votes[j]):,}", f"{votes[j] / valid * 100:.2f}"]
+                else:
+                    row += ["", "", ""]
+            row += [f"{valid:,}", f"{invalid:,}", f"{electors - cast:,}"]
+            rows.append(row)
+    cols = ["지역", "선거구", "코드", "연도", "선거인수", "투표수", "투표율"]
+    for j in range(1, RESULT_SLOTS + 1):
+        cols += [f"후보{j}_이름", f"후보{j}_득표수", f"후보{j}_득표율"]
+    cols += ["계", "무효투표수", "기권수"]
+    path = out_dir / "5_na_dis_results.csv"
+    pd.DataFrame(rows, columns=cols).to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+def write_current_info(geo: pd.DataFrame, out_dir: Path, rng: np.random.Generator) -> Path:
+    rows = []
+    for d in _districts(geo).itertuples(index=False):
+        party = PARTIES[int(rng.integers(0, 2))][0]
+        votes = int(d.electors * rng.uniform(0.25, 0.4))
+        rows.append([
+            d.지역구코드, d.name, _person(rng), party, rng.choice(["남성", "여성"]), f"{int(rng.integers(40, 75))}세",
+            "국회의원\t", "합성대학교 행정학 학사", f"(현){d.name} 국회의원\n(전)합성시의회 의원",
+            rng.choice(["초선", "재선", "3선", "4선"]), f" {votes:,} ", f"{rng.uniform(40, 65):.2f}%",
+            f"2025년 1월~: {party} 정책위원회 위원", rng.choice(["상", "중", "하"]), rng.choice(["상", "중", "하"]),
+        ])
+    path = out_dir / "current_info.csv"
+    pd.DataFrame(rows, columns=CURRENT_COLS).to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+def write_index_sample(geo: pd.DataFrame, out_dir: Path, rng: np.random.Generator) -> Path:
+    """index_sample1012.csv: 원본처럼 cp949로 저장."""
+    d = _districts(geo)
+    n = len(d)
+    df = pd.DataFrame({
+        "region": d["sido"] + " " + d["name"],
+        "code": d["지역구코드"],
+        "유권자 수": d["electors"],
+        "신규유입인구": rng.integers(1_000, 8_000, n),
+        "고령층 비율": rng.uniform(0.12, 0.3, n),
+        "청년층 비율": rng.uniform(0.25, 0.45, n),
+        "4-50대 비율": rng.uniform(0.25, 0.4, n),
+        "2030여성 비율": rng.uniform(0.15, 0.25, n),
+        "진보정당 득표력": rng.uniform(2, 10, n),
+        "진보당 당원수": rng.integers(0, 10, n) * 100,
+        "진보당 지방선거후보": rng.integers(0, 3, n),
+        "유동성A": rng.integers(0, 5, n),
+        "경합도A": rng.uniform(2, 20, n).round(3),
+        "유동성B": rng.integers(0, 5, n),
+        "경합도B": rng.uniform(2, 20, n),
+        "현직 경쟁력": rng.uniform(0.3, 0.7, n),
+        "민주당 득표력": rng.uniform(35, 55, n),
+        "보수 득표력": rng.uniform(30, 50, n),
+    })
+    path = out_dir / "index_sample1012.csv"
+    df[INDEX_COLS].to_csv(path, index=False, encoding="cp949")
+    return path
+
+
+def write_bookmark(out_dir: Path) -> Path:
+    """스키마 레지스트리(bookmark.csv): 파일명 + 헤더 목록."""
+    headers = {
+        "current_info": CURRENT_COLS,
+        "vote_trend": ["region", "code", "election", "label", "votes", "prop"],
+        "5_na_dis_results": pd.read_csv(out_dir / "5_na_dis_results.csv", nrows=0, encoding="utf-8-sig").columns.tolist(),
+        "party_labels": ["file_name", "party_name", "label"],
+        "index_sample1012": INDEX_COLS,
+        "population": ID_COLS + POP_COLS,
+    }
+    width = max(len(v) for v in headers.values())
+    rows = [[name] + cols + [""] * (width - len(cols)) for name, cols in headers.items()]
+    path = out_dir / "bookmark.csv"
+    pd.DataFrame(rows, columns=["파일명"] + [str(i) for i in range(1, width + 1)]).to_csv(
+        path, index=False, encoding="utf-8-sig")
+    return path
+
+
+# ---------- 진입점 ----------
+
+def generate(out_dir: Union[str, Path], scale: Union[str, Scale] = "current",
+             seed: int = 0, cp949_every: int = 2) -> Dict[str, object]:
+    """
+    out_dir에 data/와 같은 형식의 합성 데이터셋 전체를 만든다.
+    vote_trend.csv는 합성 원자료에서 ingest.write_vote_trend로 도출한다.
+    반환: {"scale", "files", "rows"} 요약.
+    """
+    import ingest
+
+    scale = SCALES[scale] if isinstance(scale, str) else scale
+    if not 1 <= scale.elections <= len(ELECTIONS):
+        raise ValueError(f"elections는 1~{len(ELECTIONS)} 범위여야 합니다.")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    elections = ELECTIONS[: scale.elections]
+    geo = build_geography(scale, rng)
+    files = write_election_files(geo, elections, out_dir, rng, cp949_every=cp949_every)
+    files += [
+        write_party_labels(elections, out_dir),
+        write_population(geo, out_dir, rng),
+        write_results(geo, out_dir, rng),
+        write_current_info(geo, out_dir, rng),
+        write_index_sample(geo, out_dir, rng),
+    ]
+    files.append(write_bookmark(out_dir))
+    files.append(ingest.write_vote_trend(out_dir))
+    return {
+        "scale": {"districts": scale.districts, "dongs": scale.dongs, "elections": scale.elections},
+        "files": len(files),
+        "bytes": sum(p.stat().st_size for p in files),
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    """사용법: python benchmarks/synth.py OUT_DIR [current|medium|national] [SEED]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(main.__doc__)
+        return 2
+    info = generate(argv[0], argv[1] if len(argv) > 1 else "current", int(argv[2]) if len(argv) > 2 else 0)
+    print(f"synthetic data: {argv[0]} {info}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
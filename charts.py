@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
+from numbers import Real
+from typing import Any, Callable, Hashable, Optional
+
 import pandas as pd
 import streamlit as st
 
@@ -17,25 +21,52 @@ try:
 except Exception:
     alt = None  # Altair가 없어도 앱은 죽지 않게
 
+from data_cache import LRUCache
+from district_index import _canon_code, canon_codes
+from instrument import timed
 from metrics import compute_24_gap
+from schema import classify_column
 
 # -------- 유틸 --------
-def _to_pct_float(v, default=None):
+def _pct_scale(frame: Optional[pd.DataFrame], col: Optional[str]) -> float:
+    """
+    컬럼 하나의 퍼센트 배율 (이미 %면 1, 0~1 비율이면 100). 값마다 따지면 0.63%가 63%가 되므로 컬럼 단위로 정한다.
+    '%'가 붙은 값이 있거나 '~율'(비율 제외, 득표율/투표율)이면 이미 %, 그 밖에는 컬럼 전체가 0~1일 때만 비율로 본다.
+    """
+    if frame is None or col is None or col not in frame.columns:
+        return 1.0
+    s = frame[col].dropna()
+    if not pd.api.types.is_numeric_dtype(s):
+        text = s.astype(str).str.strip()
+        if text.str.contains("%", regex=False).any():
+            return 1.0
+        s = pd.to_numeric(text.str.replace(",", "", regex=False), errors="coerce").dropna()
+    name = re.sub(r"\s+", "", str(col))
+    if classify_column(col) == "percent" and not name.endswith("비율"):
+        return 1.0
+    return 100.0 if len(s) and bool(s.between(0, 1).all()) else 1.0
+
+def _to_pct_float(v, default=None, scale: float = 1.0):
+    """값 하나를 % 숫자로. 배율은 _pct_scale로 컬럼마다 한 번 정해 넘긴다 ('%'가 붙은 값은 그대로)."""
     if v is None or (isinstance(v, float) and pd.isna(v)):
         return default
+    # 스키마 로딩으로 이미 숫자인 값은 문자열 파싱 생략
+    if isinstance(v, Real) and not isinstance(v, bool):
+        x = float(v)
+        return default if pd.isna(x) else x * scale
     s = str(v).strip().replace(",", "")
     m = re.match(r"^\s*([+-]?\d+(\.\d+)?)\s*%?\s*$", s)
     if not m:
         return default
     x = float(m.group(1))
-    if "%" in s:
-        return x
-    return x * 100.0 if 0 <= x <= 1 else x
+    return x if "%" in s else x * scale
 
 def _to_float(v, default=None):
     try:
         if v is None or (isinstance(v, float) and pd.isna(v)):
             return default
+        if isinstance(v, Real) and not isinstance(v, bool):
+            return default if pd.isna(v) else float(v)
         s = str(v).replace(",", "").strip()
         return float(s) if s not in ("", "nan", "None") else default
     except Exception:
@@ -61,18 +92,71 @@ def _norm_cols(df: pd.DataFrame) -> pd.DataFrame:
     out.columns = [str(c).strip().replace("\n", "").replace("\r", "") for c in out.columns]
     return out
 
+# -------- 차트 spec 캐시 --------
+@dataclass(frozen=True)
+class ChartSpec:
+    """
+    렌더링 직전까지 만들어 둔 차트 결과.
+    kind: "vega"(Vega-Lite spec dict) / "line"(Altair 없을 때 피벗 표) / "table" / "info" / "warning"
+    """
+    kind: str
+    payload: Any = None
+    message: str = ""
+    use_container_width: bool = True
+
+
+# (코드, 차트 종류, 데이터 버전) → 완성된 spec. 봤던 지역구로 돌아가면 pandas/Altair 작업 없이 렌더링만 한다.
+CHART_CACHE = LRUCache(maxsize=256)
+
+
+def cached_spec(code: Optional[Hashable], kind: str, version: Optional[Hashable], build: Callable[[], Any]) -> Any:
+    """code/version이 없으면(호출측이 데이터 지문을 모를 때) 캐시 없이 매번 만든다."""
+    if code is None or version is None:
+        return build()
+    return CHART_CACHE.get_or_build((str(code), kind, version), build)
+
+
+def chart_cache_stats() -> dict:
+    return CHART_CACHE.stats()
+
+
+def _compile(chart) -> dict:
+    """Altair 차트 → Vega-Lite spec dict. Streamlit과 같이 'none' 테마로 직렬화해 기본 크기 설정을 뺀다."""
+    with alt.themes.enable("none"):
+        return chart.to_dict()
+
+
+def _render_spec(spec: ChartSpec) -> None:
+    if spec.kind == "vega":
+        st.vega_lite_chart(spec.payload, use_container_width=spec.use_container_width)
+    elif spec.kind == "line":
+        if spec.message:
+            st.info(spec.message)
+        st.line_chart(spec.payload)
+    elif spec.kind == "table":
+        if spec.message:
+            st.info(spec.message)
+        st.dataframe(spec.payload)
+    elif spec.kind == "warning":
+        st.warning(spec.message)
+        if spec.payload is not None:
+            st.dataframe(spec.payload)
+    else:
+        st.info(spec.message)
+
+
 # -------- 내부: 파이차트 생성 (Altair) --------
-def _pie_chart(title: str, labels: list[str], values: list[float], colors: list[str], width: int = 260, height: int = 260):
+@timed()
+def build_pie_spec(title: str, labels: list[str], values: list[float], colors: list[str],
+                   width: int = 260, height: int = 260) -> ChartSpec:
     if alt is None:
-        st.info(f"{title}: 시각화 라이브러리(Altair)를 사용할 수 없습니다.")
-        st.dataframe(pd.DataFrame({"구성": labels, "비율(%)": values}))
-        return
+        return ChartSpec("table", pd.DataFrame({"구성": labels, "비율(%)": values}),
+                         f"{title}: 시각화 라이브러리(Altair)를 사용할 수 없습니다.")
 
     vals = [(v if isinstance(v, (int, float)) and v > 0 else 0.0) for v in values]
     total = sum(vals)
     if total <= 0:
-        st.info(f"{title} 자료가 없습니다.")
-        return
+        return ChartSpec("info", message=f"{title} 자료가 없습니다.")
     vals = [v / total * 100.0 for v in vals]
     df = pd.DataFrame({"구성": labels, "비율": vals})
 
@@ -88,13 +172,74 @@ def _pie_chart(title: str, labels: list[str], values: list[float], colors: list[
         )
         .properties(title=title, width=width, height=height)
     )
-    st.altair_chart(chart, use_container_width=False)
+    return ChartSpec("vega", _compile(chart), use_container_width=False)
+
+def _pie_chart(title: str, labels: list[str], values: list[float], colors: list[str], width: int = 260, height: int = 260):
+    _render_spec(build_pie_spec(title, labels, values, colors, width, height))
+
+# -------- 인구 정보 박스 --------
+@timed()
+def build_population_view(pop_row: pd.DataFrame) -> Optional[dict]:
+    """인구 박스에 필요한 합계와 파이차트 spec을 한 번에 계산 (자료가 없으면 None)."""
+    if pop_row is None or pop_row.empty:
+        return None
+
+    pop_row = _norm_cols(pop_row)
+
+    def _sum(col):
+        if col not in pop_row.columns:
+            return None
+        s = pop_row[col]
+        if not pd.api.types.is_numeric_dtype(s):
+            s = pd.to_numeric(s.map(_to_float), errors="coerce")
+        return float(s.sum()) if s.notna().any() else None
+
+    total = _sum("전체 유권자")
+    y2030, y4050, y65 = _sum("2030"), _sum("4050"), _sum("65세 이상")
+    m2030, f2030, single = _sum("2030 남성"), _sum("2030 여성"), _sum("2030 1인가구")
+
+    ages = [y2030, y4050, y65]
+    rest = total - sum(a for a in ages if a is not None) if total is not None else None
+    return {
+        "total": total, "y2030": y2030, "y65": y65, "single": single,
+        "age_pie": build_pie_spec("연령 구성", ["2030", "4050", "65세 이상", "기타"], ages + [rest],
+                                  ["#450693", "#8C00FF", "#FF3F7F", "#D9D9D9"]),
+        "gender_pie": build_pie_spec("2030 성별 구성", ["남성", "여성"], [m2030, f2030], ["#152484", "#E61E2B"]),
+    }
+
+@timed()
+def render_population_box(pop_row: pd.DataFrame, code: Optional[Hashable] = None, version: Optional[Hashable] = None):
+    """population.csv의 동 단위 행들을 지역구 합계로 묶어 연령/2030 성별 구성을 표시."""
+    view = cached_spec(code, "population", version, lambda: build_population_view(pop_row))
+    if view is None:
+        st.info("해당 선거구의 인구 데이터가 없습니다.")
+        return
+    total, y2030, y65, single = view["total"], view["y2030"], view["y65"], view["single"]
+
+    box = st.container()
+    with box:
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            st.metric("전체 유권자", f"{int(total):,}" if total is not None else "N/A")
+        with c2:
+            st.metric("2030 비율", _fmt_pct(y2030 / total * 100.0) if total and y2030 is not None else "N/A")
+        with c3:
+            st.metric("65세 이상 비율", _fmt_pct(y65 / total * 100.0) if total and y65 is not None else "N/A")
+
+        p1, p2 = st.columns(2)
+        with p1:
+            _render_spec(view["age_pie"])
+        with p2:
+            _render_spec(view["gender_pie"])
+        if single is not None and y2030:
+            st.caption(f"2030 1인가구: {int(single):,}명 (2030 대비 {_fmt_pct(single / y2030 * 100.0)})")
 
 # -------- 24년 결과 카드 --------
-def render_results_2024_card(res_row: pd.DataFrame, df_24: pd.DataFrame = None, code: str = None):
+@timed()
+def build_results_2024_view(res_row: pd.DataFrame, df_24: pd.DataFrame = None, code: str = None) -> Optional[dict]:
+    """1·2위 이름/득표율과 격차 (자료가 없으면 None). 화면 카드와 HTML 보고서가 같이 쓴다."""
     if res_row is None or res_row.empty:
-        st.info("해당 선거구의 24년 결과 데이터가 없습니다.")
-        return
+        return None
 
     res_row = _norm_cols(res_row)
     if "연도" in res_row.columns:
@@ -115,98 +260,169 @@ def render_results_2024_card(res_row: pd.DataFrame, df_24: pd.DataFrame = None,
     c2n = next((c for c in ["후보2_이름", "2위이름", "2위 후보", "2위_이름", "2nd_name"] if c in res_row.columns), None)
     c2v = next((c for c in ["후보2_득표율", "2위득표율", "2위 득표율", "2nd_share", "2위득표율(%)"] if c in res_row.columns), None)
 
+    # 단위는 전체 표가 있으면 그 컬럼 전체로 정한다
+    unit_src = _norm_cols(df_24) if df_24 is not None and not df_24.empty else res_row
+    scale = {c: _pct_scale(unit_src if c in unit_src.columns else res_row, c) for c in (c1v, c2v) if c}
+
     name1 = str(r.get(c1n)) if c1n else "1위"
-    share1 = _to_pct_float(r.get(c1v))
+    share1 = _to_pct_float(r.get(c1v), scale=scale.get(c1v, 1.0))
     name2 = str(r.get(c2n)) if c2n else "2위"
-    share2 = _to_pct_float(r.get(c2v))
+    share2 = _to_pct_float(r.get(c2v), scale=scale.get(c2v, 1.0))
 
     gap = None
     if isinstance(share1, (int, float)) and isinstance(share2, (int, float)):
         gap = round(share1 - share2, 2)
     elif df_24 is not None and code is not None:
         gap = compute_24_gap(df_24, code)
+    return {"name1": name1, "share1": share1, "name2": name2, "share2": share2, "gap": gap}
+
+@timed()
+def render_results_2024_card(res_row: pd.DataFrame, df_24: pd.DataFrame = None, code: str = None):
+    view = build_results_2024_view(res_row, df_24, code)
+    if view is None:
+        st.info("해당 선거구의 24년 결과 데이터가 없습니다.")
+        return
+    gap = view["gap"]
 
     box = st.container()
     with box:
         st.markdown("**24년 총선결과**")
         col1, col2, col3 = st.columns([1.2, 1.2, 1])
         with col1:
-            st.metric(label=f"{name1}", value=_fmt_pct(share1))
+            st.metric(label=f"{view['name1']}", value=_fmt_pct(view["share1"]))
         with col2:
-            st.metric(label=f"{name2}", value=_fmt_pct(share2))
+            st.metric(label=f"{view['name2']}", value=_fmt_pct(view["share2"]))
         with col3:
             st.metric(label="1~2위 격차", value=f"{gap:.2f}p" if isinstance(gap, (int, float)) else "N/A")
 
 # -------- 현직 정보 카드 --------
-def render_incumbent_card(cur_row: pd.DataFrame):
+_INCUMBENT_FIELDS = {
+    "name":   ["의원명", "이름", "성명", "incumbent_name"],
+    "party":  ["정당", "소속정당", "party"],
+    "term":   ["선수", "당선횟수", "terms"],
+    "age":    ["연령", "나이", "age"],
+    "gender": ["성별", "gender"],
+    "status": ["상태", "현직여부", "status"],
+}
+# current_info에서 이 카드가 읽는 컬럼 (경력 같은 긴 텍스트 컬럼은 읽지 않도록 로더 프로젝션에 사용)
+INCUMBENT_COLUMNS = [c for cands in _INCUMBENT_FIELDS.values() for c in cands]
+
+
+@timed()
+def build_incumbent_view(cur_row: pd.DataFrame) -> Optional[dict]:
+    """현직 카드 항목 {name, party, term, age, gender, status}. 없는 항목은 "N/A", 상태 컬럼이 없으면 None."""
     if cur_row is None or cur_row.empty:
-        st.info("현직 정보 데이터가 없습니다.")
-        return
+        return None
 
     cur_row = _norm_cols(cur_row)
     r = cur_row.iloc[0]
-    name_col   = next((c for c in ["의원명", "이름", "성명", "incumbent_name"] if c in cur_row.columns), None)
-    party_col  = next((c for c in ["정당", "소속정당", "party"] if c in cur_row.columns), None)
-    term_col   = next((c for c in ["선수", "당선횟수", "terms"] if c in cur_row.columns), None)
-    age_col    = next((c for c in ["연령", "나이", "age"] if c in cur_row.columns), None)
-    gender_col = next((c for c in ["성별", "gender"] if c in cur_row.columns), None)
-    status_col = next((c for c in ["상태", "현직여부", "status"] if c in cur_row.columns), None)
+    view = {}
+    for field, cands in _INCUMBENT_FIELDS.items():
+        col = next((c for c in cands if c in cur_row.columns), None)
+        view[field] = r.get(col, "N/A")
+    if not any(c in cur_row.columns for c in _INCUMBENT_FIELDS["status"]):
+        view["status"] = None
+    return view
+
+@timed()
+def render_incumbent_card(cur_row: pd.DataFrame):
+    view = build_incumbent_view(cur_row)
+    if view is None:
+        st.info("현직 정보 데이터가 없습니다.")
+        return
 
     box = st.container()
     with box:
         st.markdown("**현직정보**")
-        st.write(f"- 의원: **{r.get(name_col, 'N/A')}** / 정당: **{r.get(party_col, 'N/A')}**")
+        st.write(f"- 의원: **{view['name']}** / 정당: **{view['party']}**")
         st.write(
-            f"- 선수: **{r.get(term_col, 'N/A')}** / 성별: **{r.get(gender_col, 'N/A')}** / 연령: **{r.get(age_col, 'N/A')}**"
+            f"- 선수: **{view['term']}** / 성별: **{view['gender']}** / 연령: **{view['age']}**"
         )
-        if status_col:
-            st.caption(f"상태: {r.get(status_col)}")
+        if view["status"] is not None:
+            st.caption(f"상태: {view['status']}")
 
 # -------- 진보당 현황 박스 --------
-def render_prg_party_box(prg_row: pd.DataFrame, pop_row: pd.DataFrame):
+@timed()
+def build_prg_view(prg_row: pd.DataFrame, pop_row: pd.DataFrame,
+                   prg_table: pd.DataFrame = None, pop_table: pd.DataFrame = None) -> Optional[dict]:
+    """
+    진보당 박스의 표시 문자열 (자료가 없으면 None). 후보 수/인구 맥락은 없으면 None.
+    prg_table/pop_table(전체 표)을 주면 % 단위를 그 컬럼 전체로 정하고, 없으면 넘겨받은 행으로 정한다.
+    """
+    if prg_row is None or prg_row.empty:
+        return None
+
+    prg_row = _norm_cols(prg_row)
+    r = prg_row.iloc[0]
+
+    strength_col = next((c for c in ["진보당 득표력","득표력","progressive_strength","PL_prg_str"] if c in prg_row.columns), None)
+    org_col      = next((c for c in ["진보당 당원수","당원수","조직수","branch_count","members"] if c in prg_row.columns), None)
+    cand_col     = next((c for c in ["진보당 지방선거후보","지방선거후보수","local_candidates"] if c in prg_row.columns), None)
+
+    prg_units = _norm_cols(prg_table) if prg_table is not None and strength_col in prg_table.columns else prg_row
+    view = {
+        "strength": (_fmt_pct(_to_pct_float(r.get(strength_col), scale=_pct_scale(prg_units, strength_col)))
+                     if strength_col and pd.notna(r.get(strength_col)) else "지표 미제공"),
+        "org": f"{_to_int(r.get(org_col)):,}" if org_col and pd.notna(r.get(org_col)) else "N/A",
+        "candidates": _to_int(r.get(cand_col)) if cand_col and pd.notna(r.get(cand_col)) else None,
+        "elder": None,
+        "youth": None,
+    }
+    if pop_row is not None and not pop_row.empty:
+        pop_row = _norm_cols(pop_row)
+        rp = pop_row.iloc[0]
+        elder_col = next((c for c in ["고령층비율", "65세이상비율", "age65p"] if c in pop_row.columns), None)
+        youth_col = next((c for c in ["청년층비율", "39세이하비율", "age39m"] if c in pop_row.columns), None)
+        pop_units = _norm_cols(pop_table) if pop_table is not None and not pop_table.empty else pop_row
+
+        def _share(col):
+            if not col or pd.isna(rp.get(col)):
+                return "N/A"
+            return _fmt_pct(_to_pct_float(rp.get(col), scale=_pct_scale(pop_units if col in pop_units.columns else pop_row, col)))
+
+        view["elder"] = _share(elder_col)
+        view["youth"] = _share(youth_col)
+    return view
+
+@timed()
+def render_prg_party_box(prg_row: pd.DataFrame, pop_row: pd.DataFrame,
+                         prg_table: pd.DataFrame = None, pop_table: pd.DataFrame = None):
     box = st.container()
     with box:
         st.markdown("**진보당 현황**")
-        if prg_row is None or prg_row.empty:
+        view = build_prg_view(prg_row, pop_row, prg_table, pop_table)
+        if view is None:
             st.info("진보당 관련 데이터가 없습니다.")
             return
 
-        prg_row = _norm_cols(prg_row)
-        r = prg_row.iloc[0]
-
-        strength_col = next((c for c in ["진보당 득표력","득표력","progressive_strength","PL_prg_str"] if c in prg_row.columns), None)
-        org_col      = next((c for c in ["진보당 당원수","당원수","조직수","branch_count","members"] if c in prg_row.columns), None)
-        cand_col     = next((c for c in ["진보당 지방선거후보","지방선거후보수","local_candidates"] if c in prg_row.columns), None)
-
         c1, c2 = st.columns(2)
         with c1:
-            if strength_col and pd.notna(r.get(strength_col)):
-                st.metric("진보득표력", _fmt_pct(_to_pct_float(r.get(strength_col))))
-            else:
-                st.metric("진보득표력", "지표 미제공")
+            st.metric("진보득표력", view["strength"])
         with c2:
-            st.metric("조직 규모", f"{_to_int(r.get(org_col)):,}" if org_col and pd.notna(r.get(org_col)) else "N/A")
+            st.metric("조직 규모", view["org"])
 
-        if cand_col and pd.notna(r.get(cand_col)):
-            st.caption(f"지방선거 후보 수: {_to_int(r.get(cand_col)):,}명")
+        if view["candidates"] is not None:
+            st.caption(f"지방선거 후보 수: {view['candidates']:,}명")
 
-        if pop_row is not None and not pop_row.empty:
-            pop_row = _norm_cols(pop_row)
-            rp = pop_row.iloc[0]
-            elder_col = next((c for c in ["고령층비율", "65세이상비율", "age65p"] if c in pop_row.columns), None)
-            youth_col = next((c for c in ["청년층비율", "39세이하비율", "age39m"] if c in pop_row.columns), None)
+        if view["elder"] is not None:
             with st.expander("인구 맥락 보기", expanded=False):
-                elder = _fmt_pct(_to_pct_float(rp.get(elder_col))) if elder_col and pd.notna(rp.get(elder_col)) else "N/A"
-                youth = _fmt_pct(_to_pct_float(rp.get(youth_col))) if youth_col and pd.notna(rp.get(youth_col)) else "N/A"
-                st.write(f"- 고령층 비율: {elder} / 청년층 비율: {youth}")
+                st.write(f"- 고령층 비율: {view['elder']} / 청년층 비율: {view['youth']}")
 
 # -------- 득표 추이 차트 --------
-def render_vote_trend_chart(ts: pd.DataFrame):
+PARTY_ORDER  = ["민주", "보수", "진보", "기타"]
+PARTY_COLORS = ["#152484", "#E61E2B", "#450693", "#798897"]
+
+
+def _trend_frame(ts: pd.DataFrame, keys: tuple = ()):
+    """
+    추이 표 → [*keys, year, label, prop] long 표. 그릴 수 없으면 ChartSpec(info/warning).
+    long(label/prop) 또는 연도별 wide 모양 모두 받는다. keys는 그대로 남길 식별 컬럼 (비교 차트의 지역구).
+    """
     if ts is None or ts.empty:
-        st.info("득표 추이 데이터가 없습니다.")
-        return
+        return ChartSpec("info", message="득표 추이 데이터가 없습니다.")
 
     df = _norm_cols(ts)
+    keys = [k for k in keys if k in df.columns]
 
     if {"label", "prop"}.issubset(df.columns) and (("election" in df.columns) or ("year" in df.columns) or ("연도" in df.columns)):
         if "year" not in df.columns:
@@ -217,64 +433,229 @@ def render_vote_trend_chart(ts: pd.DataFrame):
         df["prop"] = pd.to_numeric(df["prop"], errors="coerce")
         df = df.dropna(subset=["year", "prop"])
         if df.empty:
-            st.info("그릴 수 있는 득표 데이터가 없습니다.")
-            return
+            return ChartSpec("info", message="그릴 수 있는 득표 데이터가 없습니다.")
 
     elif ("year" in df.columns or "연도" in df.columns):
         if "year" not in df.columns:
             df["year"] = pd.to_numeric(df["연도"], errors="coerce")
-        value_cols = [c for c in df.columns if c not in ["year","연도"]]
+        value_cols = [c for c in df.columns if c not in ["year","연도"] + keys]
         if not value_cols:
-            st.info("득표 성향 컬럼이 없어 차트를 그릴 수 없습니다.")
-            return
-        df = df[["year"] + value_cols].copy()
-        df = df.melt(id_vars=["year"], var_name="label", value_name="prop")
+            return ChartSpec("info", message="득표 성향 컬럼이 없어 차트를 그릴 수 없습니다.")
+        df = df[keys + ["year"] + value_cols].copy()
+        df = df.melt(id_vars=keys + ["year"], var_name="label", value_name="prop")
         df["prop"] = pd.to_numeric(df["prop"], errors="coerce")
         df = df.dropna(subset=["year","prop"])
         if df.empty:
-            st.info("그릴 수 있는 득표 데이터가 없습니다.")
-            return
+            return ChartSpec("info", message="그릴 수 있는 득표 데이터가 없습니다.")
     else:
-        st.warning("vote_trend 데이터에 필요한 컬럼(연도/성향/득표)이 부족합니다.")
-        st.dataframe(df.head())
-        return
+        return ChartSpec("warning", df.head(), "vote_trend 데이터에 필요한 컬럼(연도/성향/득표)이 부족합니다.")
 
-    if alt is None:
-        st.info("Altair를 사용할 수 없어 기본 라인차트로 대체합니다.")
-        try:
-            pvt = df.pivot_table(index="year", columns="label", values="prop", aggfunc="mean").sort_index()
-            st.line_chart(pvt)
-        except Exception:
-            st.error("기본 라인차트도 실패했습니다.")
-        return
+    # 차트에 쓰는 컬럼만 남겨 spec에 들어가는 데이터를 줄임
+    return df[keys + ["year", "label", "prop"]].astype({"year": "int64", "label": str, **{k: str for k in keys}})
 
-    party_order  = ["민주", "보수", "진보", "기타"]
-    party_colors = ["#152484", "#E61E2B", "#450693", "#798897"]
 
+def _trend_axes(df: pd.DataFrame):
+    """득표 추이 차트 공용 (x, y, tooltip). prop이 0~1이면 % 축."""
     vmax = df["prop"].max()
     y_enc = alt.Y("prop:Q", title="득표율(%)") if (pd.notna(vmax) and vmax is not None and vmax > 1) \
            else alt.Y("prop:Q", title="득표율", axis=alt.Axis(format=".0%"))
+    x_enc = alt.X("year:O", title="연도", sort="ascending",
+                  axis=alt.Axis(labelAngle=-30, labelOverlap="greedy"))
+    tooltip = [
+        alt.Tooltip("year:O", title="연도"),
+        alt.Tooltip("label:N", title="계열"),
+        alt.Tooltip("prop:Q", title="득표", format=".2f"),
+    ]
+    return x_enc, y_enc, tooltip
+
+
+@timed()
+def build_vote_trend_spec(ts: pd.DataFrame) -> ChartSpec:
+    df = _trend_frame(ts)
+    if isinstance(df, ChartSpec):
+        return df
+
+    if alt is None:
+        try:
+            pvt = df.pivot_table(index="year", columns="label", values="prop", aggfunc="mean").sort_index()
+        except Exception:
+            return ChartSpec("warning", message="기본 라인차트도 실패했습니다.")
+        return ChartSpec("line", pvt, "Altair를 사용할 수 없어 기본 라인차트로 대체합니다.")
 
+    x_enc, y_enc, tooltip = _trend_axes(df)
     chart = (
         alt.Chart(df)
         .mark_line(point=True)
         .encode(
-            x=alt.X("year:O", title="연도", sort="ascending",
-                    axis=alt.Axis(labelAngle=-30, labelOverlap="greedy")),
+            x=x_enc,
             y=y_enc,
             color=alt.Color(
                 "label:N",
                 title="정당계열",
-                scale=alt.Scale(domain=party_order, range=party_colors),
+                scale=alt.Scale(domain=PARTY_ORDER, range=PARTY_COLORS),
                 legend=alt.Legend(orient="top"),
             ),
-            tooltip=[
-                alt.Tooltip("year:O", title="연도"),
-                alt.Tooltip("label:N", title="계열"),
-                alt.Tooltip("prop:Q", title="득표", format=".2f"),
-            ],
+            tooltip=tooltip,
         )
         .properties(height=300)
         .interactive()
     )
-    st.altair_chart(chart, use_container_width=True)
+    return ChartSpec("vega", _compile(chart))
+
+@timed()
+def render_vote_trend_chart(ts, code: Optional[Hashable] = None, version: Optional[Hashable] = None):
+    """
+    득표 추이 라인차트. code와 version(데이터 지문)을 주면 완성된 spec을 LRU 캐시에서 재사용.
+    ts는 DataFrame 또는 DataFrame을 돌려주는 함수(캐시 hit이면 호출하지 않음).
+    """
+    build = (lambda: build_vote_trend_spec(ts() if callable(ts) else ts))
+    _render_spec(cached_spec(code, "vote_trend", version, build))
+
+# -------- 지역구 비교 --------
+@timed()
+def build_compare_trend_spec(ts_many: pd.DataFrame, names: Optional[dict] = None) -> ChartSpec:
+    """
+    여러 지역구 추이(compute_trend_many 결과)를 계열별 작은 차트에 겹쳐 그린다 (색 = 지역구).
+    축/툴팁은 build_vote_trend_spec과 같고, names는 {표준 코드: 라벨}.
+    """
+    if ts_many is not None and not ts_many.empty and "코드" in ts_many.columns:
+        ts_many = ts_many.assign(지역구=canon_codes(ts_many["코드"]).map(lambda k: (names or {}).get(k, k)))
+    df = _trend_frame(ts_many, keys=("지역구",))
+    if isinstance(df, ChartSpec):
+        return df
+    if "지역구" not in df.columns:
+        return ChartSpec("warning", df.head(), "비교 차트에 필요한 코드 컬럼이 없습니다.")
+
+    if alt is None:
+        try:
+            pvt = df.pivot_table(index="year", columns=["label", "지역구"], values="prop", aggfunc="mean").sort_index()
+            pvt.columns = [f"{lab} · {name}" for lab, name in pvt.columns]
+        except Exception:
+            return ChartSpec("warning", message="기본 라인차트도 실패했습니다.")
+        return ChartSpec("line", pvt, "Altair를 사용할 수 없어 기본 라인차트로 대체합니다.")
+
+    x_enc, y_enc, tooltip = _trend_axes(df)
+    order = list(dict.fromkeys(df["지역구"]))
+    chart = (
+        alt.Chart(df)
+        .mark_line(point=True)
+        .encode(
+            x=x_enc,
+            y=y_enc,
+            color=alt.Color("지역구:N", title="지역구", sort=order, legend=alt.Legend(orient="top", columns=5)),
+            tooltip=[alt.Tooltip("지역구:N", title="지역구")] + tooltip,
+        )
+        .properties(height=220, width=320)
+        .facet(facet=alt.Facet("label:N", title=None, sort=[l for l in PARTY_ORDER if l in set(df["label"])]),
+               columns=2)
+    )
+    return ChartSpec("vega", _compile(chart))
+
+@timed()
+def render_compare_trend_chart(ts_many, codes: tuple = (), version: Optional[Hashable] = None,
+                               names: Optional[dict] = None):
+    """비교 차트. (선택 코드 묶음, version)이 같으면 spec 재사용. ts_many는 DataFrame 또는 함수."""
+    key = ",".join(_canon_code(c) for c in codes) if codes else None
+    build = (lambda: build_compare_trend_spec(ts_many() if callable(ts_many) else ts_many, names))
+    _render_spec(cached_spec(key, "compare_trend", version, build))
+
+def _by_code(rows: pd.DataFrame) -> dict:
+    """get_many 결과 → {표준 코드: 그 코드의 행}."""
+    if rows is None or rows.empty or "코드" not in rows.columns:
+        return {}
+    return {k: g for k, g in rows.groupby(canon_codes(rows["코드"]).to_numpy(), sort=False)}
+
+
+@timed()
+def build_comparison_table(districts, codes, summary: pd.DataFrame, names: Optional[dict] = None) -> pd.DataFrame:
+    """
+    비교 표 (행 = 지역구, codes 순서): 24년 1·2위와 격차, 현직, 진보득표력/유동성/경합도, 유권자 구성.
+    districts는 DistrictIndex (표마다 get_many 한 번), summary는 compute_summary_many 결과.
+    24년/현직 항목은 카드와 같은 build_*_view로 만들어 화면 카드와 값이 같다.
+    """
+    keys = list(dict.fromkeys(_canon_code(c) for c in codes))
+    results = _by_code(districts.get_many("results_2024", keys))
+    incumbents = _by_code(districts.get_many("current_info", keys))
+
+    pop = _norm_cols(districts.get_many("population", keys))
+    pop_cols = [c for c in ("전체 유권자", "2030", "65세 이상") if c in pop.columns]
+    if pop_cols and "코드" in pop.columns:
+        nums = pop[pop_cols].apply(lambda s: s if pd.api.types.is_numeric_dtype(s)
+                                   else pd.to_numeric(s.map(_to_float), errors="coerce"))
+        pop_sum = nums.groupby(canon_codes(pop["코드"]).to_numpy()).sum(min_count=1).reindex(keys)
+    else:
+        pop_sum = pd.DataFrame(index=keys)
+    total = pop_sum.get("전체 유권자")
+
+    def _ratio(col):
+        if total is None or col not in pop_sum.columns:
+            return [None] * len(keys)
+        return (pop_sum[col] / total.where(total > 0) * 100.0).round(2).tolist()
+
+    summary = summary.reindex(keys) if summary is not None else pd.DataFrame(index=keys)
+    rows = []
+    for k in keys:
+        res = build_results_2024_view(results.get(k))
+        inc = build_incumbent_view(incumbents.get(k))
+        gap = res["gap"] if res and res["gap"] is not None else summary.get("gap_24", {}).get(k)
+        rows.append({
+            "지역구": (names or {}).get(k, k),
+            "24년 1위": f"{res['name1']} ({_fmt_pct(res['share1'])})" if res else None,
+            "24년 2위": f"{res['name2']} ({_fmt_pct(res['share2'])})" if res else None,
+            "24년 격차(%p)": gap,
+            "현직": inc["name"] if inc else None,
+            "정당": inc["party"] if inc else None,
+            "선수": inc["term"] if inc else None,
+        })
+    table = pd.DataFrame(rows, index=pd.Index(keys, name="코드"))
+    table["진보득표력(%)"] = summary.get("PL_prg_str")
+    table["유동성B"] = summary.get("PL_swing_B")
+    table["경합도B"] = summary.get("PL_gap_B")
+    table["전체 유권자"] = total.astype("Int64") if total is not None else None
+    table["2030 비율(%)"] = _ratio("2030")
+    table["65세 이상 비율(%)"] = _ratio("65세 이상")
+    return table
+
+# -------- 행정동 드릴다운 --------
+@timed()
+def build_dong_heatmap_spec(shares_long: pd.DataFrame, label: str) -> ChartSpec:
+    """[행정동, election, prop] → 행정동 × 선거 득표율 히트맵."""
+    if shares_long is None or shares_long.empty:
+        return ChartSpec("info", message="행정동 단위 원자료가 없습니다.")
+    if alt is None:
+        return ChartSpec("table", shares_long.pivot_table(index="행정동", columns="election", values="prop", sort=False))
+    order = list(dict.fromkeys(shares_long["election"]))
+    chart = (
+        alt.Chart(shares_long)
+        .mark_rect()
+        .encode(
+            x=alt.X("election:N", title="선거", sort=order, axis=alt.Axis(labelAngle=-40)),
+            y=alt.Y("행정동:N", title=None, sort=None),
+            color=alt.Color("prop:Q", title=f"{label}(%)", scale=alt.Scale(scheme="blues")),
+            tooltip=[
+                alt.Tooltip("행정동:N"),
+                alt.Tooltip("election:N", title="선거"),
+                alt.Tooltip("prop:Q", title="득표율", format=".2f"),
+            ],
+        )
+        .properties(height=max(160, 18 * shares_long["행정동"].nunique()))
+    )
+    return ChartSpec("vega", _compile(chart))
+
+@timed()
+def render_dong_drilldown(table: pd.DataFrame, heatmap: ChartSpec, district_row: Optional[pd.Series] = None):
+    """행정동별 요약 표 + 득표율 히트맵. district_row가 있으면 지역구 전체 값을 함께 표시."""
+    if table is None or table.empty:
+        st.info("해당 선거구의 행정동 단위 원자료가 없습니다.")
+        return
+    if district_row is not None:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("지역구 최근 득표율", _fmt_pct(_to_float(district_row.get("최근 득표율"))))
+        c2.metric("변동성(표준편차)", _fmt_gap(_to_float(district_row.get("변동성"))))
+        slope = _to_float(district_row.get("추세(%p/년)"))
+        c3.metric("추세", f"{slope:+.2f}p/년" if slope is not None else "N/A")
+        swing = _to_float(district_row.get("최근 스윙"))
+        c4.metric("최근 스윙", f"{swing:+.2f}p" if swing is not None else "N/A")
+    st.dataframe(table.round(2), use_container_width=True)
+    st.caption("변동성: 선거 간 득표율 표준편차 · 추세: 연도 대비 최소제곱 기울기 · 최근 스윙: 직전 선거 대비 변화")
+    _render_spec(heatmap)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE
+from district_index import canon_codes
+from ingest import load_dong_tallies
+from instrument import timed
+from tensor import (VoteTensor, build_vote_tensor, dong_positions, load_vote_tensor, realign_elections,
+                    replace_cells, tensor_version)
+
+# 시/도 → 지역구 → 행정동 계층 (slice의 level 값)
+LEVELS = ("sido", "district", "dong")
+# 큐브에 미리 합산해 두는 집계 컬럼 (기권수/계는 여기서 파생 가능하므로 제외)
+TALLIES = ("선거인수", "투표수", "무효투표수")
+
+
+def _as_list(value) -> Optional[list]:
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+        return [value]
+    return list(value)
+
+
+# ---------- 큐브 ----------
+
+class VoteCube:
+    """
+    시/도 × 지역구 × 행정동 × 선거 × 계열 사전 집계.
+    행정동 축을 (시/도, 지역구, 행정동) 순으로 정렬해 두면 상위 단위는 모두 연속 구간이라
+    단계마다 np.add.reduceat 한 번으로 합산된다. slice()는 이 배열에서 마스크로 골라 표만 만든다.
+    """
+
+    def __init__(self, vt: VoteTensor, tallies: np.ndarray):
+        order = np.argsort(vt.dong_sido, kind="stable")  # 텐서는 (지역구, 행정동) 순 → 시/도만 앞에 붙임
+        self.tensor = vt
+        self.dong_tallies = tallies  # 텐서 행정동 순서 그대로 (증분 갱신용)
+        self.elections = list(vt.elections)
+        self.labels = list(vt.labels)
+        self.tallies = list(TALLIES)
+
+        dong_votes = vt.votes[order]
+        dong_tally = tallies[order]
+        dong_sido = vt.dong_sido[order]
+        dong_district = vt.dong_district[order]
+
+        d_starts = _run_starts(dong_district)
+        s_starts = _run_starts(dong_sido)
+        self._keys: Dict[str, Dict[str, np.ndarray]] = {
+            "dong": {"sido": dong_sido, "district": dong_district,
+                     "dong": vt.dong_codes[order], "name": vt.dong_names[order]},
+            "district": {"sido": dong_sido[d_starts], "district": dong_district[d_starts]},
+            "sido": {"sido": dong_sido[s_starts]},
+        }
+        self._votes = {
+            "dong": dong_votes,
+            "district": _reduce(dong_votes, d_starts),
+            "sido": _reduce(dong_votes, s_starts),
+        }
+        self._tally = {
+            "dong": dong_tally,
+            "district": _reduce(dong_tally, d_starts),
+            "sido": _reduce(dong_tally, s_starts),
+        }
+
+    def __len__(self) -> int:
+        return len(self._keys["dong"]["dong"])
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0 or not self.elections
+
+    def sidos(self) -> List[str]:
+        return list(self._keys["sido"]["sido"])
+
+    def district_counts(self) -> pd.Series:
+        """시/도별 지역구 수 (내림차순). 종합 페이지의 groupby 대체."""
+        s = pd.Series(self._keys["district"]["sido"]).value_counts(sort=False)
+        return s.sort_values(ascending=False, kind="stable").rename("지역구수").rename_axis("시/도")
+
+    @timed("VoteCube.slice")
+    def slice(self, sido=None, district=None, dong=None, election=None, label=None,
+              level: Optional[str] = None) -> pd.DataFrame:
+        """
+        조건에 맞는 (단위, 선거[, 계열]) 행.
+        각 조건은 값 하나 또는 목록. level이 없으면 가장 좁은 조건의 단위
+        (dong → 행정동, district → 지역구, 그 외 → 시/도). level을 더 낮게 주면 하위 단위를 나열한다.
+        columns: 단위 키 + 선거 + 선거인수/투표수/무효투표수/투표율 (+ label을 주면 계열/득표/득표율)
+        """
+        if level is None:
+            level = "dong" if dong is not None else "district" if district is not None else "sido"
+        if level not in LEVELS:
+            raise ValueError(f"level은 {LEVELS} 중 하나여야 합니다: {level}")
+        if LEVELS.index(level) < max([LEVELS.index(k) for k, v in
+                                      (("sido", sido), ("district", district), ("dong", dong)) if v is not None] + [0]):
+            raise ValueError(f"level={level}보다 좁은 조건은 쓸 수 없습니다")
+
+        keys = self._keys[level]
+        mask = np.ones(len(keys["sido"]), dtype=bool)
+        if sido is not None:
+            mask &= np.isin(keys["sido"], _as_list(sido))
+        if district is not None:
+            mask &= np.isin(keys["district"], canon_codes(pd.Series(_as_list(district))).to_numpy())
+        if dong is not None:
+            mask &= np.isin(keys["dong"], [str(d) for d in _as_list(dong)])
+        units = np.flatnonzero(mask)
+        elections = self._positions(self.elections, election, "election")
+
+        tally = self._tally[level][np.ix_(units, elections)]  # [U, E', T]
+        n_u, n_e = len(units), len(elections)
+        out = {k: np.repeat(v[units], n_e) for k, v in keys.items()}
+        out["선거"] = np.tile(np.asarray(self.elections, dtype=object)[elections], n_u)
+        for t, name in enumerate(self.tallies):
+            out[name] = tally[..., t].ravel()
+        electors = out["선거인수"]
+        out["투표율"] = np.divide(out["투표수"] * 100.0, electors, out=np.full(electors.shape, np.nan),
+                               where=electors > 0)
+        table = pd.DataFrame(out).rename(columns={"sido": "시/도", "district": "지역구코드",
+                                                  "dong": "행정동코드", "name": "행정동"})
+        if label is None:
+            return table
+
+        labels = self._positions(self.labels, label, "label")
+        votes = self._votes[level][np.ix_(units, elections)]  # [U, E', L]
+        total = votes.sum(axis=2, keepdims=True)
+        share = np.divide(votes * 100.0, total, out=np.full(votes.shape, np.nan), where=total > 0)
+        n_l = len(labels)
+        table = table.loc[table.index.repeat(n_l)].reset_index(drop=True)
+        table.insert(table.columns.get_loc("선거") + 1, "계열",
+                     np.tile(np.asarray(self.labels, dtype=object)[labels], n_u * n_e))
+        table["득표"] = votes[..., labels].ravel()
+        table["득표율"] = share[..., labels].ravel()
+        return table
+
+    @staticmethod
+    def _positions(values: List[Hashable], wanted, what: str) -> np.ndarray:
+        if wanted is None:
+            return np.arange(len(values))
+        pos = {v: i for i, v in enumerate(values)}
+        missing = [w for w in _as_list(wanted) if w not in pos]
+        if missing:
+            raise KeyError(f"알 수 없는 {what}: {missing}")
+        return np.array([pos[w] for w in _as_list(wanted)], dtype=int)
+
+
+def _run_starts(keys: np.ndarray) -> np.ndarray:
+    if not len(keys):
+        return np.array([], dtype=int)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def _reduce(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    if not len(starts):
+        return np.zeros((0,) + values.shape[1:])
+    return np.add.reduceat(values, starts, axis=0)
+
+
+# ---------- 생성 ----------
+
+def tally_array(vt: VoteTensor, tallies: pd.DataFrame) -> np.ndarray:
+    """
+    ingest.load_dong_tallies 결과 → 텐서 행정동 축에 맞춘 [D, E, T] 배열.
+    행정동은 텐서와 같은 키(dong_positions)로 맞추고, 텐서에 없는 동/선거 행은 버린다.
+    """
+    D, E = vt.present.shape
+    out = np.zeros((D, E, len(TALLIES)))
+    if tallies is None or tallies.empty or D == 0:
+        return out
+    tallies = tallies.dropna(subset=["지역구코드"])
+    d_idx = dong_positions(vt, tallies)
+    e_idx = tallies["election"].astype(str).map({e: i for i, e in enumerate(vt.elections)}).to_numpy()
+    ok = (d_idx >= 0) & ~pd.isna(e_idx)
+    cell = d_idx[ok] * E + e_idx[ok].astype(int)
+    for t, name in enumerate(TALLIES):
+        col = tallies[name] if name in tallies.columns else pd.Series(0, index=tallies.index)
+        out[..., t] = np.bincount(cell, weights=col.to_numpy(dtype=float)[ok], minlength=D * E).reshape(D, E)
+    return out
+
+
+def update_tally_array(values: np.ndarray, old_vt: VoteTensor, vt: VoteTensor,
+                       old_part: Optional[pd.DataFrame], new_part: Optional[pd.DataFrame]) -> Optional[np.ndarray]:
+    """tally_array 결과를 한 파일분(old → new)만 바꿔 새 텐서(vt) 선거 축에 맞춘 복사본. 실패하면 None."""
+    grown = realign_elections(values, old_vt.elections, vt.elections)
+    return replace_cells(grown, vt, old_part, new_part, list(TALLIES))
+
+
+@timed("build_vote_cube")
+def build_vote_cube(long: pd.DataFrame, tallies: pd.DataFrame) -> VoteCube:
+    vt = build_vote_tensor(long)
+    return VoteCube(vt, tally_array(vt, tallies))
+
+
+def load_vote_cube(data_dir: Union[str, Path]) -> VoteCube:
+    """원자료 지문(tensor_version)이 바뀔 때만 다시 합산. 텐서와 파일 읽기는 각자의 캐시를 탄다."""
+    data_dir = Path(data_dir)
+
+    def build() -> VoteCube:
+        vt = load_vote_tensor(data_dir)
+        return VoteCube(vt, tally_array(vt, load_dong_tallies(data_dir)))
+    return CACHE.get_or_load(("vote_cube", str(data_dir)), tensor_version(data_dir), build)
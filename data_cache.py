@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple, Union
+
+# ---------- File fingerprint ----------
+
+_HASH_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """파일 식별자: 경로 + mtime + 크기 + 내용 해시."""
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+_fp_memo: Dict[str, FileFingerprint] = {}
+_fp_lock = threading.Lock()
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(path: Union[str, Path]) -> Optional[FileFingerprint]:
+    """
+    파일 지문 계산. stat(mtime, size)이 직전과 같으면 해시를 재사용하고,
+    바뀐 경우에만 내용을 다시 해시한다. 파일이 없으면 None.
+    """
+    p = Path(path)
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    key = str(p)
+    with _fp_lock:
+        prev = _fp_memo.get(key)
+    if prev is not None and prev.mtime_ns == st.st_mtime_ns and prev.size == st.st_size:
+        return prev
+    fp = FileFingerprint(key, st.st_mtime_ns, st.st_size, _hash_file(p))
+    with _fp_lock:
+        _fp_memo[key] = fp
+    return fp
+
+
+def first_existing(paths: Iterable[Path]) -> Optional[Path]:
+    for p in paths:
+        if p.exists():
+            return p
+    return None
+
+
+def content_version(fp: Optional[FileFingerprint]) -> Optional[Tuple[str, str]]:
+    """캐시 무효화 기준. 내용이 같으면 touch만 된 파일도 같은 버전으로 본다."""
+    return (fp.path, fp.digest) if fp is not None else None
+
+
+# ---------- Versioned cache ----------
+
+class LoaderCache:
+    """
+    슬롯(이름)별로 최신 버전 하나만 보관하는 프로세스 전역 캐시.
+    버전이 같으면 hit, 다르면 다시 만들어 교체(miss). 반환 객체는 공유되므로 읽기 전용으로 쓴다.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Hashable, Any]] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _label(slot: Hashable) -> str:
+        return str(slot[0] if isinstance(slot, tuple) else slot)
+
+    def get_or_load(self, slot: Hashable, version: Hashable, build: Callable[[], Any]) -> Any:
+        label = self._label(slot)
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and entry[0] == version:
+                self._hits[label] = self._hits.get(label, 0) + 1
+                return entry[1]
+        value = build()
+        with self._lock:
+            self._entries[slot] = (version, value)
+            self._misses[label] = self._misses.get(label, 0) + 1
+        return value
+
+    def put(self, slot: Hashable, version: Hashable, value: Any) -> None:
+        """미리 만든 값을 해당 버전으로 넣어 둔다 (다음 get_or_load가 바로 hit)."""
+        with self._lock:
+            self._entries[slot] = (version, value)
+
+    def peek(self, slot: Hashable) -> Optional[Tuple[Hashable, Any]]:
+        """슬롯의 현재 (버전, 값). 버전이 달라도 돌려주므로 증분 갱신의 이전 값으로 쓴다."""
+        with self._lock:
+            return self._entries.get(slot)
+
+    def has(self, slot: Hashable, version: Hashable) -> bool:
+        """해당 버전 값이 이미 있는지 (hit/miss 카운터는 건드리지 않음)."""
+        with self._lock:
+            entry = self._entries.get(slot)
+            return entry is not None and entry[0] == version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            names = sorted(set(self._hits) | set(self._misses))
+            by_name = {n: {"hits": self._hits.get(n, 0), "misses": self._misses.get(n, 0)} for n in names}
+            return {
+                "hits": sum(self._hits.values()),
+                "misses": sum(self._misses.values()),
+                "entries": len(self._entries),
+                "by_name": by_name,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+
+CACHE = LoaderCache()
+
+
+class LRUCache:
+    """
+    키별 값을 최근 사용 순으로 maxsize개까지 보관하는 캐시 (넘치면 가장 오래 안 쓴 항목부터 제거).
+    LoaderCache와 달리 슬롯당 한 버전이 아니라, 버전을 키에 넣어 여러 항목을 함께 보관할 때 쓴다.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._misses += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+def cached_loader(filename: str, fallback_dirs: Sequence[Path] = (Path("/mnt/data"),)):
+    """
+    load_*(data_dir) 데코레이터. 실제로 읽힐 파일의 지문이 그대로면 파싱 없이 캐시 반환.
+    파일별로 슬롯이 나뉘므로 CSV 하나를 고치면 그 파일로 만든 표만 다시 읽는다.
+    원본 함수는 wrapper.uncached 로 접근 가능.
+    """
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(fn)
+        def wrapper(data_dir: Union[str, Path], *args, **kwargs):
+            data_dir = Path(data_dir)
+            src = first_existing([data_dir / filename] + [d / filename for d in fallback_dirs])
+            version = content_version(file_fingerprint(src)) if src is not None else None
+            slot = (fn.__name__, str(data_dir), args, tuple(sorted(kwargs.items())))
+            return CACHE.get_or_load(slot, version, lambda: fn(data_dir, *args, **kwargs))
+
+        wrapper.uncached = fn
+        wrapper.filename = filename
+        return wrapper
+    return deco
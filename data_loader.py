@@ -3,39 +3,149 @@
 # =============================
 from __future__ import annotations
 
+import codecs
+import os
+import threading
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, List, Union
+from typing import Any, Callable, Optional, Dict, List, Sequence, Tuple, Union
+
+import snapshot
+from district_index import CODE_CANDIDATES, NAME_CANDIDATES, SIDO_CANDIDATES
+from instrument import stage as instrument_stage, timed
+from schema import TableSchema, build_registry, schema_for
+from data_cache import CACHE, cached_loader, content_version, file_fingerprint, first_existing
+
+# 로더 이름 → 원본 파일명 (캐시 버전/지문 계산 기준)
+DATA_FILES: Dict[str, str] = {
+    "bookmark": "bookmark.csv",
+    "population": "population.csv",
+    "party_labels": "party_labels.csv",
+    "vote_trend": "vote_trend.csv",
+    "results_2024": "5_na_dis_results.csv",
+    "current_info": "current_info.csv",
+    "index_sample": "index_sample1012.csv",
+}
+
+# 로드한 표를 schema.compact_frame으로 줄여 보관 (코드는 정수, 반복 이름은 category, 수치는 32비트).
+# DSS_COMPACT=0이면 기존 표현(문자열 코드, int64/float64) 그대로.
+COMPACT = os.environ.get("DSS_COMPACT", "1").strip() != "0"
+
+
+def loader_settings() -> dict:
+    """로더 결과 모양을 바꾸는 설정. 스냅샷 manifest와 공유 파일 버전 키에 들어가 다르면 오래된 것으로 본다."""
+    return {"compact": COMPACT}
+
+# ---------- Encoding sniffer ----------
+
+class CsvReadError(Exception):
+    """
+    CSV 읽기 실패를 빈 DataFrame 대신 구조화해서 알리는 예외.
+    stage: "encoding"(후보 인코딩으로 해석 불가) / "decode"(판정 인코딩으로 디코딩 실패) / "parse"(CSV 파싱 실패)
+    """
+
+    def __init__(self, path: Path, encoding: Optional[str], stage: str, detail: str):
+        super().__init__(f"{path} [{stage}, encoding={encoding}]: {detail}")
+        self.path = Path(path)
+        self.encoding = encoding
+        self.stage = stage
+        self.detail = detail
+
+    def as_dict(self) -> dict:
+        return {"path": str(self.path), "encoding": self.encoding, "stage": self.stage, "detail": self.detail}
+
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_SNIFF_CHUNK = 64 * 1024
+
+# (경로, 내용 해시) → 판정 인코딩. 같은 파일은 두 번 판정하지 않는다.
+_encoding_memo: Dict[Tuple[str, str], str] = {}
+_encoding_lock = threading.Lock()
+
+
+def _sniff_bytes(path: Path, encoding_order: List[str]) -> Optional[str]:
+    """
+    BOM이 있으면 그것으로, 없으면 바이트를 청크 단위로 후보 인코딩에 흘려 보며 판정.
+    ASCII만 있는 앞부분은 판단 근거가 없으므로 비ASCII 바이트가 나오는 청크까지 읽는다.
+    """
+    with open(path, "rb") as f:
+        head = f.read(_SNIFF_CHUNK)
+        for bom, enc in _BOMS:
+            if head.startswith(bom):
+                return enc
+        decoders = {enc: codecs.getincrementaldecoder(enc)() for enc in encoding_order}
+        alive = list(encoding_order)
+        chunk = head
+        while True:
+            final = len(chunk) < _SNIFF_CHUNK
+            for enc in list(alive):
+                try:
+                    decoders[enc].decode(chunk, final=final)
+                except UnicodeDecodeError:
+                    alive.remove(enc)
+            if not alive:
+                return None
+            if final or any(b >= 0x80 for b in chunk):
+                return alive[0]
+            chunk = f.read(_SNIFF_CHUNK)
+
+
+def sniff_encoding(path: Path, encoding_order: List[str] = ["utf-8", "cp949"]) -> str:
+    """파일 지문 단위로 기억하는 인코딩 판정. 판정 불가면 CsvReadError(stage="encoding")."""
+    fp = file_fingerprint(path)
+    key = (fp.path, fp.digest) if fp is not None else None
+    with _encoding_lock:
+        enc = _encoding_memo.get(key) if key else None
+    if enc is not None:
+        return enc
+    enc = _sniff_bytes(Path(path), list(encoding_order))
+    if enc is None:
+        raise CsvReadError(path, None, "encoding", f"none of {list(encoding_order)} can decode the file")
+    if key:
+        with _encoding_lock:
+            _encoding_memo[key] = enc
+    return enc
+
 
 # ---------- Internal CSV readers ----------
 
 def _read_csv_safe(path: Path,
                    encoding_order: List[str] = ["utf-8", "cp949"],
-                   dtype: Optional[Dict[str, Union[str, type]]] = None) -> pd.DataFrame:
+                   dtype: Optional[Dict[str, Union[str, type]]] = None,
+                   **read_kwargs) -> pd.DataFrame:
     """
-    단일 경로에서 인코딩 우선순위를 바꿔가며 안전하게 읽기.
-    실패 시 빈 DataFrame 반환.
+    단일 경로 읽기. 인코딩은 BOM/바이트 샘플로 한 번만 판정하고 한 번만 파싱한다.
+    파일이 없거나 비어 있으면 빈 DataFrame, 읽기 실패는 CsvReadError.
+    read_kwargs는 pd.read_csv로 그대로 전달(thousands 등).
     """
     if not path.exists():
         return pd.DataFrame()
-    for enc in encoding_order:
-        try:
-            return pd.read_csv(path, encoding=enc, dtype=dtype)
-        except UnicodeDecodeError:
-            continue
-        except Exception:
-            continue
-    return pd.DataFrame()
+    enc = sniff_encoding(path, encoding_order)
+    try:
+        return pd.read_csv(path, encoding=enc, dtype=dtype, **read_kwargs)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+    except UnicodeDecodeError as e:
+        raise CsvReadError(path, enc, "decode", str(e)) from e
+    except (pd.errors.ParserError, ValueError, TypeError) as e:
+        raise CsvReadError(path, enc, "parse", str(e)) from e
 
 
 def _read_csv_safe_any(paths: List[Path],
-                       dtype: Optional[Dict[str, Union[str, type]]] = None) -> pd.DataFrame:
+                       dtype: Optional[Dict[str, Union[str, type]]] = None,
+                       **read_kwargs) -> pd.DataFrame:
     """
     여러 경로 후보를 순서대로 시도해서 첫 성공 DataFrame 반환.
-    실패 시 빈 DataFrame.
+    모두 없거나 비어 있으면 빈 DataFrame (읽기 실패는 CsvReadError로 전달).
     """
     for p in paths:
-        df = _read_csv_safe(p, dtype=dtype)
+        df = _read_csv_safe(p, dtype=dtype, **read_kwargs)
         if not df.empty:
             return df
     return pd.DataFrame()
@@ -64,20 +174,36 @@ def _tidy_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _ensure_str(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+def _schema_registry(data_dir: Path) -> Dict[str, TableSchema]:
+    """bookmark.csv 기반 스키마 레지스트리 (bookmark 프레임 단위로 캐시)."""
+    bm = load_bookmark(data_dir)
+    return CACHE.get_or_load(("schema_registry", str(data_dir)), id(bm), lambda: (bm, build_registry(bm)))[1]
+
+
+def _read_table(data_dir: Path, filename: str, usecols: Optional[Sequence[str]] = None,
+                compact: Optional[bool] = None) -> pd.DataFrame:
     """
-    코드/식별자 컬럼 문자열 보존.
+    스키마대로 읽기: 식별/범주 컬럼은 문자열로, 수치는 천 단위 구분자를 해석해 바로 숫자 배열로.
+    퍼센트('44%') 컬럼은 % 단위 float로 변환된다.
+    usecols가 있으면 그 컬럼만 파싱한다 (헤더 앞뒤 공백은 무시하고 비교).
+    compact(기본 COMPACT)면 읽은 뒤 dtype을 줄인다.
     """
-    if df is None or df.empty:
-        return df
-    for c in cols:
-        if c in df.columns:
-            df[c] = df[c].astype(str).str.strip()
-    return df
+    schema = schema_for(_schema_registry(data_dir), Path(filename).stem)
+    kwargs = schema.read_kwargs()
+    if usecols is not None:
+        wanted = set(usecols)
+        kwargs["usecols"] = lambda c: str(c).strip() in wanted
+    df = _read_csv_safe_any([
+        data_dir / filename,
+        Path("/mnt/data") / filename
+    ], **kwargs)
+    return schema.apply(_tidy_columns(df), compact=COMPACT if compact is None else compact)
 
 
 # ---------- Public loaders (7 files) ----------
 
+@timed()
+@cached_loader(DATA_FILES["bookmark"])
 def load_bookmark(data_dir: Path) -> pd.DataFrame:
     """
     bookmark.csv: 파일명과 해당 헤더 목록이 정리되어 있는 매핑 테이블.
@@ -90,99 +216,364 @@ def load_bookmark(data_dir: Path) -> pd.DataFrame:
     return _tidy_columns(df)
 
 
-def load_population_agg(data_dir: Path) -> pd.DataFrame:
+@timed()
+@cached_loader(DATA_FILES["population"])
+def load_population_agg(data_dir: Path, usecols: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
     """
     population.csv: (동 단위 원자료 또는 집계본)
-    - downstream에서 구 단위로 합산할 수 있도록 '코드' 등 문자열 보존
+    - downstream에서 구 단위로 합산할 수 있도록 코드는 문자열, 인구 수는 정수로 읽음
     """
-    df = _read_csv_safe_any([
-        data_dir / "population.csv",
-        Path("/mnt/data") / "population.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "지역구", "구", "동"])
-    return df
+    return _read_table(data_dir, "population.csv", usecols)
 
 
-def load_party_labels(data_dir: Path) -> pd.DataFrame:
+@timed()
+@cached_loader(DATA_FILES["party_labels"])
+def load_party_labels(data_dir: Path, usecols: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
     """
     party_labels.csv: 정당 코드-라벨 매핑
     """
-    df = _read_csv_safe_any([
-        data_dir / "party_labels.csv",
-        Path("/mnt/data") / "party_labels.csv"
-    ])
-    df = _tidy_columns(df)
-    # 흔히 쓰일만한 키 후보들 문자열화
-    df = _ensure_str(df, ["정당코드", "정당", "party", "code"])
-    return df
+    return _read_table(data_dir, "party_labels.csv", usecols)
 
 
-def load_vote_trend(data_dir: Path) -> pd.DataFrame:
+@timed()
+@cached_loader(DATA_FILES["vote_trend"])
+def load_vote_trend(data_dir: Path, usecols: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
     """
     vote_trend.csv: 정당 성향별/정당별 득표 추이
     """
-    df = _read_csv_safe_any([
-        data_dir / "vote_trend.csv",
-        Path("/mnt/data") / "vote_trend.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구", "district", "label"])
-    return df
+    return _read_table(data_dir, "vote_trend.csv", usecols)
 
 
-def load_results_2024(data_dir: Path) -> pd.DataFrame:
+@timed()
+@cached_loader(DATA_FILES["results_2024"])
+def load_results_2024(data_dir: Path, usecols: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
     """
     5_na_dis_results.csv: 2024 총선 결과(동/선거구 레벨)
     """
-    df = _read_csv_safe_any([
-        data_dir / "5_na_dis_results.csv",
-        Path("/mnt/data") / "5_na_dis_results.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구", "구", "동"])
-    return df
+    return _read_table(data_dir, "5_na_dis_results.csv", usecols)
 
 
-def load_current_info(data_dir: Path) -> pd.DataFrame:
+@timed()
+@cached_loader(DATA_FILES["current_info"])
+def load_current_info(data_dir: Path, usecols: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
     """
     current_info.csv: 현직/주요 인물/현황 정보
     """
-    df = _read_csv_safe_any([
-        data_dir / "current_info.csv",
-        Path("/mnt/data") / "current_info.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구", "이름", "정당"])
-    return df
+    return _read_table(data_dir, "current_info.csv", usecols)
 
 
-def load_index_sample(data_dir: Path) -> pd.DataFrame:
+@timed()
+@cached_loader(DATA_FILES["index_sample"])
+def load_index_sample(data_dir: Path, usecols: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
     """
     index_sample1012.csv (선택): 지표/스코어 샘플
     """
-    df = _read_csv_safe_any([
-        data_dir / "index_sample1012.csv",
-        Path("/mnt/data") / "index_sample1012.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구"])
-    return df
+    return _read_table(data_dir, "index_sample1012.csv", usecols)
 
 
 # ---------- Optional: convenience aggregator ----------
 
-def load_all(data_dir: Union[str, Path]) -> dict:
+_LOADERS = {
+    "bookmark": load_bookmark,
+    "population": load_population_agg,
+    "party_labels": load_party_labels,
+    "vote_trend": load_vote_trend,
+    "results_2024": load_results_2024,
+    "current_info": load_current_info,
+    "index_sample": load_index_sample,
+}
+
+
+def _source_paths(data_dir: Path) -> Dict[str, Optional[Path]]:
+    """로더별로 실제 읽히게 될 원본 CSV 경로(없으면 None)."""
+    return {
+        name: first_existing([data_dir / fname, Path("/mnt/data") / fname])
+        for name, fname in DATA_FILES.items()
+    }
+
+
+@timed()
+def data_version(data_dir: Union[str, Path]) -> Tuple:
+    """
+    data_dir 전체 버전: 파일별 (경로, 내용 해시). 파생 객체(인덱스 등) 캐시 키로 사용.
+    """
+    return tuple(
+        (name, content_version(file_fingerprint(src)) if src is not None else None)
+        for name, src in _source_paths(Path(data_dir)).items()
+    )
+
+
+# 동시 로드 상한. CSV 파싱은 대부분 GIL 밖에서 돌지만 파일 수만큼 스레드를 늘릴 이유는 없다.
+DEFAULT_MAX_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+
+def run_timed(jobs: Dict[str, Callable[[], Any]],
+              max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    서로 독립인 작업들을 스레드 풀에서 실행하고 (결과, 작업별 소요 ms)를 반환.
+    max_workers가 1 이하면 순차 실행. 작업 예외(CsvReadError 등)는 호출측으로 그대로 전달된다.
+    """
+    def timed(fn):
+        t0 = time.perf_counter()
+        out = fn()
+        return out, (time.perf_counter() - t0) * 1000.0
+
+    workers = min(len(jobs), max_workers or 1)
+    if workers <= 1:
+        done = {name: timed(fn) for name, fn in jobs.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") as pool:
+            futures = {name: pool.submit(timed, fn) for name, fn in jobs.items()}
+            done = {name: fut.result() for name, fut in futures.items()}
+    return {n: r for n, (r, _) in done.items()}, {n: ms for n, (_, ms) in done.items()}
+
+
+def _load_tables(data_dir: Path, use_snapshot: bool, cached: bool,
+                 max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> Tuple[dict, dict]:
+    """
+    신선한 스냅샷 테이블은 memory-map으로, 나머지는 CSV 로더로 읽는다.
+    CSV 로더는 스레드 풀에서 동시에 실행되므로 전체 시간은 가장 느린 파일에 맞춰진다.
+    반환: (frames, timings) — timings는 {"files": {name: {"source", "ms", "rows"}}, "wall_ms", "workers"}
+    """
+    t0 = time.perf_counter()
+    frames, files = {}, {}
+    if use_snapshot:
+        frames = snapshot.read_fresh_tables(snapshot.snapshot_dir(data_dir), _source_paths(data_dir),
+                                            loader_settings())
+        snap_ms = (time.perf_counter() - t0) * 1000.0
+        for name in frames:
+            files[name] = {"source": "snapshot", "ms": snap_ms / max(len(frames), 1)}
+    # 모든 로더가 공유하는 스키마 레지스트리는 먼저 만들어 둔다 (스레드마다 중복 생성 방지)
+    if "bookmark" not in frames:
+        t1 = time.perf_counter()
+        frames["bookmark"] = load_bookmark(data_dir) if cached else load_bookmark.uncached(data_dir)
+        files["bookmark"] = {"source": "csv", "ms": (time.perf_counter() - t1) * 1000.0}
+    _schema_registry(data_dir)
+
+    jobs = {
+        name: (lambda loader=loader: loader(data_dir) if cached else loader.uncached(data_dir))
+        for name, loader in _LOADERS.items() if name not in frames
+    }
+    loaded, ms = run_timed(jobs, max_workers)
+    frames.update(loaded)
+    files.update({name: {"source": "csv", "ms": ms[name]} for name in loaded})
+    for name, info in files.items():
+        info["rows"] = int(len(frames[name])) if frames[name] is not None else 0
+
+    timings = {
+        "files": {name: files[name] for name in _LOADERS},
+        "wall_ms": (time.perf_counter() - t0) * 1000.0,
+        "workers": min(len(jobs), max_workers or 1),
+    }
+    return {name: frames[name] for name in _LOADERS}, timings
+
+
+@timed("load_all")
+def load_all_timed(data_dir: Union[str, Path],
+                   use_snapshot: bool = True,
+                   max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> Tuple[dict, dict]:
+    """
+    load_all + 파일별 로드 시간. 캐시 hit이면 마지막 실제 로드의 시간표를 그대로 돌려준다.
+    """
+    data_dir = Path(data_dir)
+    return CACHE.get_or_load(("load_all", str(data_dir), use_snapshot), data_version(data_dir),
+                             lambda: _load_tables(data_dir, use_snapshot, cached=True, max_workers=max_workers))
+
+
+def load_all(data_dir: Union[str, Path],
+             use_snapshot: bool = True,
+             max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> dict:
     """
     대시보드에서 한 번에 호출할 수 있는 일괄 로더.
+    파일 지문이 모두 그대로면 이전 결과를 그대로 반환한다(로더별 캐시도 별도로 동작).
+    프로세스 첫 로드에서는 compile_snapshot으로 만든 스냅샷이 신선하면 그것을 쓰고,
+    나머지 파일은 max_workers개 스레드로 동시에 읽는다 (1이면 순차).
+    """
+    return load_all_timed(data_dir, use_snapshot, max_workers)[0]
+
+
+def load_all_uncached(data_dir: Union[str, Path],
+                      use_snapshot: bool = True,
+                      max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> dict:
+    """캐시를 거치지 않는 일괄 로드 (벤치마크/스냅샷 검증용)."""
+    return _load_tables(Path(data_dir), use_snapshot, cached=False, max_workers=max_workers)[0]
+
+
+def compile_snapshot(data_dir: Union[str, Path]) -> dict:
+    """
+    data_dir의 CSV들을 로더 결과 그대로 Feather 스냅샷 + manifest로 컴파일.
+    (python snapshot.py [DATA_DIR] 로도 실행 가능)
     """
     data_dir = Path(data_dir)
-    return {
-        "bookmark": load_bookmark(data_dir),
-        "population": load_population_agg(data_dir),
-        "party_labels": load_party_labels(data_dir),
-        "vote_trend": load_vote_trend(data_dir),
-        "results_2024": load_results_2024(data_dir),
-        "current_info": load_current_info(data_dir),
-        "index_sample": load_index_sample(data_dir),
+    frames = load_all_uncached(data_dir, use_snapshot=False)
+    return snapshot.write_snapshot(frames, _source_paths(data_dir), snapshot.snapshot_dir(data_dir), loader_settings())
+
+
+# ---------- Lazy handles (page-level column projection) ----------
+
+# 프로젝션에 항상 같이 읽는 식별 컬럼 (코드 인덱스/지역 라벨/시도 집계용)
+KEY_COLUMNS: Tuple[str, ...] = tuple(dict.fromkeys(CODE_CANDIDATES + NAME_CANDIDATES + SIDO_CANDIDATES))
+
+
+def read_header(path: Optional[Path]) -> List[str]:
+    """CSV 헤더만 읽어 정리된 컬럼 목록 (본문은 파싱하지 않음). 없으면 빈 목록."""
+    if path is None or not path.exists():
+        return []
+    version = content_version(file_fingerprint(path))
+
+    def build() -> List[str]:
+        enc = sniff_encoding(path)
+        try:
+            head = pd.read_csv(path, encoding=enc, nrows=0)
+        except pd.errors.EmptyDataError:
+            return []
+        except UnicodeDecodeError as e:
+            raise CsvReadError(path, enc, "decode", str(e)) from e
+        except (pd.errors.ParserError, ValueError) as e:
+            raise CsvReadError(path, enc, "parse", str(e)) from e
+        return list(_tidy_columns(head).columns)
+    return CACHE.get_or_load(("read_header", str(path)), version, build)
+
+
+class LazyTable:
+    """
+    데이터 파일 하나의 지연 핸들. 만들 때는 아무것도 읽지 않고,
+    columns는 헤더만, load(usecols)는 요청한 컬럼(+ KEY_COLUMNS)만 읽는다.
+    결과는 (파일 내용 버전, 프로젝션) 단위로 캐시되며, 신선한 스냅샷이 있으면 그 컬럼만 매핑한다.
+    """
+
+    def __init__(self, data_dir: Union[str, Path], name: str):
+        self.data_dir = Path(data_dir)
+        self.name = name
+        self.loader = _LOADERS[name]
+        sources = _source_paths(self.data_dir)
+        self.path = sources[name]
+        self.schema_path = sources[snapshot.SCHEMA_SOURCE]
+
+    def __repr__(self) -> str:
+        return f"LazyTable({self.name!r}, path={str(self.path) if self.path else None!r})"
+
+    @property
+    def columns(self) -> List[str]:
+        return read_header(self.path)
+
+    def projection(self, usecols: Optional[Sequence[str]] = None) -> Optional[Tuple[str, ...]]:
+        """
+        요청 컬럼 → 실제로 읽을 컬럼 튜플 (헤더 순서, 식별 컬럼 포함).
+        None이거나 헤더 전체를 덮으면 None(=전체) 이라 전체 로드와 캐시를 공유한다.
+        """
+        if usecols is None:
+            return None
+        header = self.columns
+        wanted = set(usecols) | set(KEY_COLUMNS)
+        cols = tuple(c for c in header if c in wanted)
+        return None if len(cols) == len(header) else cols
+
+    def source(self, usecols: Optional[Sequence[str]] = None) -> str:
+        """load가 어디서 읽을지: cache / snapshot / csv (타이밍 표시용)."""
+        cols = self.projection(usecols)
+        if CACHE.has(self._slot(cols), self._version()):
+            return "cache"
+        fresh = snapshot.is_fresh(snapshot.snapshot_dir(self.data_dir), self.name, self.path, loader_settings(),
+                                  self.schema_path)
+        return "snapshot" if fresh else "csv"
+
+    def _version(self):
+        return content_version(file_fingerprint(self.path)) if self.path is not None else None
+
+    def _slot(self, cols: Optional[Tuple[str, ...]]) -> tuple:
+        return ("lazy_table", str(self.data_dir), self.name, cols)
+
+    def load(self, usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        cols = self.projection(usecols)
+
+        def build() -> pd.DataFrame:
+            df = snapshot.read_fresh_table(snapshot.snapshot_dir(self.data_dir), self.name, self.path,
+                                           loader_settings(), self.schema_path, cols)
+            if df is not None:
+                return df
+            return self.loader(self.data_dir) if cols is None else self.loader(self.data_dir, usecols=cols)
+        with instrument_stage(f"LazyTable.load[{self.name}]") as s:
+            df = CACHE.get_or_load(self._slot(cols), self._version(), build)
+            s.rows = len(df)
+        return df
+
+
+def lazy_tables(data_dir: Union[str, Path]) -> Dict[str, LazyTable]:
+    """bookmark를 뺀 데이터셋별 지연 핸들 (만드는 비용은 경로 확인뿐)."""
+    return {name: LazyTable(data_dir, name) for name in _LOADERS if name != "bookmark"}
+
+
+@timed("load_tables")
+def load_tables_timed(data_dir: Union[str, Path],
+                      projections: Dict[str, Optional[Sequence[str]]],
+                      max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> Tuple[dict, dict]:
+    """
+    페이지가 선언한 {데이터셋: 컬럼 목록(None=전체)}만 읽는다. 반환 형태는 load_all_timed와 같고
+    timings["files"]에는 요청한 데이터셋만, source는 cache / snapshot / csv.
+    """
+    data_dir = Path(data_dir)
+    t0 = time.perf_counter()
+    _schema_registry(data_dir)  # 스레드마다 중복 생성 방지
+    handles = {name: LazyTable(data_dir, name) for name in projections}
+    sources = {name: h.source(projections[name]) for name, h in handles.items()}
+    jobs = {name: (lambda h=h, cols=projections[name]: h.load(cols)) for name, h in handles.items()}
+    frames, ms = run_timed(jobs, max_workers)
+    files = {
+        name: {"source": sources[name], "ms": ms[name], "rows": int(len(frames[name])),
+               "cols": int(frames[name].shape[1])}
+        for name in handles
+    }
+    timings = {
+        "files": files,
+        "wall_ms": (time.perf_counter() - t0) * 1000.0,
+        "workers": min(len(jobs), max_workers or 1),
     }
+    return frames, timings
+
+
+# ---------- Query API (SQLite backend) ----------
+# store는 ingest를 통해 이 모듈을 임포트하므로 함수 안에서 불러 순환 임포트를 피한다.
+
+def open_store(data_dir: Union[str, Path]):
+    """
+    data_dir/.store/archive.sqlite 저장소. 원자료/표 지문이 바뀌었을 때만 sync(바뀐 파일만 다시 넣음).
+    """
+    import store
+    data_dir = Path(data_dir)
+    return CACHE.get_or_load(("archive_store", str(data_dir)), store.store_version(data_dir), lambda: _synced(
+        store.ArchiveStore(store.store_path(data_dir)), data_dir))
+
+
+def _synced(archive, data_dir: Path):
+    archive.sync(data_dir)
+    return archive
+
+
+def query_votes(data_dir: Union[str, Path],
+                by: Optional[Sequence[str]] = ("지역구코드", "election", "label"),
+                **filters) -> pd.DataFrame:
+    """
+    동 단위 득표를 SQL에서 걸러 합산해 반환 (원자료 전체를 메모리에 올리지 않음).
+    filters: sido / district / dong / election / file / label (값 하나 또는 목록)
+    예) query_votes("data", district="2421", by=("행정동", "election", "label"))
+    """
+    return open_store(data_dir).votes(by=by, **filters)
+
+
+def query_tallies(data_dir: Union[str, Path],
+                  by: Optional[Sequence[str]] = ("지역구코드", "election"),
+                  **filters) -> pd.DataFrame:
+    """행정동 집계 컬럼(선거인수/투표수/무효투표수 등)을 SQL에서 걸러 합산."""
+    return open_store(data_dir).tallies(by=by, **filters)
+
+
+def query_table(data_dir: Union[str, Path], name: str, code=None,
+                columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """population / results_2024 / party_labels 중 한 표에서 코드 조건 조회."""
+    return open_store(data_dir).table(name, code=code, columns=columns)
+
+
+def cache_stats() -> dict:
+    """로더 캐시 hit/miss 카운터."""
+    return CACHE.stats()
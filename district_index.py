@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from instrument import timed
+
+# -----------------------------
+# 공통 컬럼 후보
+# -----------------------------
+CODE_CANDIDATES = ["코드", "지역구코드", "선거구코드", "지역코드", "code", "CODE"]
+NAME_CANDIDATES = ["지역구", "선거구", "선거구명", "지역명", "district", "지역구명", "region", "지역"]
+SIDO_CANDIDATES = ["시/도", "시도", "광역", "sido", "province"]
+
+_NON_ALNUM = r"[^0-9A-Za-z]"
+
+
+# ---------- 컬럼/코드 표준화 ----------
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """컬럼명 공백/개행 정리. 이미 정리된 프레임은 복사 없이 그대로 (공유 표를 세션마다 복제하지 않도록)."""
+    if df is None or len(df) == 0:
+        return pd.DataFrame() if df is None else df
+    cols = [str(c).strip().replace("\n", "").replace("\r", "") for c in df.columns]
+    if cols == list(df.columns):
+        return df
+    df2 = df.copy(deep=False)  # 컬럼 축만 새로 (데이터 블록은 공유)
+    df2.columns = cols
+    return df2
+
+
+def _detect_col(df: pd.DataFrame, candidates: list) -> str | None:
+    for c in candidates:
+        if c in df.columns:
+            return c
+    cols = [str(c).strip().replace("\n", "").replace("\r", "") for c in df.columns]
+    for cand in candidates:
+        if cand in cols:
+            return df.columns[cols.index(cand)]
+    return None
+
+
+def _canon_code(x: object) -> str:
+    """하이픈/공백 제거, 대소문자 무시, 선행 0 제거 → 코드 표준화"""
+    s = str(x).strip()
+    s = re.sub(_NON_ALNUM, "", s)
+    s = s.lstrip("0")
+    return s.lower()
+
+
+def canon_codes(codes: pd.Series) -> pd.Series:
+    """_canon_code의 벡터화 버전 (행마다 파이썬 호출 없이 str 연산 한 번)."""
+    if pd.api.types.is_integer_dtype(codes):
+        return codes.astype(str)  # 압축 로드된 정수 코드는 이미 표준형
+    return (
+        codes.astype(str)
+             .str.replace(_NON_ALNUM, "", regex=True)
+             .str.lstrip("0")
+             .str.lower()
+    )
+
+
+@timed()
+def ensure_code_col(df: pd.DataFrame) -> pd.DataFrame:
+    """여러 이름의 코드 컬럼을 '코드'(str)로 표준화. 압축 로드된 정수 코드는 그대로 둔다."""
+    if df is None:
+        return pd.DataFrame()
+    if len(df) == 0:
+        return df
+    df2 = _normalize_columns(df)
+    if "코드" not in df2.columns:
+        found = _detect_col(df2, CODE_CANDIDATES)
+        if found:
+            df2 = df2.rename(columns={found: "코드"}, copy=False)
+    if "코드" not in df2.columns:
+        idx_name = df2.index.name
+        if idx_name and idx_name in CODE_CANDIDATES + ["코드"]:
+            df2 = df2.reset_index().rename(columns={idx_name: "코드"})
+    # 입력 프레임은 건드리지 않는다: 컬럼을 바꿔야 할 때만 얕은 복사 후 그 컬럼만 교체
+    if "코드" in df2.columns:
+        code = df2["코드"]
+        if not pd.api.types.is_integer_dtype(code) and pd.api.types.infer_dtype(code, skipna=False) != "string":
+            df2 = df2.copy(deep=False) if df2 is df else df2
+            df2["코드"] = code.astype(str)
+    else:
+        df2 = df2.copy(deep=False) if df2 is df else df2
+        df2["__NO_CODE__"] = True
+    return df2
+
+
+@timed()
+def get_by_code(df: pd.DataFrame, code: str) -> pd.DataFrame:
+    """
+    코드 컬럼 자동 탐지 + 표준화 비교로 해당 code 행만 반환(없으면 빈 DF).
+    DistrictIndex에 등록되지 않은 임의 프레임용 전체 스캔 경로.
+    """
+    if df is None or len(df) == 0:
+        return pd.DataFrame()
+    code_col = "코드" if "코드" in df.columns else _detect_col(df, CODE_CANDIDATES)
+    if not code_col:
+        return pd.DataFrame()
+    try:
+        sub = df[canon_codes(df[code_col]).to_numpy() == _canon_code(code)]
+        return _normalize_columns(sub) if len(sub) else pd.DataFrame()
+    except Exception:
+        return pd.DataFrame()
+
+
+# ---------- 지역 목록 ----------
+
+def _first_nonempty(*dfs: pd.DataFrame) -> pd.DataFrame | None:
+    for d in dfs:
+        if isinstance(d, pd.DataFrame) and len(d) > 0:
+            return d
+    return None
+
+
+@timed()
+def build_regions(primary_df: pd.DataFrame, *fallback_dfs: pd.DataFrame) -> pd.DataFrame:
+    """
+    사이드바 선택용 지역 목록: 코드 + 라벨(시/도 + 지역구).
+    primary_df가 비어있으면 fallback들(df_24, df_trend, df_curr 등)에서 생성.
+    """
+    return _regions_table(primary_df, *fallback_dfs).loc[:, ["코드", "라벨"]]
+
+
+# ---------- 지역 카탈로그 ----------
+
+DONG_NAME_CANDIDATES = ["행정동", "읍면동", "동"]
+DONG_CODE_CANDIDATES = ["행정동코드", "동코드"]
+
+
+def _region_keys(dfp: pd.DataFrame) -> pd.DataFrame:
+    """
+    ensure_code_col을 거친 프레임 → 중복 없는 [코드, 라벨, 시/도, 지역구].
+    라벨 문자열은 (코드, 지역구, 시/도) 조합을 먼저 중복 제거한 뒤 만들므로 행정동 단위 표여도 지역구 수만큼만 계산한다.
+    """
+    name_col = _detect_col(dfp, NAME_CANDIDATES)
+    sido_col = _detect_col(dfp, SIDO_CANDIDATES)
+    cols = ["코드"] + [c for c in (name_col, sido_col) if c]
+    uniq = dfp.loc[:, cols].drop_duplicates()
+    code = uniq["코드"]
+    if not name_col:
+        return pd.DataFrame({"코드": code.to_numpy(), "라벨": code.to_numpy(),
+                             "시/도": None, "지역구": code.astype(str).to_numpy()})
+    name = uniq[name_col].astype(str).str.strip()
+    label = name
+    sido = pd.Series(None, index=uniq.index, dtype=object)
+    if sido_col:
+        has = uniq[sido_col].notna().to_numpy()
+        sido = uniq[sido_col].astype(str).str.strip().where(has, None)
+        prefixed = np.fromiter((n.startswith(sd) for n, sd in zip(name, sido.fillna(""))), dtype=bool, count=len(name))
+        label = name.where(~has | prefixed, sido + " " + name)
+    return pd.DataFrame({"코드": code.to_numpy(), "라벨": label.to_numpy(),
+                         "시/도": sido.to_numpy(), "지역구": name.to_numpy()})
+
+
+def _regions_table(primary_df: pd.DataFrame, *fallback_dfs: pd.DataFrame) -> pd.DataFrame:
+    """첫 번째로 비어있지 않은 표 → 라벨 순 [코드, 라벨, 시/도, 지역구] (build_regions / RegionCatalog 공용)."""
+    base = _first_nonempty(primary_df, *fallback_dfs)
+    dfp = ensure_code_col(_normalize_columns(base)) if base is not None else None
+    if dfp is None or "코드" not in dfp.columns:
+        return pd.DataFrame(columns=["코드", "라벨", "시/도", "지역구"])
+    return (_region_keys(dfp)
+            .drop_duplicates(["코드", "라벨"])
+            .sort_values("라벨", kind="stable")
+            .reset_index(drop=True))
+
+
+def _spans(keys: np.ndarray) -> Tuple[np.ndarray, Dict[str, Tuple[int, int]]]:
+    """키 배열 → (안정 정렬 순서, 키 → 정렬 후 [start, stop) 구간)."""
+    order = np.argsort(keys, kind="stable")
+    uniq, starts = np.unique(keys[order], return_index=True)
+    stops = np.append(starts[1:], len(keys))
+    return order, dict(zip(uniq.tolist(), zip(starts.tolist(), stops.tolist())))
+
+
+class RegionCatalog:
+    """
+    시/도 → 지역구 → 행정동 계층과 라벨 ↔ 코드 사전.
+    데이터 버전당 한 번 만들어 두고(app에서 CACHE), 사이드바는 시/도 → 지역구 순으로 좁혀 고른다.
+    라벨/코드 조회는 dict 한 번 (코드는 표준 코드로 비교).
+    """
+
+    def __init__(self, regions: pd.DataFrame, dongs: Optional[pd.DataFrame] = None):
+        # regions: [코드, 라벨, 시/도, 지역구] (라벨 순), dongs: [지역구(표준 코드), 행정동코드, 행정동]
+        self.table = regions.reset_index(drop=True)
+        self.regions = self.table.loc[:, ["코드", "라벨"]]
+        keys = canon_codes(self.table["코드"]).to_numpy(dtype=object)
+        sido = self.table["시/도"].to_numpy(dtype=object)
+        # 같은 라벨/코드가 여러 번이면 (라벨 정렬상) 첫 항목
+        self._code_by_label: Dict[str, object] = {}
+        self._label_by_key: Dict[str, str] = {}
+        self._sido_by_key: Dict[str, Optional[str]] = {}
+        for lab, code, key, sd in zip(self.table["라벨"].to_numpy(dtype=object),
+                                      self.table["코드"].to_numpy(dtype=object), keys, sido):
+            self._code_by_label.setdefault(lab, code)
+            self._label_by_key.setdefault(key, lab)
+            self._sido_by_key.setdefault(key, sd)
+
+        # 시/도별 지역구, 지역구별 행정동: 키 순으로 한 번 정렬해 두고 구간(iloc 슬라이스)으로 조회
+        has_sido = pd.notna(sido)
+        self._sido_rows = self.regions.iloc[0:0]
+        self._sido_spans: Dict[str, Tuple[int, int]] = {}
+        if has_sido.any():
+            idx = np.flatnonzero(has_sido)
+            order, self._sido_spans = _spans(sido[idx].astype(str))
+            self._sido_rows = self.regions.iloc[idx[order]].reset_index(drop=True)
+        self._dong_rows = pd.DataFrame(columns=["행정동코드", "행정동"])
+        self._dong_spans: Dict[str, Tuple[int, int]] = {}
+        if dongs is not None and not dongs.empty:
+            order, self._dong_spans = _spans(dongs["지역구"].to_numpy(dtype=object).astype(str))
+            self._dong_rows = dongs.iloc[order].loc[:, ["행정동코드", "행정동"]].reset_index(drop=True)
+
+    @classmethod
+    @timed("RegionCatalog.build")
+    def build(cls, primary_df: pd.DataFrame, *fallback_dfs: pd.DataFrame) -> "RegionCatalog":
+        """
+        build_regions와 같은 기준(첫 번째로 비어있지 않은 표)으로 지역구 목록을 만들고,
+        행정동 컬럼이 있는 표(보통 population)가 있으면 그 행으로 행정동 계층을 채운다.
+        """
+        regions = _regions_table(primary_df, *fallback_dfs)
+        dongs = None
+        for df in (primary_df,) + fallback_dfs:
+            if not isinstance(df, pd.DataFrame) or df.empty:
+                continue
+            d = ensure_code_col(_normalize_columns(df))
+            name_col = _detect_col(d, DONG_NAME_CANDIDATES)
+            if "코드" in d.columns and name_col:
+                code_col = _detect_col(d, DONG_CODE_CANDIDATES)
+                dongs = pd.DataFrame({
+                    "지역구": canon_codes(d["코드"]).to_numpy(),
+                    "행정동코드": d[code_col].to_numpy() if code_col else None,
+                    "행정동": d[name_col].astype(str).str.strip().to_numpy(),
+                }).drop_duplicates(["지역구", "행정동"])
+                break
+        return cls(regions, dongs)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    @property
+    def empty(self) -> bool:
+        return self.regions.empty
+
+    def sidos(self) -> List[str]:
+        """시/도 목록 (가나다순, 시/도 컬럼이 없으면 빈 목록)."""
+        return list(self._sido_spans)
+
+    def districts(self, sido: Optional[str] = None) -> pd.DataFrame:
+        """해당 시/도의 [코드, 라벨] (라벨 순). sido가 없으면 전체."""
+        if sido is None:
+            return self.regions
+        start, stop = self._sido_spans.get(str(sido), (0, 0))
+        return self._sido_rows.iloc[start:stop]
+
+    def dongs(self, code: Hashable) -> pd.DataFrame:
+        """지역구의 [행정동코드, 행정동] (원자료 순서)."""
+        start, stop = self._dong_spans.get(_canon_code(code), (0, 0))
+        return self._dong_rows.iloc[start:stop]
+
+    def code_of(self, label: str):
+        """라벨 → 코드 (원래 dtype 그대로), 없으면 None."""
+        return self._code_by_label.get(label)
+
+    def label_of(self, code: Hashable, default: Optional[str] = None) -> Optional[str]:
+        return self._label_by_key.get(_canon_code(code), default)
+
+    def labels(self) -> pd.Series:
+        """표준 코드 → 라벨 Series (중복 코드는 첫 라벨)."""
+        return pd.Series(self._label_by_key, dtype=object)
+
+    def sido_of(self, code: Hashable) -> Optional[str]:
+        return self._sido_by_key.get(_canon_code(code))
+
+
+# ---------- 코드 → 행 위치 인덱스 ----------
+
+def prepare_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    DistrictIndex에 등록되는 모양으로: 컬럼 표준화 + '코드' 컬럼 + 표준 코드 순 정렬(RangeIndex).
+    반환: (프레임, 행별 표준 코드 배열). '코드'가 없으면 키는 빈 배열.
+    """
+    df = ensure_code_col(df)
+    if "코드" not in df.columns or len(df) == 0:
+        return df, np.array([], dtype=object)
+    raw_keys = canon_codes(df["코드"]).to_numpy(dtype=object)
+    order = np.argsort(raw_keys, kind="stable")
+    # 이미 코드 순인 프레임(shared 저장소에서 매핑한 표)은 재배열 복사를 하지 않는다
+    if not (df.index.equals(pd.RangeIndex(len(df))) and np.array_equal(order, np.arange(len(order)))):
+        df = df.iloc[order].reset_index(drop=True)
+    return df, raw_keys[order]
+
+
+class DistrictIndex:
+    """
+    데이터셋별 표준 코드 → 행 구간 해시 인덱스.
+
+    로드 시점에 한 번만 코드를 표준화하고, 각 프레임을 표준 코드 기준으로
+    안정 정렬(stable)해 같은 코드의 행이 연속 구간이 되도록 보관한다.
+    조회는 dict 조회 한 번 + iloc 슬라이스라서 복사 없이 뷰를 돌려준다.
+    (코드가 같은 행들 사이의 원래 순서는 유지된다.)
+    """
+
+    def __init__(self, frames: Optional[Dict[str, pd.DataFrame]] = None):
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self._keys: Dict[str, np.ndarray] = {}
+        self._spans: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._names_by_id: Dict[int, str] = {}
+        for name, df in (frames or {}).items():
+            self.add(name, df)
+
+    def add(self, name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """프레임을 표준화·정렬해 등록하고, 등록된(정렬된) 프레임을 반환."""
+        df, keys = prepare_frame(df)
+        spans: Dict[str, Tuple[int, int]] = {}
+        if len(keys):
+            uniq, starts = np.unique(keys, return_index=True)
+            stops = np.append(starts[1:], len(keys))
+            spans = dict(zip(uniq.tolist(), zip(starts.tolist(), stops.tolist())))
+        old = self.frames.get(name)
+        if old is not None:
+            self._names_by_id.pop(id(old), None)
+        self.frames[name] = df
+        self._keys[name] = keys
+        self._spans[name] = spans
+        self._names_by_id[id(df)] = name
+        return df
+
+    def replace_columns(self, name: str, df: pd.DataFrame) -> None:
+        """
+        등록된 프레임을 행 순서가 같은(컬럼만 다른) 프레임으로 바꾼다. 코드 키/구간은 그대로 쓴다.
+        (shared 저장소가 요청된 컬럼을 그때그때 붙일 때 사용)
+        """
+        old = self.frames[name]
+        if len(df) != len(old):
+            raise ValueError(f"{name}: 행 수가 다릅니다 ({len(df)} != {len(old)})")
+        self._names_by_id.pop(id(old), None)
+        self.frames[name] = df
+        self._names_by_id[id(df)] = name
+
+    def view(self, columns: Dict[str, Optional[Sequence[str]]]) -> "DistrictIndex":
+        """
+        {데이터셋: 컬럼 목록(None=전체)}만 보이는 인덱스. 코드 구간/키 배열과 컬럼 데이터는 이 인덱스와 공유하므로
+        페이지별 프로젝션을 여러 개 만들어도 표 데이터는 한 벌이다. 없는 데이터셋은 빠진다.
+        """
+        out = DistrictIndex()
+        for name, cols in columns.items():
+            df = self.frames.get(name)
+            if df is None:
+                continue
+            if cols is not None:
+                keep = set(cols)
+                # dict → DataFrame(copy=False)는 Series 배열을 그대로 쓴다 (df.loc[:, cols]는 복사)
+                df = pd.DataFrame({c: df[c] for c in df.columns if c in keep}, copy=False)
+            out.frames[name] = df
+            out._keys[name] = self._keys[name]
+            out._spans[name] = self._spans[name]
+            out._names_by_id[id(df)] = name
+        return out
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        return self.frames[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.frames
+
+    def _resolve(self, frame: Union[str, pd.DataFrame]) -> Optional[str]:
+        if isinstance(frame, str):
+            return frame if frame in self.frames else None
+        return self._names_by_id.get(id(frame))
+
+    def codes(self, frame: Union[str, pd.DataFrame]) -> List[str]:
+        """해당 데이터셋에 존재하는 표준 코드 목록(정렬)."""
+        name = self._resolve(frame)
+        return list(self._spans[name].keys()) if name else []
+
+    def canonical_codes(self, frame: Union[str, pd.DataFrame]) -> np.ndarray:
+        """등록된 프레임의 행 순서와 정렬이 맞는 표준 코드 배열."""
+        name = self._resolve(frame)
+        return self._keys[name] if name else np.array([], dtype=object)
+
+    @timed()
+    def get(self, frame: Union[str, pd.DataFrame], code: Hashable) -> pd.DataFrame:
+        """
+        코드 해당 행(뷰) 반환, 없으면 빈 DF.
+        frame은 등록 이름 또는 등록된 프레임 객체. 미등록 프레임은 전체 스캔으로 처리.
+        """
+        name = self._resolve(frame)
+        if name is None:
+            return get_by_code(frame, code) if isinstance(frame, pd.DataFrame) else pd.DataFrame()
+        span = self._spans[name].get(_canon_code(code))
+        if span is None:
+            return pd.DataFrame()
+        return self.frames[name].iloc[span[0]:span[1]]
+
+    @timed()
+    def get_many(self, frame: Union[str, pd.DataFrame], codes: Iterable[Hashable]) -> pd.DataFrame:
+        """
+        여러 코드의 행을 한 번에 반환 (codes 순서대로, 중복/없는 코드는 건너뜀).
+        구간들을 이어 붙인 위치 배열로 iloc 한 번만 하므로 코드 수만큼 슬라이스를 만들지 않는다.
+        미등록 프레임은 전체 스캔으로 처리 (이때는 원래 행 순서).
+        """
+        name = self._resolve(frame)
+        keys = list(dict.fromkeys(_canon_code(c) for c in codes))
+        if name is None:
+            if not isinstance(frame, pd.DataFrame) or "코드" not in frame.columns:
+                return pd.DataFrame()
+            return frame[canon_codes(frame["코드"]).isin(keys).to_numpy()]
+        spans = [self._spans[name][k] for k in keys if k in self._spans[name]]
+        df = self.frames[name]
+        if not spans:
+            return df.iloc[0:0]
+        return df.iloc[np.concatenate([np.arange(a, b) for a, b in spans])]
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import itertools
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from charts import (ChartSpec, _fmt_pct, build_incumbent_view, build_population_view, build_prg_view,
+                    build_results_2024_view, build_vote_trend_spec)
+from district_index import _canon_code, build_regions
+from metrics import compute_summary_metrics, compute_trend_series
+from shared import open_shared
+
+# 보고서 HTML이 불러오는 Vega-Lite 렌더러: 파일 이름 → 원본 URL (spec JSON은 파일 안에 그대로 넣는다).
+# 내보내기마다 out/assets/에 한 번 두고 상대 경로로 불러서, 오프라인/방화벽 안에서도 차트가 보인다.
+# 버전을 고정해 CDN 대체 경로도 같은 파일을 가리키게 하고, 복사/내려받은 파일은 VEGA_SHA256과 맞춰 본다.
+VEGA_SCRIPTS: Dict[str, str] = {
+    "vega.min.js": "https://cdn.jsdelivr.net/npm/vega@5.21.0/build/vega.min.js",
+    "vega-lite.min.js": "https://cdn.jsdelivr.net/npm/vega-lite@5.2.0/build/vega-lite.min.js",
+    "vega-embed.min.js": "https://cdn.jsdelivr.net/npm/vega-embed@6.20.2/build/vega-embed.min.js",
+}
+VEGA_SHA256: Dict[str, str] = {
+    "vega.min.js": "3b12459f256a971ac4ec45064c5152ff799e393456a96eb7c3270fc4554c1688",
+    "vega-lite.min.js": "d73157451b3978015ab31dacd55ff90d986ab8663fc0abed50f97b3cd90002cb",
+    "vega-embed.min.js": "4b87cec0c75a083c4a44334ba937578c700681f3dc7e67a7a0c87231f6645e5d",
+}
+ASSETS_DIRNAME = "assets"
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+_STYLE = """
+body { font-family: -apple-system, "Apple SD Gothic Neo", "Malgun Gothic", sans-serif; margin: 2rem auto;
+       max-width: 1100px; color: #222; }
+h1 { font-size: 1.6rem; } h2 { font-size: 1.15rem; border-bottom: 1px solid #ddd; padding-bottom: .3rem; }
+.metrics { display: flex; gap: 1rem; flex-wrap: wrap; }
+.metric { border: 1px solid #e5e5e5; border-radius: 6px; padding: .6rem 1rem; min-width: 150px; }
+.metric .label { font-size: .85rem; color: #666; } .metric .value { font-size: 1.4rem; font-weight: 600; }
+.charts { display: flex; gap: 1rem; flex-wrap: wrap; } .chart { flex: 1 1 300px; }
+.note { color: #666; font-size: .9rem; } .warn { color: #a15c00; }
+table { border-collapse: collapse; font-size: .85rem; } td, th { border: 1px solid #ddd; padding: .2rem .5rem; }
+"""
+
+
+# ---------- 지역구 보고서 ----------
+
+class ReportBuilder:
+    """
+    data_dir을 한 번 읽어 두고 지역구별 HTML 보고서를 만든다 (Streamlit 없이 charts/metrics의 build_* 재사용).
+    섹션 구성은 지역별 분석 페이지와 같다: 24년 결과 / 현직정보 / 진보당 현황 / 득표추이 / 인구.
+    """
+
+    def __init__(self, data_dir: Union[str, Path], scripts: Sequence[str] = tuple(VEGA_SCRIPTS.values())):
+        self.data_dir = Path(data_dir)
+        self.index = open_shared(self.data_dir).index
+        self.scripts = tuple(scripts)
+
+    def table(self, name: str) -> pd.DataFrame:
+        return self.index[name] if name in self.index else pd.DataFrame()
+
+    def regions(self) -> pd.DataFrame:
+        """[코드, 라벨] (사이드바 선택 목록과 같은 순서)."""
+        return build_regions(self.table("population"), self.table("vote_trend"),
+                             self.table("results_2024"), self.table("current_info"))
+
+    def sections(self, code) -> List[Tuple[str, str]]:
+        """(제목, 본문 HTML) 목록. 차트 div id는 페이지 안 순번이라 같은 데이터면 같은 HTML이 나온다."""
+        ids = itertools.count(1)
+        df_24, df_trend = self.table("results_2024"), self.table("vote_trend")
+        pop_row = self.index.get("population", code)
+        summary = compute_summary_metrics(df_trend, df_24, self.table("index_sample"), code)
+        return [
+            ("24년 총선결과", _results_html(build_results_2024_view(self.index.get("results_2024", code), df_24, code))),
+            ("현직정보", _incumbent_html(build_incumbent_view(self.index.get("current_info", code)))),
+            ("진보당 현황", _prg_html(build_prg_view(self.index.get("party_labels", code), pop_row,
+                                                 self.table("party_labels"), self.table("population")), summary)),
+            ("정당성향별 득표추이", _spec_html(build_vote_trend_spec(compute_trend_series(df_trend, code)), ids)),
+            ("인구 정보", _population_html(build_population_view(pop_row), ids)),
+        ]
+
+    def render(self, code, label: str) -> str:
+        body = "\n".join(f"<section><h2>{html.escape(title)}</h2>\n{content}\n</section>"
+                         for title, content in self.sections(code))
+        return _page(label, f"<h1>{html.escape(label)}</h1>\n<p class=\"note\">코드 {html.escape(str(code))} · "
+                            f"생성 {time.strftime('%Y-%m-%d %H:%M')}</p>\n{body}", self.scripts)
+
+
+def report_filename(code) -> str:
+    return re.sub(r"[^\w.-]", "_", str(_canon_code(code) or code)) + ".html"
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def bundle_scripts(out_dir: Union[str, Path], source: Optional[Union[str, Path]] = None,
+                   timeout: float = 20.0) -> Tuple[str, ...]:
+    """
+    Vega 스크립트를 out_dir/assets/에 한 번 둔다 (이미 있으면 그대로, source 디렉터리에 있으면 복사,
+    아니면 고정 버전 URL에서 한 번 내려받음). 모든 파일은 VEGA_SHA256과 같아야 쓰인다.
+    보고서 <script src> 목록을 반환한다: 셋 다 준비되면 상대 경로, 하나라도 못 구하면
+    이번에 만든 파일/디렉터리를 지우고 CDN URL (이때 보고서는 온라인에서만 차트가 보인다).
+    """
+    assets = Path(out_dir) / ASSETS_DIRNAME
+    created = not assets.exists()
+    written: List[Path] = []
+    assets.mkdir(parents=True, exist_ok=True)
+    for name, url in VEGA_SCRIPTS.items():
+        target = assets / name
+        if target.exists() and _sha256(target) == VEGA_SHA256[name]:
+            continue
+        tmp = target.with_suffix(".tmp")
+        try:
+            if source is not None and (Path(source) / name).exists():
+                shutil.copyfile(Path(source) / name, tmp)
+            else:
+                with urllib.request.urlopen(url, timeout=timeout) as resp, open(tmp, "wb") as f:
+                    shutil.copyfileobj(resp, f)
+            digest = _sha256(tmp)
+            if digest != VEGA_SHA256[name]:
+                raise OSError(f"sha256 불일치: {digest[:12]}…, 기대값 {VEGA_SHA256[name][:12]}…")
+            os.replace(tmp, target)
+            written.append(target)
+        except OSError as e:  # URLError/타임아웃/해시 불일치 포함
+            tmp.unlink(missing_ok=True)
+            if created:
+                shutil.rmtree(assets, ignore_errors=True)
+            else:
+                for path in written:
+                    path.unlink(missing_ok=True)
+            print(f"warning: {name}을(를) 준비하지 못해 CDN에서 불러옵니다 ({e})", file=sys.stderr)
+            return tuple(VEGA_SCRIPTS.values())
+    return tuple(f"{ASSETS_DIRNAME}/{name}" for name in VEGA_SCRIPTS)
+
+
+# ---------- HTML 조각 ----------
+
+def _page(title: str, body: str, scripts: Sequence[str] = tuple(VEGA_SCRIPTS.values())) -> str:
+    scripts = "\n".join(f'<script src="{html.escape(src)}"></script>' for src in scripts)
+    return (f"<!DOCTYPE html>\n<html lang=\"ko\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(title)}</title>\n{scripts}\n<style>{_STYLE}</style>\n</head>\n"
+            f"<body>\n{body}\n</body>\n</html>\n")
+
+
+def _metrics_html(items: Sequence[Tuple[str, object]]) -> str:
+    cells = "".join(f'<div class="metric"><div class="label">{html.escape(str(k))}</div>'
+                    f'<div class="value">{html.escape(str(v))}</div></div>' for k, v in items)
+    return f'<div class="metrics">{cells}</div>'
+
+
+def _note(text: str, cls: str = "note") -> str:
+    return f'<p class="{cls}">{html.escape(text)}</p>'
+
+
+def _spec_html(spec: ChartSpec, ids: Iterator[int]) -> str:
+    """ChartSpec → HTML. vega는 spec JSON을 그대로 넣고 vegaEmbed로 그린다 (ids: 페이지 안 차트 순번)."""
+    if spec.kind == "vega":
+        div = f"chart-{next(ids)}"
+        payload = dict(spec.payload)
+        if spec.use_container_width:
+            payload["width"] = "container"
+        # </script>가 spec 문자열 안에 있어도 태그가 닫히지 않게
+        data = json.dumps(payload, ensure_ascii=False, default=str).replace("</", "<\\/")
+        return (f'<div id="{div}" class="chart" style="width:100%"></div>\n'
+                f'<script>vegaEmbed("#{div}", {data}, {{"actions": false}});</script>')
+    if spec.kind in ("line", "table"):
+        table = spec.payload.to_html(border=0) if isinstance(spec.payload, pd.DataFrame) else ""
+        return (_note(spec.message) if spec.message else "") + table
+    if spec.kind == "warning":
+        table = spec.payload.to_html(border=0) if isinstance(spec.payload, pd.DataFrame) else ""
+        return _note(spec.message, "warn") + table
+    return _note(spec.message)
+
+
+def _results_html(view: Optional[dict]) -> str:
+    if view is None:
+        return _note("해당 선거구의 24년 결과 데이터가 없습니다.")
+    gap = view["gap"]
+    return _metrics_html([(view["name1"], _fmt_pct(view["share1"])),
+                          (view["name2"], _fmt_pct(view["share2"])),
+                          ("1~2위 격차", f"{gap:.2f}p" if isinstance(gap, (int, float)) else "N/A")])
+
+
+def _incumbent_html(view: Optional[dict]) -> str:
+    if view is None:
+        return _note("현직 정보 데이터가 없습니다.")
+    e = {k: html.escape(str(v)) for k, v in view.items()}
+    out = (f"<ul><li>의원: <b>{e['name']}</b> / 정당: <b>{e['party']}</b></li>"
+           f"<li>선수: <b>{e['term']}</b> / 성별: <b>{e['gender']}</b> / 연령: <b>{e['age']}</b></li></ul>")
+    return out + (_note(f"상태: {view['status']}") if view["status"] is not None else "")
+
+
+def _prg_html(view: Optional[dict], summary: Dict[str, object]) -> str:
+    out = []
+    if view is None:
+        out.append(_note("진보당 관련 데이터가 없습니다."))
+    else:
+        out.append(_metrics_html([("진보득표력", view["strength"]), ("조직 규모", view["org"])]))
+        if view["candidates"] is not None:
+            out.append(_note(f"지방선거 후보 수: {view['candidates']:,}명"))
+        if view["elder"] is not None:
+            out.append(_note(f"고령층 비율: {view['elder']} / 청년층 비율: {view['youth']}"))
+
+    def _num(key, fmt):
+        v = summary.get(key)
+        return fmt.format(float(v)) if isinstance(v, (int, float)) and pd.notna(v) else "N/A"
+    swing = summary.get("PL_swing_B")
+    out.append(_note(f"요약지표 · 진보정당득표력: {_num('PL_prg_str', '{:.2f}%')} · "
+                     f"유동성B: {swing if swing is not None else 'N/A'} · 경합도B: {_num('PL_gap_B', '{:.2f}p')}"))
+    return "\n".join(out)
+
+
+def _population_html(view: Optional[dict], ids: Iterator[int]) -> str:
+    if view is None:
+        return _note("해당 선거구의 인구 데이터가 없습니다.")
+    total, y2030, y65, single = view["total"], view["y2030"], view["y65"], view["single"]
+    out = [
+        _metrics_html([
+            ("전체 유권자", f"{int(total):,}" if total is not None else "N/A"),
+            ("2030 비율", _fmt_pct(y2030 / total * 100.0) if total and y2030 is not None else "N/A"),
+            ("65세 이상 비율", _fmt_pct(y65 / total * 100.0) if total and y65 is not None else "N/A"),
+        ]),
+        f'<div class="charts"><div>{_spec_html(view["age_pie"], ids)}</div><div>{_spec_html(view["gender_pie"], ids)}</div></div>',
+    ]
+    if single is not None and y2030:
+        out.append(_note(f"2030 1인가구: {int(single):,}명 (2030 대비 {_fmt_pct(single / y2030 * 100.0)})"))
+    return "\n".join(out)
+
+
+# ---------- 병렬 내보내기 ----------
+
+# 워커 프로세스마다 한 번 읽어 두는 데이터 (initializer에서 채움)
+_builder: Optional[ReportBuilder] = None
+
+
+def _init_worker(data_dir: str, scripts: Sequence[str] = tuple(VEGA_SCRIPTS.values())) -> None:
+    global _builder
+    _builder = ReportBuilder(data_dir, scripts)
+
+
+def _export_one(code, label: str, out_dir: str, total: int) -> dict:
+    """지역구 하나를 out_dir/<코드>.html로 쓰고 {code, label, file, total, ms[, error]} 반환 (total: 전체 작업 수)."""
+    t0 = time.perf_counter()
+    record = {"code": str(code), "label": label, "file": report_filename(code), "total": total}
+    try:
+        page = _builder.render(code, label)
+        (Path(out_dir) / record["file"]).write_text(page, encoding="utf-8")
+    except Exception as e:  # 한 지역구 실패가 나머지를 멈추지 않게
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    return record
+
+
+def export_reports(data_dir: Union[str, Path], out_dir: Union[str, Path],
+                   codes: Optional[Sequence[str]] = None,
+                   workers: int = DEFAULT_WORKERS,
+                   assets: Optional[Union[str, Path]] = None,
+                   cdn: bool = False) -> Iterator[dict]:
+    """
+    지역구별 HTML 보고서를 out_dir에 쓰고, 끝나는 순서대로 기록(dict)을 내보낸다.
+    이 프로세스가 먼저 공유 파일(data/.shared)을 만들어 두면 workers개 프로세스는 그 파일을 매핑만 해서
+    같은 페이지를 나눠 쓰고, 지역구를 나눠 그린다. 1이면 이 프로세스에서 순차.
+    codes를 주면 그 지역구만 (정규화 코드 기준). 마지막에 out_dir/index.html 목록을 쓴다.
+    Vega 스크립트는 out_dir/assets/에 한 번 두고(assets 디렉터리에서 복사하거나 내려받음) 모든 보고서가 같이 쓴다.
+    cdn=True면 예전처럼 CDN에서 불러온다.
+    """
+    data_dir, out_dir = Path(data_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    scripts = tuple(VEGA_SCRIPTS.values()) if cdn else bundle_scripts(out_dir, assets)
+    _init_worker(str(data_dir), scripts)
+    regions = _builder.regions()
+    if codes:
+        wanted = {_canon_code(c) for c in codes}
+        regions = regions[regions["코드"].map(_canon_code).isin(wanted)]
+    jobs = list(zip(regions["코드"], regions["라벨"]))
+
+    records = []
+    if workers <= 1 or len(jobs) <= 1:
+        for code, label in jobs:
+            records.append(_export_one(code, label, str(out_dir), len(jobs)))
+            yield records[-1]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(data_dir), scripts)) as pool:
+            futures = [pool.submit(_export_one, code, label, str(out_dir), len(jobs)) for code, label in jobs]
+            for fut in as_completed(futures):
+                records.append(fut.result())
+                yield records[-1]
+
+    order = {str(code): i for i, (code, _) in enumerate(jobs)}
+    records.sort(key=lambda r: order[r["code"]])
+    (out_dir / "index.html").write_text(_index_html(records, scripts), encoding="utf-8")
+
+
+def _index_html(records: List[dict], scripts: Sequence[str] = tuple(VEGA_SCRIPTS.values())) -> str:
+    rows = "\n".join(
+        f"<tr><td>{html.escape(r['code'])}</td><td>"
+        + (f"<a href=\"{html.escape(r['file'])}\">{html.escape(r['label'])}</a>" if "error" not in r
+           else f"{html.escape(r['label'])} <span class=\"warn\">({html.escape(r['error'])})</span>")
+        + f"</td><td>{r['ms']:.0f} ms</td></tr>"
+        for r in records
+    )
+    stamp = time.strftime("%Y-%m-%d %H:%M")
+    return _page("지역구 보고서", f"<h1>지역구 보고서</h1>\n{_note(f'{len(records)}개 지역구 · 생성 {stamp}')}\n"
+                                f"<table><tr><th>코드</th><th>지역구</th><th>생성 시간</th></tr>\n{rows}\n</table>",
+                 scripts)
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    사용법: python export.py [--data-dir data] [--out reports] [--workers N] [--codes 코드 ...] [--assets DIR | --cdn]
+    지역구마다 out/<코드>.html(24년 결과/현직정보/진보당 현황/득표추이/인구)과 out/index.html을 만든다.
+    Vega 스크립트는 out/assets/에 둔다 (--assets 디렉터리에서 복사, 없으면 한 번 내려받음, 실패하면 CDN).
+    """
+    parser = argparse.ArgumentParser(description="지역구별 HTML 보고서 일괄 생성")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--out", type=Path, default=Path("reports"))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="프로세스 수 (1이면 순차)")
+    parser.add_argument("--codes", nargs="*", help="이 지역구만 (기본: 전체)")
+    parser.add_argument("--assets", type=Path, help="vega.min.js / vega-lite.min.js / vega-embed.min.js(VEGA_SCRIPTS의 고정 버전)가 있는 디렉터리")
+    parser.add_argument("--cdn", action="store_true", help="스크립트를 복사하지 않고 CDN에서 불러오기")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    failed = 0
+    n = 0
+    for n, record in enumerate(export_reports(args.data_dir, args.out, args.codes, args.workers, args.assets, args.cdn), start=1):
+        status = f"error {record['error']}" if "error" in record else record["file"]
+        failed += "error" in record
+        print(f"[{n:>4}/{record['total']}] {record['code']:<8} {record['label']:<24} {record['ms']:>8.1f} ms  {status}", flush=True)
+    wall = time.perf_counter() - t0
+    print(f"{n}개 지역구 · 실패 {failed} · {wall:.1f} s (workers={args.workers}) → {args.out / 'index.html'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE, content_version, file_fingerprint
+from data_loader import DEFAULT_MAX_WORKERS, _read_csv_safe, _tidy_columns, load_party_labels, run_timed
+from schema import TableSchema
+
+# 원자료 파일명: {연도}_{S|G}_{종류}.csv  (S=서울, G=경기)
+ELECTION_FILE_RE = re.compile(r"^(?P<year>\d{4})_(?P<region>[SG])_(?P<kind>.+)\.csv$")
+
+# 동 단위 원자료의 식별/집계 컬럼 (공백 제거 후 이름 기준)
+ID_COLS = ["시/도", "지역구", "지역구코드", "행정동", "행정동코드"]
+TALLY_COLS = ["선거인수", "투표수", "계", "무효투표수", "기권수"]
+
+LABEL_ORDER = ["민주", "보수", "진보", "기타"]
+# party_labels.csv의 세부 라벨 → 추이 표의 4계열
+LABEL_FOLD = {"진보당": "진보"}
+DEFAULT_LABEL = "기타"
+
+TREND_COLUMNS = ["region", "code", "election", "label", "votes", "prop"]
+
+
+# ---------- 파일명/정당명 규칙 ----------
+
+def election_key(file_stem: str) -> str:
+    """'2022_S_president' / '2022_G_president' / '2022_president' → '2022_president'."""
+    return re.sub(r"^(\d{4})_[SG]_", r"\1_", str(file_stem).strip())
+
+
+def party_key(name: object) -> str:
+    """
+    후보형 컬럼('더불어민주당 이재명')과 정당형 컬럼('더불어민주당')을 같은 키로.
+    줄바꿈/연속 공백을 정리한 뒤 첫 토큰(정당명)만 사용.
+    """
+    s = re.sub(r"\s+", " ", str(name)).strip()
+    return s.split(" ", 1)[0] if s else s
+
+
+def list_election_files(data_dir: Union[str, Path]) -> List[Path]:
+    data_dir = Path(data_dir)
+    return sorted(p for p in data_dir.glob("*.csv") if ELECTION_FILE_RE.match(p.name))
+
+
+# ---------- 라벨 매핑 ----------
+
+def build_label_map(df_party: pd.DataFrame) -> pd.DataFrame:
+    """
+    party_labels.csv → (election, party) 키의 라벨 표.
+    서울/경기 파일별 매핑을 선거 단위로 합쳐서, 매핑이 없는 지역 파일(예: 2017_G)도 라벨을 받게 한다.
+    """
+    if df_party is None or df_party.empty or not {"file_name", "party_name", "label"}.issubset(df_party.columns):
+        return pd.DataFrame(columns=["election", "party", "label"])
+    out = pd.DataFrame({
+        "election": df_party["file_name"].map(election_key),
+        "party": df_party["party_name"].map(party_key),
+        "label": df_party["label"].astype(str).str.strip().replace(LABEL_FOLD),
+    })
+    return out.drop_duplicates(["election", "party"], keep="first").reset_index(drop=True)
+
+
+# ---------- 동 단위 원자료 → long ----------
+
+def read_election_file(path: Path) -> pd.DataFrame:
+    """
+    동 단위 원자료 한 개를 읽고 컬럼명을 정리.
+    헤더로 스키마를 만들어 식별 컬럼은 문자열, 득표/집계 컬럼은 읽는 시점에 정수로 변환.
+    """
+    header = _read_csv_safe(path, nrows=0)
+    if header is None or len(header.columns) == 0:
+        return pd.DataFrame()
+    schema = TableSchema.from_columns(path.stem, [c.strip() for c in header.columns])
+    df = _tidy_columns(_read_csv_safe(path, **schema.read_kwargs()))
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = schema.apply(df)
+    df.columns = [re.sub(r"\s+", "", c) if re.sub(r"\s+", "", c) in TALLY_COLS else c for c in df.columns]
+    return df
+
+
+def read_election_file_cached(path: Path) -> pd.DataFrame:
+    """파일 지문이 같으면 이전에 읽은 표 재사용 (득표 melt와 집계 컬럼 추출이 같이 쓴다)."""
+    version = content_version(file_fingerprint(path))
+    return CACHE.get_or_load(("read_election_file", str(path)), version, lambda: read_election_file(path))
+
+
+def melt_election_file(path: Path) -> pd.DataFrame:
+    """
+    원자료 한 개를 (행정동 × 정당) long 형태로 변환.
+    반환 컬럼: ID_COLS + election, file, party, column, votes
+    """
+    df = read_election_file_cached(path)
+    if df.empty:
+        return pd.DataFrame(columns=ID_COLS + ["election", "file", "party", "column", "votes"])
+    ids = [c for c in ID_COLS if c in df.columns]
+    vote_cols = [c for c in df.columns if c not in ids and c not in TALLY_COLS]
+    long = df.melt(id_vars=ids, value_vars=vote_cols, var_name="column", value_name="votes")
+    long["votes"] = long["votes"].fillna(0)
+    stem = Path(path).stem
+    long["election"] = election_key(stem)
+    long["file"] = stem
+    long["party"] = long["column"].map(party_key)
+    return long
+
+
+def melt_election_file_cached(path: Path) -> pd.DataFrame:
+    """파일 지문이 같으면 이전 melt 결과 재사용 (파일별 슬롯)."""
+    version = content_version(file_fingerprint(path))
+    return CACHE.get_or_load(("melt_election_file", str(path)), version, lambda: melt_election_file(path))
+
+
+def election_tallies(path: Path) -> pd.DataFrame:
+    """
+    원자료 한 개의 행정동별 집계 컬럼 (선거인수/투표수/계/무효투표수/기권수, 없으면 0).
+    반환 컬럼: ID_COLS + election, file + TALLY_COLS
+    """
+    df = read_election_file_cached(path)
+    if df.empty:
+        return pd.DataFrame(columns=ID_COLS + ["election", "file"] + TALLY_COLS)
+    ids = [c for c in ID_COLS if c in df.columns]
+    out = df[ids].copy()
+    stem = Path(path).stem
+    out["election"] = election_key(stem)
+    out["file"] = stem
+    for c in TALLY_COLS:
+        out[c] = pd.to_numeric(df[c], errors="coerce").fillna(0) if c in df.columns else 0
+    return out
+
+
+def load_dong_tallies(data_dir: Union[str, Path],
+                      files: Optional[List[Path]] = None,
+                      max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> pd.DataFrame:
+    """모든 원자료의 행정동 × 선거 집계 컬럼을 쌓은 표."""
+    data_dir = Path(data_dir)
+    files = list_election_files(data_dir) if files is None else files
+    read, _ = run_timed({str(p): (lambda p=p: election_tallies(p)) for p in files}, max_workers)
+    parts = [read[str(p)] for p in files if not read[str(p)].empty]
+    if not parts:
+        return pd.DataFrame(columns=ID_COLS + ["election", "file"] + TALLY_COLS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_dong_votes(data_dir: Union[str, Path],
+                    files: Optional[List[Path]] = None,
+                    df_party: Optional[pd.DataFrame] = None,
+                    max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> pd.DataFrame:
+    """
+    모든 동 단위 원자료를 long으로 쌓고 라벨 표와 해시 조인.
+    파일별 읽기/melt는 서로 독립이라 스레드 풀에서 동시에 처리한다.
+    반환 컬럼: ID_COLS + election, file, party, column, votes, label
+    """
+    data_dir = Path(data_dir)
+    files = list_election_files(data_dir) if files is None else files
+    melted, _ = run_timed({str(p): (lambda p=p: melt_election_file_cached(p)) for p in files}, max_workers)
+    parts = [melted[str(p)] for p in files]
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=ID_COLS + ["election", "file", "party", "column", "votes", "label"])
+    long = pd.concat(parts, ignore_index=True)
+    return label_votes(long, build_label_map(load_party_labels(data_dir) if df_party is None else df_party))
+
+
+def label_votes(long: pd.DataFrame, labels: pd.DataFrame) -> pd.DataFrame:
+    """melt 결과에 (election, party) 라벨 표를 조인 (없는 정당은 DEFAULT_LABEL)."""
+    long = long.merge(labels, on=["election", "party"], how="left", sort=False)
+    long["label"] = long["label"].fillna(DEFAULT_LABEL)
+    return long
+
+
+# ---------- 추이 표 ----------
+
+def aggregate_trend(long: pd.DataFrame) -> pd.DataFrame:
+    """
+    동 × 정당 long → 지역구 × 선거 × 계열 (vote_trend.csv 형식).
+    prop은 해당 지역구·선거 유효표 합계 대비 %.
+    """
+    if long is None or long.empty:
+        return pd.DataFrame(columns=TREND_COLUMNS)
+    long = long.dropna(subset=["지역구코드"])
+    wide = (
+        long.groupby(["지역구코드", "election", "label"], sort=False, observed=True)["votes"]
+            .sum()
+            .unstack("label", fill_value=0)
+    )
+    # 4계열은 득표가 없어도 0으로 채워 선거마다 같은 모양을 유지
+    labels = LABEL_ORDER + sorted(c for c in wide.columns if c not in LABEL_ORDER)
+    wide = wide.reindex(columns=labels, fill_value=0)
+    total = wide.to_numpy().sum(axis=1, keepdims=True)
+    prop = np.divide(wide.to_numpy() * 100.0, total, out=np.full(wide.shape, np.nan), where=total > 0)
+
+    g = wide.stack().rename("votes").reset_index()
+    g["prop"] = prop.ravel()
+
+    names = long.drop_duplicates("지역구코드").set_index("지역구코드")
+    region = names["지역구"].astype(str).str.strip()
+    if "시/도" in names.columns:
+        region = names["시/도"].astype(str).str.strip() + " " + region
+    g["region"] = g["지역구코드"].map(region)
+
+    g["code"] = g["지역구코드"].astype("int64")
+    g["votes"] = g["votes"].round().astype("int64")
+    g["__label_order__"] = g["label"].map({lab: i for i, lab in enumerate(labels)})
+    g = g.sort_values(["election", "__label_order__", "code"], kind="stable")
+    return g[TREND_COLUMNS].reset_index(drop=True)
+
+
+def update_trend(trend: pd.DataFrame, old_part: Optional[pd.DataFrame],
+                 new_part: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    원자료 한 파일분만 바꾼 추이 표. old/new가 덮는 (code, election) 행만 빼고 new 집계 행을 넣는다.
+    나머지 행(손으로 고친 값 포함)은 그대로 두고, 정렬은 aggregate_trend와 같다.
+    """
+    fresh = aggregate_trend(new_part) if new_part is not None else pd.DataFrame(columns=TREND_COLUMNS)
+    old = aggregate_trend(old_part) if old_part is not None else pd.DataFrame(columns=TREND_COLUMNS)
+    drop = pd.concat([old[["code", "election"]], fresh[["code", "election"]]], ignore_index=True)
+    keys = pd.MultiIndex.from_frame(drop.astype({"code": "int64", "election": str}))
+    trend = trend.reindex(columns=TREND_COLUMNS) if trend is not None else pd.DataFrame(columns=TREND_COLUMNS)
+    mine = pd.MultiIndex.from_arrays([pd.to_numeric(trend["code"], errors="coerce").fillna(-1).astype("int64"),
+                                      trend["election"].astype(str)])
+    # 빈 조각(파일 삭제면 fresh)을 섞으면 code가 object가 되므로 뺀다
+    parts = [df for df in (trend[~mine.isin(keys)], fresh) if not df.empty]
+    out = pd.concat(parts, ignore_index=True) if parts else trend.iloc[0:0]
+    labels = LABEL_ORDER + sorted(set(out["label"].astype(str)) - set(LABEL_ORDER))
+    order = out["label"].astype(str).map({lab: i for i, lab in enumerate(labels)})
+    out = out.assign(__label_order__=order).sort_values(["election", "__label_order__", "code"], kind="stable")
+    return out[TREND_COLUMNS].reset_index(drop=True)
+
+
+def build_vote_trend(data_dir: Union[str, Path], files: Optional[List[Path]] = None) -> pd.DataFrame:
+    """data_dir의 동 단위 원자료 + party_labels.csv → vote_trend 표."""
+    return aggregate_trend(load_dong_votes(data_dir, files=files))
+
+
+def write_vote_trend(data_dir: Union[str, Path], out_path: Optional[Union[str, Path]] = None) -> Path:
+    """추이 표를 만들어 저장 (기본: data_dir/vote_trend.csv, 기존 파일과 같은 utf-8 BOM)."""
+    data_dir = Path(data_dir)
+    out_path = Path(out_path) if out_path else data_dir / "vote_trend.csv"
+    build_vote_trend(data_dir).to_csv(out_path, index=False, encoding="utf-8-sig")
+    return out_path
+
+
+def main(argv: Optional[list] = None) -> int:
+    """사용법: python ingest.py [DATA_DIR] [OUT_CSV]"""
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+    out = write_vote_trend(data_dir, argv[1] if len(argv) > 1 else None)
+    print(f"vote_trend: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# DSS_PROFILE=1     → 단계별 시간/행 수 기록
+# DSS_PROFILE=alloc → + tracemalloc으로 단계별 순 할당 바이트 (느려지므로 분석할 때만)
+# 꺼져 있으면 stage()는 공용 no-op 객체, @timed는 플래그 확인 한 번만 하고 원 함수를 호출한다.
+_MODE = os.environ.get("DSS_PROFILE", "").strip().lower()
+_ENABLED = _MODE not in ("", "0", "false", "off")
+_TRACE_ALLOC = _MODE == "alloc"
+
+LOG_PATH = Path(os.environ.get("DSS_PROFILE_LOG", "logs/profile.jsonl"))
+RECENT_RUNS = 200
+
+_local = threading.local()
+_recent: Deque[dict] = deque(maxlen=RECENT_RUNS)
+_log_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def enable(trace_alloc: bool = False, log_path: Optional[Union[str, Path]] = None) -> None:
+    """코드에서 켜기 (벤치마크/노트북용). 환경변수 설정과 같은 효과."""
+    global _ENABLED, _TRACE_ALLOC, LOG_PATH
+    _ENABLED, _TRACE_ALLOC = True, trace_alloc
+    if log_path is not None:
+        LOG_PATH = Path(log_path)
+    if trace_alloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    global _ENABLED, _TRACE_ALLOC
+    _ENABLED = _TRACE_ALLOC = False
+
+
+# ---------- 단계 기록 ----------
+
+class _NullStage:
+    """비활성 상태에서 stage()가 돌려주는 공용 객체 (rows 대입도 무시)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "rows", "t0", "mem0", "depth")
+
+    def __init__(self, name: str, rows: Optional[int] = None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.depth = getattr(_local, "depth", 0)
+        _local.depth = self.depth + 1
+        self.mem0 = tracemalloc.get_traced_memory()[0] if _TRACE_ALLOC and tracemalloc.is_tracing() else None
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.t0) * 1000.0
+        _local.depth = self.depth
+        run = getattr(_local, "run", None)
+        if run is not None:
+            rec = {"stage": self.name, "ms": round(ms, 3), "depth": self.depth}
+            if self.rows is not None:
+                rec["rows"] = int(self.rows)
+            if self.mem0 is not None:
+                rec["bytes"] = int(tracemalloc.get_traced_memory()[0] - self.mem0)
+            run["stages"].append(rec)
+        return False
+
+
+def stage(name: str, rows: Optional[int] = None):
+    """
+    with stage("page:지역별 분석") as s: ...; s.rows = len(df)
+    현재 스레드에 진행 중인 run이 있을 때만 기록된다 (스레드 풀 작업은 호출측 단계에 합산).
+    """
+    if not _ENABLED:
+        return _NULL
+    return _Stage(name, rows)
+
+
+def _count_rows(out: Any) -> Optional[int]:
+    if isinstance(out, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(out)
+    if isinstance(out, tuple) and out:
+        return _count_rows(out[0])
+    if isinstance(out, dict) and out and all(isinstance(v, pd.DataFrame) for v in out.values()):
+        return sum(len(v) for v in out.values())
+    return None
+
+
+def timed(name: Optional[str] = None):
+    """함수 단위 계측 데코레이터. 반환값이 DataFrame/Series/배열(또는 프레임 dict)이면 행 수도 기록."""
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return fn(*args, **kwargs)
+            with _Stage(label) as s:
+                out = fn(*args, **kwargs)
+                s.rows = _count_rows(out)
+            return out
+
+        wrapper.untimed = fn
+        return wrapper
+    return deco
+
+
+# ---------- rerun 단위 ----------
+
+def begin_run(page: Optional[str] = None, session: Optional[str] = None) -> None:
+    """
+    스크립트 rerun 시작. 같은 스레드에 끝나지 않은 run(st.stop 등)이 있으면 stopped로 마감한다.
+    """
+    if not _ENABLED:
+        return
+    if getattr(_local, "run", None) is not None:
+        end_run(stopped=True)
+    if _TRACE_ALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.depth = 0
+    _local.run = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "session": session,
+        "page": page,
+        "stages": [],
+        "_t0": time.perf_counter(),
+    }
+
+
+def end_run(stopped: bool = False) -> Optional[dict]:
+    """run을 마감해 최근 목록에 넣고 JSON-lines 로그에 한 줄로 추가."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return None
+    _local.run = None
+    run["total_ms"] = round((time.perf_counter() - run.pop("_t0")) * 1000.0, 3)
+    if stopped:
+        run["stopped"] = True
+    _recent.append(run)
+    _append_log(run)
+    return run
+
+
+def _append_log(run: dict) -> None:
+    try:
+        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(run, ensure_ascii=False)
+        with _log_lock, open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass  # 로그를 못 써도 화면은 그대로
+
+
+def recent_runs() -> List[dict]:
+    return list(_recent)
+
+
+# ---------- 집계 ----------
+
+def read_log(path: Union[str, Path] = None) -> List[dict]:
+    path = Path(path) if path else LOG_PATH
+    if not path.exists():
+        return []
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+    return runs
+
+
+def summarize(runs: List[dict]) -> pd.DataFrame:
+    """run 목록 → 단계별 호출 수, p50/p95/max ms, 평균 행 수/할당 바이트 (p95 내림차순)."""
+    rows = [dict(s, page=r.get("page")) for r in runs for s in r.get("stages", [])]
+    rows += [{"stage": "(rerun total)", "ms": r["total_ms"], "page": r.get("page")} for r in runs if "total_ms" in r]
+    if not rows:
+        return pd.DataFrame(columns=["calls", "p50_ms", "p95_ms", "max_ms", "rows", "bytes"])
+    df = pd.DataFrame(rows)
+    for c in ("rows", "bytes"):
+        if c not in df.columns:
+            df[c] = np.nan
+    g = df.groupby("stage", sort=False)
+    out = pd.DataFrame({
+        "calls": g["ms"].size(),
+        "p50_ms": g["ms"].quantile(0.5),
+        "p95_ms": g["ms"].quantile(0.95),
+        "max_ms": g["ms"].max(),
+        "rows": g["rows"].mean(),
+        "bytes": g["bytes"].mean(),
+    })
+    return out.sort_values("p95_ms", ascending=False).round(2)
+
+
+def main(argv: Optional[list] = None) -> int:
+    """사용법: python instrument.py [LOG_JSONL]  → 단계별 p50/p95 표 출력"""
+    argv = sys.argv[1:] if argv is None else argv
+    runs = read_log(argv[0] if argv else None)
+    print(f"runs: {len(runs)}")
+    with pd.option_context("display.max_rows", 200, "display.width", 160):
+        print(summarize(runs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
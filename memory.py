@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import pandas as pd
+
+from data_loader import DATA_FILES, _read_table, _source_paths, load_bookmark
+from schema import memory_usage
+
+MB = 1024.0 * 1024.0
+
+
+# ---------- 메모리 보고 ----------
+
+def frame_memory(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """표별 행/열 수와 점유 MB (object 문자열까지 deep으로 센다)."""
+    rows = {}
+    for name, df in frames.items():
+        if df is None:
+            continue
+        rows[name] = {"rows": len(df), "cols": len(df.columns),
+                      "MB": float(memory_usage(df)["bytes"].sum()) / MB}
+    return pd.DataFrame.from_dict(rows, orient="index", columns=["rows", "cols", "MB"])
+
+
+def read_both(data_dir: Union[str, Path]) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """{표: {"current": 기존 표현, "compact": 압축 표현}}. 캐시를 거치지 않고 CSV를 두 번 읽는다."""
+    data_dir = Path(data_dir)
+    out = {}
+    sources = _source_paths(data_dir)
+    for name, filename in DATA_FILES.items():
+        if sources[name] is None:
+            continue
+        if name == "bookmark":  # 스키마 없이 읽는 헤더 매핑 표 (압축 대상 아님)
+            bm = load_bookmark.uncached(data_dir)
+            out[name] = {"current": bm, "compact": bm}
+            continue
+        out[name] = {kind: _read_table(data_dir, filename, compact=(kind == "compact"))
+                     for kind in ("current", "compact")}
+    return out
+
+
+def compare_memory(data_dir: Union[str, Path]) -> pd.DataFrame:
+    """표별 기존/압축 MB와 비율 (마지막 행은 합계)."""
+    both = read_both(data_dir)
+    cur = frame_memory({n: v["current"] for n, v in both.items()})
+    new = frame_memory({n: v["compact"] for n, v in both.items()})
+    table = pd.DataFrame({"rows": cur["rows"], "current_MB": cur["MB"], "compact_MB": new["MB"]})
+    table.loc["(total)"] = table.sum()
+    table["rows"] = table["rows"].astype(int)
+    table["ratio"] = table["compact_MB"] / table["current_MB"]
+    return table
+
+
+def column_memory(data_dir: Union[str, Path], name: str) -> pd.DataFrame:
+    """표 하나의 컬럼별 dtype/바이트 (기존 → 압축)."""
+    both = read_both(data_dir)[name]
+    cur, new = memory_usage(both["current"]), memory_usage(both["compact"])
+    return pd.DataFrame({"current": cur["dtype"], "compact": new["dtype"],
+                         "current_KB": cur["bytes"] / 1024.0, "compact_KB": new["bytes"] / 1024.0})
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    사용법: python memory.py [DATA_DIR] [표이름 ...]
+    DATA_DIR의 표를 기존 표현과 압축 표현(schema.compact_frame)으로 각각 읽어 MB를 비교한다.
+    표이름을 주면 그 표의 컬럼별 dtype/크기도 출력한다.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+    with pd.option_context("display.width", 160, "display.max_rows", 200):
+        print(compare_memory(data_dir).round(4).to_string())
+        for name in argv[1:]:
+            print(f"\n[{name}]")
+            print(column_memory(data_dir, name).round(2).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,185 +1,290 @@
 from __future__ import annotations
 
+import re
+from typing import Dict, Hashable, Iterable, Optional
+
+import numpy as np
 import pandas as pd
-from pathlib import Path
-from typing import Optional, Dict, List, Union
 
-# ---------- Internal CSV readers ----------
+from data_cache import CACHE
+from district_index import CODE_CANDIDATES, DistrictIndex, _canon_code, _detect_col, canon_codes
+from instrument import timed
+from schema import widen_float
 
-def _read_csv_safe(path: Path,
-                   encoding_order: List[str] = ["utf-8", "cp949"],
-                   dtype: Optional[Dict[str, Union[str, type]]] = None) -> pd.DataFrame:
-    """
-    단일 경로에서 인코딩 우선순위를 바꿔가며 안전하게 읽기.
-    실패 시 빈 DataFrame 반환.
-    """
-    if not path.exists():
-        return pd.DataFrame()
-    for enc in encoding_order:
-        try:
-            return pd.read_csv(path, encoding=enc, dtype=dtype)
-        except UnicodeDecodeError:
-            continue
-        except Exception:
-            continue
-    return pd.DataFrame()
-
-
-def _read_csv_safe_any(paths: List[Path],
-                       dtype: Optional[Dict[str, Union[str, type]]] = None) -> pd.DataFrame:
-    """
-    여러 경로 후보를 순서대로 시도해서 첫 성공 DataFrame 반환.
-    실패 시 빈 DataFrame.
-    """
-    for p in paths:
-        df = _read_csv_safe(p, dtype=dtype)
-        if not df.empty:
-            return df
-    return pd.DataFrame()
+# 정당 계열 (vote_trend.csv label)
+LABELS = ["민주", "보수", "진보", "기타"]
 
+METRIC_COLUMNS = ["PL_prg_str", "PL_swing_B", "PL_gap_B", "gap_24"]
 
-# ---------- Light post-processing helpers ----------
+# index_sample1012.csv(외부 지표)에 값이 있으면 계산값보다 우선
+INDEX_OVERRIDES = {
+    "PL_prg_str": ["진보정당 득표력", "PL_prg_str"],
+    "PL_swing_B": ["유동성B", "PL_swing_B"],
+    "PL_gap_B": ["경합도B", "PL_gap_B"],
+}
 
-def _tidy_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    컬럼명 앞뒤 공백 제거 및 중복 컬럼 처리.
-    """
-    if df is None or df.empty:
-        return df
-    # strip + dedupe
-    cols = []
-    seen = {}
-    for c in df.columns:
-        base = str(c).strip()
-        if base not in seen:
-            seen[base] = 0
-            cols.append(base)
-        else:
-            seen[base] += 1
-            cols.append(f"{base}.{seen[base]}")
-    df.columns = cols
-    return df
-
-
-def _ensure_str(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
-    """
-    코드/식별자 컬럼 문자열 보존.
-    """
-    if df is None or df.empty:
-        return df
-    for c in cols:
-        if c in df.columns:
-            df[c] = df[c].astype(str).str.strip()
-    return df
+SHARE_COL_RE = re.compile(r"^후보\d+_득표율$")
 
 
-# ---------- Public loaders (7 files) ----------
+# ---------- 입력 정리 ----------
 
-def load_bookmark(data_dir: Path) -> pd.DataFrame:
-    """
-    bookmark.csv: 파일명과 해당 헤더 목록이 정리되어 있는 매핑 테이블.
-    추후 스키마 검증/리네임 정책에 활용 가능.
-    """
-    df = _read_csv_safe_any([
-        data_dir / "bookmark.csv",
-        Path("/mnt/data") / "bookmark.csv"
-    ])
-    return _tidy_columns(df)
+def _canon_code_series(df: pd.DataFrame) -> Optional[pd.Series]:
+    col = "코드" if "코드" in df.columns else _detect_col(df, CODE_CANDIDATES)
+    return canon_codes(df[col]) if col else None
 
 
-def load_population_agg(data_dir: Path) -> pd.DataFrame:
-    """
-    population.csv: (동 단위 원자료 또는 집계본)
-    - downstream에서 구 단위로 합산할 수 있도록 '코드' 등 문자열 보존
-    """
-    df = _read_csv_safe_any([
-        data_dir / "population.csv",
-        Path("/mnt/data") / "population.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "지역구", "구", "동"])
-    return df
+def _pct_series(s: pd.Series) -> pd.Series:
+    """'46.5', '44%', 0.465 등 → % 단위 float (문자열일 때만 정규식 경로)."""
+    if not pd.api.types.is_numeric_dtype(s):
+        s = pd.to_numeric(s.astype(str).str.replace(r"[,%\s]", "", regex=True), errors="coerce")
+    return widen_float(s).astype(float)
 
 
-def load_party_labels(data_dir: Path) -> pd.DataFrame:
+def trend_long(df_trend: pd.DataFrame) -> pd.DataFrame:
     """
-    party_labels.csv: 정당 코드-라벨 매핑
+    vote_trend → [코드(표준), election, year, label, prop] long 표.
+    코드 → 연도 → 선거 → 계열 순으로 정렬.
     """
-    df = _read_csv_safe_any([
-        data_dir / "party_labels.csv",
-        Path("/mnt/data") / "party_labels.csv"
-    ])
-    df = _tidy_columns(df)
-    # 흔히 쓰일만한 키 후보들 문자열화
-    df = _ensure_str(df, ["정당코드", "정당", "party", "code"])
-    return df
+    cols = ["코드", "election", "year", "label", "prop"]
+    if df_trend is None or df_trend.empty or not {"election", "label", "prop"}.issubset(df_trend.columns):
+        return pd.DataFrame(columns=cols)
+    codes = _canon_code_series(df_trend)
+    if codes is None:
+        return pd.DataFrame(columns=cols)
+    out = pd.DataFrame({
+        "코드": codes.to_numpy(),
+        "election": df_trend["election"].astype(str).to_numpy(),
+        "label": df_trend["label"].astype(str).str.strip().to_numpy(),
+        "prop": widen_float(pd.to_numeric(df_trend["prop"], errors="coerce")).to_numpy(),
+    })
+    out["year"] = pd.to_numeric(out["election"].str.extract(r"(\d{4})")[0], errors="coerce").astype("Int64")
+    order = {lab: i for i, lab in enumerate(LABELS)}
+    out["__o__"] = out["label"].map(order).fillna(len(order))
+    out = out.sort_values(["코드", "year", "election", "__o__"], kind="stable")
+    return out[cols].reset_index(drop=True)
 
 
-def load_vote_trend(data_dir: Path) -> pd.DataFrame:
+# ---------- 일괄 계산 ----------
+
+def compute_trend_metrics(long: pd.DataFrame) -> pd.DataFrame:
     """
-    vote_trend.csv: 정당 성향별/정당별 득표 추이
+    모든 코드에 대해 한 번에:
+    - PL_prg_str: 선거별 진보 계열 득표율 평균(%)
+    - PL_swing_B: 선거 간 1위 계열이 바뀐 횟수
+    - PL_gap_B:   선거별 |민주 − 보수| 득표율 격차 평균(%p)
     """
-    df = _read_csv_safe_any([
-        data_dir / "vote_trend.csv",
-        Path("/mnt/data") / "vote_trend.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구", "district", "label"])
-    return df
+    if long is None or long.empty:
+        return pd.DataFrame(columns=["PL_prg_str", "PL_swing_B", "PL_gap_B"])
+    wide = long.pivot_table(index=["코드", "year", "election"], columns="label", values="prop", aggfunc="sum")
+    wide = wide.reindex(columns=LABELS)
+    codes = wide.index.get_level_values("코드").to_numpy()
+    vals = wide.to_numpy(dtype=float)
+
+    uniq, grp = np.unique(codes, return_inverse=True)
+    n = len(uniq)
+
+    prg = wide["진보"].groupby(level="코드").mean().reindex(uniq).to_numpy()
+    gap = (wide["민주"] - wide["보수"]).abs().groupby(level="코드").mean().reindex(uniq).to_numpy()
+
+    has_any = ~np.isnan(vals).all(axis=1)
+    leader = np.argmax(np.where(np.isnan(vals), -np.inf, vals), axis=1)
+    same_code = grp[1:] == grp[:-1]
+    valid_pair = has_any[1:] & has_any[:-1]
+    changed = (leader[1:] != leader[:-1]) & same_code & valid_pair
+    swing = np.bincount(grp[1:][changed], minlength=n)
 
+    return pd.DataFrame(
+        {"PL_prg_str": prg, "PL_swing_B": swing.astype("int64"), "PL_gap_B": gap},
+        index=pd.Index(uniq, name="코드"),
+    )
 
-def load_results_2024(data_dir: Path) -> pd.DataFrame:
+
+def compute_24_gap_table(df_24: pd.DataFrame) -> pd.Series:
     """
-    5_na_dis_results.csv: 2024 총선 결과(동/선거구 레벨)
+    5_na_dis_results → 코드별 2024(없으면 최신 연도) 1·2위 득표율 격차(%p).
     """
-    df = _read_csv_safe_any([
-        data_dir / "5_na_dis_results.csv",
-        Path("/mnt/data") / "5_na_dis_results.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구", "구", "동"])
-    return df
+    if df_24 is None or df_24.empty:
+        return pd.Series(dtype=float, name="gap_24")
+    codes = _canon_code_series(df_24)
+    share_cols = [c for c in df_24.columns if SHARE_COL_RE.match(str(c))]
+    if codes is None or len(share_cols) < 2:
+        return pd.Series(dtype=float, name="gap_24")
+
+    shares = np.column_stack([_pct_series(df_24[c]).to_numpy() for c in share_cols])
+    top = -np.sort(-np.where(np.isnan(shares), -np.inf, shares), axis=1)
+    gap = np.where(np.isfinite(top[:, 1]), top[:, 0] - top[:, 1], np.nan)
+
+    year = (pd.to_numeric(df_24["연도"], errors="coerce").to_numpy(dtype=float)
+            if "연도" in df_24.columns else np.zeros(len(df_24)))
+    # 2024년 행 우선, 없으면 최신 연도
+    rank = np.where(year == 2024, np.inf, np.nan_to_num(year, nan=-np.inf))
+    frame = pd.DataFrame({"코드": codes.to_numpy(), "rank": rank, "gap_24": np.round(gap, 2)})
+    best = frame.sort_values("rank", kind="stable").drop_duplicates("코드", keep="last")
+    return best.set_index("코드")["gap_24"].sort_index()
 
 
-def load_current_info(data_dir: Path) -> pd.DataFrame:
+def _index_overrides(df_idx: pd.DataFrame) -> pd.DataFrame:
+    if df_idx is None or df_idx.empty:
+        return pd.DataFrame()
+    codes = _canon_code_series(df_idx)
+    if codes is None:
+        return pd.DataFrame()
+    out = {}
+    for metric, cands in INDEX_OVERRIDES.items():
+        col = next((c for c in cands if c in df_idx.columns), None)
+        if col:
+            out[metric] = _pct_series(df_idx[col]).to_numpy()
+    if not out:
+        return pd.DataFrame()
+    return pd.DataFrame(out, index=pd.Index(codes.to_numpy(), name="코드")).groupby(level=0).first()
+
+
+@timed()
+def compute_metrics_table(df_trend: pd.DataFrame,
+                          df_24: pd.DataFrame = None,
+                          df_idx: pd.DataFrame = None) -> pd.DataFrame:
     """
-    current_info.csv: 현직/주요 인물/현황 정보
+    전 코드 지표 표 (index=표준 코드, columns=METRIC_COLUMNS).
+    외부 지표(df_idx)에 값이 있으면 그 값을 우선한다.
     """
-    df = _read_csv_safe_any([
-        data_dir / "current_info.csv",
-        Path("/mnt/data") / "current_info.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구", "이름", "정당"])
-    return df
+    table = compute_trend_metrics(trend_long(df_trend))
+    gap24 = compute_24_gap_table(df_24)
+    table = table.join(gap24, how="outer") if len(gap24) else table.assign(gap_24=np.nan)
+    over = _index_overrides(df_idx)
+    if not over.empty:
+        table = over.combine_first(table)
+    table = table.reindex(columns=METRIC_COLUMNS)
+    table["PL_swing_B"] = pd.to_numeric(table["PL_swing_B"], errors="coerce").round().astype("Int64")
+    return table
+
 
+def code_digests(df: pd.DataFrame) -> pd.Series:
+    """표준 코드별 행 내용 해시 합 (행 순서와 무관). 어느 코드의 행이 바뀌었는지 비교할 때 쓴다."""
+    codes = _canon_code_series(df) if df is not None and not df.empty else None
+    if codes is None:
+        return pd.Series(dtype="uint64")
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return pd.Series(h, index=codes.to_numpy()).groupby(level=0).sum()
 
-def load_index_sample(data_dir: Path) -> pd.DataFrame:
+
+@timed()
+def update_metrics_table(prev: pd.DataFrame, df_trend: pd.DataFrame, df_24: pd.DataFrame,
+                         df_idx: pd.DataFrame, codes) -> pd.DataFrame:
+    """prev에서 codes(표준 코드) 행만 다시 계산해 바꾼 표. 입력에서 사라진 코드는 빠진다."""
+    codes = set(codes)
+    if not codes:
+        return prev
+
+    def only(df: pd.DataFrame) -> pd.DataFrame:
+        c = _canon_code_series(df) if df is not None and not df.empty else None
+        return df[c.isin(codes).to_numpy()] if c is not None else df
+
+    fresh = compute_metrics_table(only(df_trend), only(df_24), only(df_idx))
+    out = pd.concat([prev.drop(index=list(codes & set(prev.index))), fresh])
+    return out[~out.index.duplicated(keep="last")].sort_index()
+
+
+# ---------- 코드별 조회 ----------
+
+def _summary_from_table(table: pd.DataFrame, code: Hashable) -> Dict[str, object]:
+    key = _canon_code(code)
+    if key not in table.index:
+        return {c: None for c in METRIC_COLUMNS}
+    out = {}
+    for c in METRIC_COLUMNS:
+        v = table.at[key, c]
+        out[c] = (v.item() if hasattr(v, "item") else v) if pd.notna(v) else None
+    return out
+
+
+class MetricsEngine:
     """
-    index_sample1012.csv (선택): 지표/스코어 샘플
+    지표 표 + 추이 long 표를 한 번 만들어 두고, 지역구별 요청은 행 조회로 처리.
     """
-    df = _read_csv_safe_any([
-        data_dir / "index_sample1012.csv",
-        Path("/mnt/data") / "index_sample1012.csv"
-    ])
-    df = _tidy_columns(df)
-    df = _ensure_str(df, ["코드", "선거구명", "지역구"])
-    return df
 
+    def __init__(self, df_trend: pd.DataFrame, df_24: pd.DataFrame = None, df_idx: pd.DataFrame = None):
+        self.table = compute_metrics_table(df_trend, df_24, df_idx)
+        self.trend = DistrictIndex({"trend": trend_long(df_trend)})
+
+    def trend_series(self, code: Hashable) -> pd.DataFrame:
+        return self.trend.get("trend", code)
+
+    def summary(self, code: Hashable) -> Dict[str, object]:
+        return _summary_from_table(self.table, code)
+
+
+# 아래 호환 API는 입력 프레임 객체(id) 단위로 결과를 캐시한다.
+# 캐시 값이 입력 프레임을 함께 붙잡고 있어 캐시에 있는 동안 id가 재사용되지 않는다.
+
+def _trend_index(df_trend: pd.DataFrame) -> DistrictIndex:
+    return CACHE.get_or_load("trend_index", id(df_trend), lambda: (
+        df_trend, DistrictIndex({"trend": trend_long(df_trend)})
+    ))[1]
 
-# ---------- Optional: convenience aggregator ----------
 
-def load_all(data_dir: Union[str, Path]) -> dict:
+def _metrics_table(df_trend: pd.DataFrame, df_24: pd.DataFrame, df_idx: pd.DataFrame) -> pd.DataFrame:
+    version = (id(df_trend), id(df_24), id(df_idx))
+    return CACHE.get_or_load("metrics_table", version, lambda: _metrics_entry(df_trend, df_24, df_idx))[1]
+
+
+def _metrics_entry(df_trend: pd.DataFrame, df_24: pd.DataFrame, df_idx: pd.DataFrame) -> tuple:
     """
-    대시보드에서 한 번에 호출할 수 있는 일괄 로더.
+    (입력 프레임, 지표 표, 코드별 해시). 이전 표가 있으면 입력의 코드별 해시를 비교해
+    바뀐 코드만 다시 계산한다 (원자료 한 파일이 바뀌어 vote_trend 일부 행만 달라진 rerun).
     """
-    data_dir = Path(data_dir)
-    return {
-        "bookmark": load_bookmark(data_dir),
-        "population": load_population_agg(data_dir),
-        "party_labels": load_party_labels(data_dir),
-        "vote_trend": load_vote_trend(data_dir),
-        "results_2024": load_results_2024(data_dir),
-        "current_info": load_current_info(data_dir),
-        "index_sample": load_index_sample(data_dir),
-    }
+    digests = tuple(code_digests(df) for df in (df_trend, df_24, df_idx))
+    prev = CACHE.peek("metrics_table")
+    table = None
+    if prev is not None and len(prev[1]) == 3:
+        _, prev_table, prev_digests = prev[1]
+        changed = set()
+        for new, old in zip(digests, prev_digests):
+            both = new.index.intersection(old.index)
+            changed |= set(new.index.symmetric_difference(old.index))
+            changed |= set(both[new.reindex(both).to_numpy() != old.reindex(both).to_numpy()])
+        if len(changed) <= len(prev_table) // 2:
+            table = update_metrics_table(prev_table, df_trend, df_24, df_idx, changed)
+    if table is None:
+        table = compute_metrics_table(df_trend, df_24, df_idx)
+    return (df_trend, df_24, df_idx), table, digests
+
+
+# ---------- app.py / charts.py 호환 API ----------
+
+@timed()
+def compute_trend_series(df_trend: pd.DataFrame, code: Hashable) -> pd.DataFrame:
+    """해당 코드의 [코드, election, year, label, prop] 추이 (없으면 빈 DF)."""
+    return _trend_index(df_trend).get("trend", code)
+
+
+@timed()
+def compute_summary_metrics(df_trend: pd.DataFrame,
+                            df_24: pd.DataFrame,
+                            df_idx: pd.DataFrame,
+                            code: Hashable) -> Dict[str, object]:
+    """해당 코드의 PL_prg_str / PL_swing_B / PL_gap_B / gap_24 (없으면 None)."""
+    return _summary_from_table(_metrics_table(df_trend, df_24, df_idx), code)
+
+
+@timed()
+def compute_trend_many(df_trend: pd.DataFrame, codes: Iterable[Hashable]) -> pd.DataFrame:
+    """여러 코드의 추이를 한 표로 (codes 순서, 인덱스 조회 한 번). 비교 화면용."""
+    return _trend_index(df_trend).get_many("trend", codes)
+
+
+@timed()
+def compute_summary_many(df_trend: pd.DataFrame,
+                         df_24: pd.DataFrame,
+                         df_idx: pd.DataFrame,
+                         codes: Iterable[Hashable]) -> pd.DataFrame:
+    """여러 코드의 METRIC_COLUMNS (행 = 표준 코드, codes 순서). 없는 코드는 NaN 행."""
+    keys = list(dict.fromkeys(_canon_code(c) for c in codes))
+    return _metrics_table(df_trend, df_24, df_idx).reindex(keys, columns=METRIC_COLUMNS)
+
+
+@timed()
+def compute_24_gap(df_24: pd.DataFrame, code: Hashable) -> Optional[float]:
+    """해당 코드의 24년 1·2위 격차(%p), 없으면 None."""
+    table = CACHE.get_or_load("gap_24_table", id(df_24), lambda: (df_24, compute_24_gap_table(df_24)))[1]
+    val = table.get(_canon_code(code))
+    return float(val) if val is not None and pd.notna(val) else None
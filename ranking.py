@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import warnings
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE
+from district_index import CODE_CANDIDATES, _detect_col, canon_codes
+from instrument import timed
+from metrics import _metrics_table
+
+# 점수 항목: 키 → (화면 이름, 방향). 방향 -1은 값이 작을수록 유리(격차가 작을수록 경합).
+FEATURES: Dict[str, tuple] = {
+    "PL_prg_str": ("진보정당 득표력", 1.0),
+    "gap_24": ("24년 1·2위 격차", -1.0),
+    "PL_swing_B": ("유동성B", 1.0),
+    "share_2030": ("2030 비율", 1.0),
+    "share_65": ("65세 이상 비율", -1.0),
+}
+# population에서 순위 계산이 읽는 컬럼 (로더 프로젝션용)
+POPULATION_COLUMNS = ["전체 유권자", "2030", "65세 이상"]
+DEFAULT_WEIGHTS = {"PL_prg_str": 0.4, "gap_24": 0.25, "PL_swing_B": 0.15, "share_2030": 0.15, "share_65": 0.05}
+
+
+# ---------- 항목 표 ----------
+
+def population_shares(df_pop: pd.DataFrame) -> pd.DataFrame:
+    """population(동 단위) → 코드별 2030 / 65세 이상 비율(%)."""
+    cols = ["share_2030", "share_65"]
+    if df_pop is None or df_pop.empty or "전체 유권자" not in df_pop.columns:
+        return pd.DataFrame(columns=cols)
+    code_col = "코드" if "코드" in df_pop.columns else _detect_col(df_pop, CODE_CANDIDATES)
+    if not code_col:
+        return pd.DataFrame(columns=cols)
+    num = {c: pd.to_numeric(df_pop[c], errors="coerce").to_numpy(dtype=float)
+           for c in POPULATION_COLUMNS if c in df_pop.columns}
+    sums = pd.DataFrame(num, index=pd.Index(canon_codes(df_pop[code_col]).to_numpy(), name="코드")).groupby(level=0).sum()
+    total = sums["전체 유권자"].where(sums["전체 유권자"] > 0)
+    out = pd.DataFrame(index=sums.index)
+    out["share_2030"] = sums["2030"] / total * 100.0 if "2030" in sums else np.nan
+    out["share_65"] = sums["65세 이상"] / total * 100.0 if "65세 이상" in sums else np.nan
+    return out
+
+
+def build_feature_table(df_trend: pd.DataFrame, df_24: pd.DataFrame,
+                        df_idx: pd.DataFrame, df_pop: pd.DataFrame) -> pd.DataFrame:
+    """지표 표 + 인구 비율 → 코드별 점수 항목 표 (index=표준 코드, columns=FEATURES)."""
+    table = _metrics_table(df_trend, df_24, df_idx).join(population_shares(df_pop), how="outer")
+    table = table.reindex(columns=list(FEATURES)).astype(float)
+    return table[table.notna().any(axis=1)]
+
+
+def standardize(features: pd.DataFrame) -> np.ndarray:
+    """
+    항목별 z-score × 방향. 결측은 0(평균)으로 채워 한 항목이 비어도 나머지로 점수가 난다.
+    """
+    x = features.to_numpy(dtype=float)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 전부 결측인 항목
+        mean = np.nan_to_num(np.nanmean(x, axis=0))
+        std = np.nanstd(x, axis=0)
+    std = np.where((std > 0) & np.isfinite(std), std, 1.0)
+    z = np.nan_to_num((x - mean) / std, nan=0.0)
+    return z * np.array([FEATURES[c][1] for c in features.columns])
+
+
+class RankingModel:
+    """
+    점수 항목 표와 표준화 행렬을 한 번 만들어 두고, 가중치가 바뀔 때는 행렬-벡터 곱과 부분 정렬만 한다.
+    """
+
+    def __init__(self, features: pd.DataFrame):
+        self.features = features
+        self.codes = features.index.to_numpy()
+        self.z = standardize(features)
+
+    def scores(self, weights: Mapping[str, float]) -> np.ndarray:
+        w = np.array([float(weights.get(c, 0.0)) for c in self.features.columns])
+        norm = np.abs(w).sum()
+        return self.z @ (w / norm) if norm > 0 else np.zeros(len(self.codes))
+
+    @timed("RankingModel.rank")
+    def rank(self, weights: Mapping[str, float], n: Optional[int] = None) -> pd.DataFrame:
+        """상위 n개 지역구 (n이 없으면 전체). columns: 순위, 점수 + FEATURES."""
+        s = self.scores(weights)
+        top = top_n(s, len(s) if n is None else n)
+        out = self.features.iloc[top].copy()
+        out.insert(0, "점수", np.round(s[top], 3))
+        out.insert(0, "순위", np.arange(1, len(top) + 1))
+        return out
+
+
+def top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """점수 내림차순 상위 n개 위치. argpartition으로 O(N) 선택 후 n개만 정렬."""
+    n = max(0, min(int(n), len(scores)))
+    if n == 0:
+        return np.array([], dtype=int)
+    neg = -scores
+    if n < len(scores):
+        part = np.argpartition(neg, n - 1)[:n]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(neg[part], kind="stable")]
+
+
+def ranking_model(df_trend: pd.DataFrame, df_24: pd.DataFrame,
+                  df_idx: pd.DataFrame, df_pop: pd.DataFrame) -> RankingModel:
+    """입력 프레임 객체(id) 단위로 캐시 (metrics의 호환 API와 같은 방식)."""
+    version = (id(df_trend), id(df_24), id(df_idx), id(df_pop))
+    return CACHE.get_or_load("ranking_model", version, lambda: (
+        (df_trend, df_24, df_idx, df_pop), RankingModel(build_feature_table(df_trend, df_24, df_idx, df_pop))
+    ))[1]
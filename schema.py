@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import re
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ---------- 컬럼 분류 규칙 ----------
+# bookmark.csv에는 파일별 헤더만 있으므로, 타입은 컬럼명 규칙으로 정한다.
+
+ID_COLUMNS = {
+    "코드", "code", "지역구코드", "행정동코드", "선거구", "선거구명", "지역구", "행정동",
+    "이름", "region", "party_name", "파일명",
+}
+CATEGORY_COLUMNS = {
+    "시/도", "지역", "정당", "성별", "label", "election", "file_name",
+    "선수", "인물경쟁력", "재출마가능성",
+}
+TEXT_COLUMNS = {"연령", "총선직업", "총선학력", "총선경력", "최근경력"}
+# 표준 코드(district_index._canon_code)가 모두 숫자면 정수로 보관하는 식별 컬럼
+CODE_COLUMNS = {"코드", "code", "지역구코드", "행정동코드"}
+FLOAT_RE = re.compile(r"(prop|비율|득표력|경합도|경쟁력)")
+PERCENT_RE = re.compile(r"율$")
+NAME_RE = re.compile(r"_이름$")
+
+
+def classify_column(col: str) -> str:
+    """
+    컬럼명 → id / category / text / percent / float / int.
+    규칙에 없는 컬럼은 int(원자료의 정당별 득표 컬럼처럼 이름을 미리 알 수 없는 집계)로 보되,
+    apply는 값이 하나도 숫자로 읽히지 않으면 글자 그대로 둔다.
+    """
+    c = str(col).strip()
+    if c in ID_COLUMNS or NAME_RE.search(c):
+        return "id"
+    if c in CATEGORY_COLUMNS:
+        return "category"
+    if c in TEXT_COLUMNS:
+        return "text"
+    if PERCENT_RE.search(c):
+        return "percent"
+    if FLOAT_RE.search(c):
+        return "float"
+    return "int"
+
+
+# ---------- Table schema ----------
+
+@dataclass(frozen=True)
+class TableSchema:
+    """
+    파일 하나의 기대 헤더와 컬럼별 타입.
+    read_kwargs()로 읽기 옵션을 만들고, apply()로 읽은 뒤 남은 변환을 벡터 연산으로 처리한다.
+    """
+    name: str
+    columns: Tuple[str, ...]
+    kinds: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_columns(cls, name: str, columns: Iterable[str]) -> "TableSchema":
+        cols = tuple(str(c).strip() for c in columns if isinstance(c, str) and c.strip())
+        return cls(name=name, columns=cols, kinds={c: classify_column(c) for c in cols})
+
+    def read_kwargs(self) -> dict:
+        """
+        pd.read_csv 옵션: 식별/범주/텍스트/퍼센트는 문자열로 받고, 수치는 천 단위 구분자를 해석.
+        (범주형 변환은 앞뒤 공백 정리 후 apply에서 수행)
+        """
+        str_cols = {c: str for c in self.columns if self.kinds[c] in ("id", "category", "text", "percent")}
+        return {"dtype": str_cols, "thousands": ","}
+
+    def apply(self, df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+        """읽은 프레임에 타입 규칙 적용 (헤더에 없는 컬럼은 건너뜀). compact면 compact_frame까지."""
+        if df is None or df.empty:
+            return df
+        for c in df.columns:
+            kind = self.kinds.get(c) or classify_column(c)
+            s = df[c]
+            if kind == "id":
+                if s.dtype == object:
+                    df[c] = s.str.strip()
+                elif pd.api.types.is_integer_dtype(s):
+                    df[c] = s.astype(str)
+            elif kind == "category":
+                df[c] = (s.str.strip() if s.dtype == object else s).astype("category")
+            elif kind in ("percent", "float", "int"):
+                num = self._numeric(s, c, strip="%" if kind == "percent" else "")
+                if num is None:
+                    df[c] = s.str.strip()
+                else:
+                    df[c] = _to_int(num) if kind == "int" else num.astype(float)
+        return compact_frame(df, self.kinds) if compact else df
+
+    def _numeric(self, s: pd.Series, col: str, strip: str = "") -> Optional[pd.Series]:
+        """
+        숫자 컬럼 변환. 비어 있지 않은 값이 하나도 숫자가 아니면 None(자유 텍스트로 보고 변환하지 않음),
+        일부만 숫자가 아니면 그 값들은 NaN이 되므로 몇 개를 버렸는지 경고한다.
+        """
+        num, dropped = _parse_numeric(s, strip)
+        n = int(dropped.sum())
+        if n and not num.notna().any():
+            return None
+        if n:
+            examples = ", ".join(repr(v) for v in s[dropped].astype(str).unique()[:3])
+            warnings.warn(f"{self.name}.{col}: 숫자가 아닌 값 {n}개를 결측으로 바꿨습니다 (예: {examples})",
+                          stacklevel=3)
+        return num
+
+    def missing(self, df: pd.DataFrame) -> List[str]:
+        """기대 헤더 중 실제 파일에 없는 컬럼."""
+        return [c for c in self.columns if c not in df.columns]
+
+
+def _parse_numeric(s: pd.Series, strip: str = "") -> Tuple[pd.Series, pd.Series]:
+    """(숫자 컬럼, 비어 있지 않은데 숫자로 읽히지 않은 행 마스크). 천 단위 쉼표/공백/strip 문자는 지운다."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s, pd.Series(False, index=s.index)
+    cleaned = s.astype(str).str.replace(f"[,\\s{re.escape(strip)}]", "", regex=True)
+    cleaned = cleaned.mask(s.isna() | cleaned.isin(["", "nan", "None"]))
+    num = pd.to_numeric(cleaned, errors="coerce")
+    return num, cleaned.notna() & num.isna()
+
+
+def _to_int(s: pd.Series) -> pd.Series:
+    """결측이 없고 정수값이면 int64, 아니면 float64 유지."""
+    if pd.api.types.is_integer_dtype(s):
+        return s
+    if not pd.api.types.is_numeric_dtype(s):
+        return s
+    vals = s.to_numpy(dtype=float)
+    if np.isnan(vals).any() or not np.all(np.mod(vals, 1) == 0):
+        return s.astype(float)
+    return s.astype("int64")
+
+
+# ---------- 메모리 압축 ----------
+# 반복이 많은 식별 컬럼(지역구명, 정당명 등)은 고유값 비율이 이 값 이하일 때 범주형으로 바꾼다
+CATEGORY_MAX_RATIO = 0.5
+_INT32 = np.iinfo(np.int32)
+
+
+def compact_series(s: pd.Series, kind: str, name: str = "") -> pd.Series:
+    """
+    apply()를 거친 컬럼 하나를 더 작은 dtype으로.
+    - 코드: 표준 코드가 모두 숫자면 int32(넘치면 int64). 앞자리 0/하이픈은 표준화에서 어차피 버려진다.
+    - 그 밖의 식별 컬럼: 반복이 많으면 category
+    - 정수(득표/인구): int32, 결측이 섞여 float이면 float32 / 퍼센트·비율: float32
+    """
+    if kind == "id":
+        if s.dtype != object or s.isna().any():
+            return s
+        if name in CODE_COLUMNS:
+            canon = s.str.replace(r"[^0-9A-Za-z]", "", regex=True).str.lstrip("0")
+            if len(canon) and canon.str.fullmatch(r"\d{1,18}").all():
+                codes = canon.astype("int64")
+                fits = codes.min() >= _INT32.min and codes.max() <= _INT32.max
+                return codes.astype("int32") if fits else codes
+            return s
+        # nunique()는 문자열마다 UTF-8 사본을 캐시해 남는 컬럼을 오히려 키우므로 파이썬 set으로 센다
+        if len(s) and len(set(s)) <= len(s) * CATEGORY_MAX_RATIO:
+            return s.astype("category")
+        return s
+    if kind == "int":
+        if pd.api.types.is_integer_dtype(s):
+            if len(s) == 0 or (s.min() >= _INT32.min and s.max() <= _INT32.max):
+                return s.astype("int32")
+            return s
+        if pd.api.types.is_float_dtype(s):
+            return s.astype("float32")
+        return s
+    if kind in ("percent", "float") and pd.api.types.is_float_dtype(s):
+        return s.astype("float32")
+    return s
+
+
+def compact_frame(df: pd.DataFrame, kinds: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """프레임 전체에 compact_series 적용 (kinds에 없는 컬럼은 컬럼명 규칙으로 분류)."""
+    if df is None or df.empty:
+        return df
+    kinds = kinds or {}
+    for c in df.columns:
+        df[c] = compact_series(df[c], kinds.get(c) or classify_column(c), str(c))
+    return df
+
+
+def widen_float(s: pd.Series) -> pd.Series:
+    """
+    float32 → float64를 float32 최단 표기 기준으로 (32.27 → 32.27, 단순 astype이면 32.2700004578).
+    압축 표의 퍼센트를 float64로 계산/출력할 때 쓴다. 다른 dtype은 그대로.
+    """
+    if s.dtype != np.float32:
+        return s
+    return s.astype(str).astype("float64")
+
+
+def memory_usage(df: pd.DataFrame) -> pd.DataFrame:
+    """컬럼별 dtype과 실제 점유 바이트(object 문자열 포함, deep)."""
+    if df is None or len(df.columns) == 0:
+        return pd.DataFrame(columns=["dtype", "bytes"])
+    usage = df.memory_usage(index=False, deep=True)
+    return pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": usage.reindex(df.columns).to_numpy()})
+
+
+# ---------- Registry ----------
+
+def build_registry(df_bookmark: pd.DataFrame) -> Dict[str, TableSchema]:
+    """bookmark.csv(파일명, 1..N 헤더) → {파일 stem: TableSchema}."""
+    if df_bookmark is None or df_bookmark.empty:
+        return {}
+    out = {}
+    for row in df_bookmark.itertuples(index=False):
+        name = str(row[0]).strip()
+        if not name or name == "nan":
+            continue
+        out[name] = TableSchema.from_columns(name, [v for v in row[1:] if isinstance(v, str)])
+    return out
+
+
+def schema_for(registry: Dict[str, TableSchema], stem: str, header: Optional[Iterable[str]] = None) -> TableSchema:
+    """
+    등록된 스키마를 반환. 없으면 실제 헤더(또는 빈 목록)로 규칙 기반 스키마를 만든다.
+    동 단위 원자료({연도}_{S|G}_{종류}.csv)처럼 bookmark에 없는 파일용.
+    """
+    if stem in registry:
+        return registry[stem]
+    return TableSchema.from_columns(stem, header or [])
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from data_cache import CACHE
+import snapshot
+from data_loader import (DEFAULT_MAX_WORKERS, KEY_COLUMNS, LazyTable, _schema_registry, data_version,
+                         lazy_tables, loader_settings, run_timed)
+from district_index import DistrictIndex, prepare_frame
+from instrument import timed
+
+# Arrow가 없으면 파일 공유 계층만 꺼지고, 프로세스 안에서 버전당 한 벌 공유는 그대로 동작
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except Exception:
+    pa = None
+    ipc = None
+
+SHARED_DIRNAME = ".shared"
+MANIFEST_NAME = "manifest.json"
+# 저장하는 표의 모양(표준화/정렬 규칙)이 바뀌면 올려서 기존 파일을 무효화
+SHARED_FORMAT = 1
+# 새 버전을 쓸 때 남겨 둘 이전 버전 수 (아직 옛 버전을 매핑 중인 프로세스용)
+KEEP_VERSIONS = 2
+
+
+def shared_root(data_dir: Union[str, Path]) -> Path:
+    return Path(data_dir) / SHARED_DIRNAME
+
+
+def available() -> bool:
+    return ipc is not None
+
+
+def version_key(version: Tuple, settings: dict) -> str:
+    """
+    (data_version, 로더 설정) → 디렉터리 이름. 같은 파일 내용·같은 설정이면 어느 프로세스에서나 같은 값이고,
+    DSS_COMPACT나 형식 번호가 다른 프로세스는 다른 디렉터리를 쓴다.
+    """
+    key = (SHARED_FORMAT, snapshot.SNAPSHOT_FORMAT, sorted(settings.items()), version)
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+
+
+# ---------- Arrow IPC 파일 ----------
+
+def write_tables(frames: Dict[str, pd.DataFrame], out_dir: Union[str, Path], settings: dict) -> Optional[dict]:
+    """
+    표준화·코드 정렬된 프레임을 표마다 무압축 Arrow IPC 파일로 쓰고 manifest를 남긴다.
+    임시 디렉터리에 다 쓴 뒤 이름을 바꾸므로, 여러 프로세스가 동시에 써도 읽는 쪽은 완성된 디렉터리만 본다.
+    이미 다른 프로세스가 같은 버전을 써 두었으면 None.
+    """
+    if ipc is None:
+        raise RuntimeError("pyarrow가 없어 공유 파일을 만들 수 없습니다.")
+    out_dir = Path(out_dir)
+    if (out_dir / MANIFEST_NAME).exists():
+        return None
+    tmp = out_dir.with_name(f"{out_dir.name}.tmp-{uuid.uuid4().hex[:8]}")
+    tmp.mkdir(parents=True)
+    tables, skipped = {}, {}
+    try:
+        for name, df in frames.items():
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                with pa.OSFile(str(tmp / f"{name}.arrow"), "wb") as sink:
+                    with ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+                skipped[name] = str(e)
+                continue
+            tables[name] = {"file": f"{name}.arrow", "rows": int(len(df)), "columns": [str(c) for c in df.columns]}
+        manifest = {
+            "format": SHARED_FORMAT,
+            "settings": settings,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "tables": tables,
+            "skipped": skipped,
+        }
+        with open(tmp / MANIFEST_NAME, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, out_dir)
+    except OSError:
+        # 같은 버전을 다른 프로세스가 먼저 옮겨 놓은 경우 (또는 쓰기 불가) → 그쪽 파일을 쓴다
+        shutil.rmtree(tmp, ignore_errors=True)
+        return None
+    return manifest
+
+
+def read_manifest(out_dir: Union[str, Path], settings: dict) -> Optional[dict]:
+    """형식 번호와 로더 설정이 모두 현재와 같은 manifest만 반환."""
+    path = Path(out_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != SHARED_FORMAT or manifest.get("settings") != settings:
+        return None
+    return manifest
+
+
+def open_tables(out_dir: Union[str, Path], settings: dict,
+                ms: Optional[Dict[str, float]] = None) -> Dict[str, "pa.Table"]:
+    """
+    manifest에 있는 표를 memory-map으로 연다 (Arrow 표 그대로, 아직 pandas로 바꾸지 않음).
+    ms가 있으면 표별 소요 ms를 채운다.
+    """
+    manifest = read_manifest(out_dir, settings) if ipc is not None else None
+    if manifest is None:
+        return {}
+    out_dir = Path(out_dir)
+    tables = {}
+    for name, meta in manifest["tables"].items():
+        t0 = time.perf_counter()
+        try:
+            source = pa.memory_map(str(out_dir / meta["file"]), "r")
+            tables[name] = ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            continue
+        if ms is not None:
+            ms[name] = (time.perf_counter() - t0) * 1000.0
+    return tables
+
+
+def _to_frame(table: "pa.Table") -> pd.DataFrame:
+    """
+    매핑한 Arrow 표(또는 그 일부 컬럼) → DataFrame. 결측 없는 숫자 컬럼과 범주형 코드는 매핑된 페이지를
+    그대로 가리키므로(split_blocks, 읽기 전용) 같은 호스트의 프로세스들이 물리 메모리를 나눠 쓴다.
+    문자열(object) 컬럼은 프로세스마다 파이썬 객체로 만들어진다.
+    """
+    return snapshot.to_frame(table)
+
+
+def map_tables(out_dir: Union[str, Path], settings: dict,
+               ms: Optional[Dict[str, float]] = None) -> Dict[str, pd.DataFrame]:
+    """open_tables + 모든 컬럼을 DataFrame으로 (전체 표가 필요한 경우)."""
+    return {name: _to_frame(table) for name, table in open_tables(out_dir, settings, ms).items()}
+
+
+def prune(root: Union[str, Path], keep: str, versions: int = KEEP_VERSIONS) -> None:
+    """keep과 최근 versions개를 빼고 옛 버전 디렉터리를 지운다 (매핑 중인 파일은 OS가 닫힐 때까지 유지)."""
+    root = Path(root)
+    if not root.exists():
+        return
+    dirs = sorted((p for p in root.iterdir() if p.is_dir() and p.name != keep and ".tmp-" not in p.name),
+                  key=lambda p: p.stat().st_mtime, reverse=True)
+    for p in dirs[max(versions - 1, 0):]:
+        shutil.rmtree(p, ignore_errors=True)
+
+
+# ---------- 프로세스 공유 인스턴스 ----------
+
+# view가 늘 보이는 식별 컬럼 (prepare_frame이 만든 '코드' / 코드가 없는 표의 표시 컬럼 포함)
+_KEYS = frozenset(KEY_COLUMNS) | {"코드", "__NO_CODE__"}
+
+
+def _key_columns(columns: Sequence[str]) -> List[str]:
+    return [c for c in columns if c in _KEYS]
+
+
+class SharedTables:
+    """
+    데이터 버전 하나의 표준화·코드 인덱스된 표 묶음. 프로세스에 버전당 하나만 두고(open_shared)
+    페이지/세션/API는 view로 컬럼만 골라 보므로 메모리는 세션 수가 아니라 데이터 버전 수에 비례한다.
+    공유 파일에서 매핑한 표는 식별 컬럼만 먼저 pandas로 만들고, 나머지 컬럼은 어떤 view가 처음 요청할 때
+    만들어 이후 모든 view가 같이 쓴다 (페이지 프로젝션에 없는 컬럼은 끝까지 만들지 않는다).
+    반환하는 프레임은 공유 객체라 읽기 전용으로 쓴다 (매핑된 숫자 컬럼은 실제로 쓰기 불가).
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], version: Tuple, timings: dict,
+                 path: Optional[Path] = None, tables: Optional[Dict[str, "pa.Table"]] = None):
+        # frames: 메모리에 전부 올린 표, tables: 공유 파일에서 매핑한 Arrow 표 (컬럼은 요청될 때 변환)
+        self.version = version
+        self.timings = timings
+        self.path = path
+        self._tables = dict(tables or {})
+        self._lock = threading.Lock()
+        self._index = DistrictIndex(frames)
+        for name, table in self._tables.items():
+            self._index.add(name, _to_frame(table.select(_key_columns(table.column_names))))
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        return self.index[name]
+
+    @property
+    def index(self) -> DistrictIndex:
+        """모든 표의 모든 컬럼 (API/내보내기처럼 전체가 필요한 곳용)."""
+        self._materialize({name: None for name in self._tables})
+        return self._index
+
+    def columns(self, name: str) -> List[str]:
+        table = self._tables.get(name)
+        return list(table.column_names) if table is not None else [str(c) for c in self._index[name].columns]
+
+    def rows(self, name: str) -> int:
+        table = self._tables.get(name)
+        return table.num_rows if table is not None else len(self._index[name])
+
+    def projection(self, name: str, usecols: Optional[Sequence[str]] = None) -> Optional[Tuple[str, ...]]:
+        """요청 컬럼 + 식별 컬럼(코드/지역명/시도) → 실제로 보일 컬럼 (None = 전체). LazyTable.projection과 같은 규칙."""
+        if usecols is None or name not in self:
+            return None
+        wanted = set(usecols)
+        return tuple(c for c in self.columns(name) if c in wanted or c in _KEYS)
+
+    def _materialize(self, projections: Dict[str, Optional[Sequence[str]]]) -> None:
+        """매핑한 표에서 아직 pandas로 만들지 않은 요청 컬럼만 변환해 공유 프레임에 붙인다."""
+        with self._lock:
+            for name, cols in projections.items():
+                table = self._tables.get(name)
+                if table is None:
+                    continue
+                have = self._index[name]
+                wanted = self.columns(name) if cols is None else cols
+                missing = [c for c in wanted if c not in have.columns]
+                if not missing:
+                    continue
+                added = _to_frame(table.select(missing))
+                merged = {c: have[c] if c in have.columns else added[c]
+                          for c in self.columns(name) if c in have.columns or c in added.columns}
+                self._index.replace_columns(name, pd.DataFrame(merged, copy=False))
+
+    def view(self, projections: Dict[str, Optional[Sequence[str]]]) -> DistrictIndex:
+        """페이지 프로젝션 {데이터셋: 컬럼(None=전체)} → 데이터를 공유하는 DistrictIndex."""
+        cols = {name: self.projection(name, usecols) for name, usecols in projections.items()}
+        self._materialize(cols)
+        return self._index.view(cols)
+
+    def page_timings(self, projections: Dict[str, Optional[Sequence[str]]]) -> dict:
+        """load_tables_timed와 같은 모양의 로드 시간표 (공유 인스턴스를 만들 때 잰 값)."""
+        files = {}
+        for name, cols in projections.items():
+            if name not in self:
+                continue
+            info = dict(self.timings["files"].get(name, {}))
+            cols = self.projection(name, cols)
+            info.update(rows=self.rows(name), cols=len(cols) if cols is not None else len(self.columns(name)))
+            files[name] = info
+        return {"files": files, "wall_ms": self.timings["wall_ms"], "workers": self.timings["workers"]}
+
+    def memory(self) -> pd.DataFrame:
+        """지금까지 pandas로 만든 컬럼 기준 표별 메모리."""
+        from memory import frame_memory
+        return frame_memory(self._index.frames)
+
+
+def _build(data_dir: Path, version: Tuple, use_files: bool,
+           max_workers: Optional[int] = DEFAULT_MAX_WORKERS) -> SharedTables:
+    """
+    같은 버전의 공유 파일이 있으면 매핑만 하고, 없으면 로더로 읽어(신선한 스냅샷 우선, 스레드 풀 동시 로드)
+    파일로 남긴 뒤 다시 매핑한다 (그래야 이 프로세스도 파일 페이지를 쓰고, 방금 읽은 사본은 버려진다).
+    """
+    t0 = time.perf_counter()
+    root = shared_root(data_dir)
+    settings = loader_settings()
+    out_dir = root / version_key(version, settings)
+    files_ok = use_files and available()
+    map_ms: Dict[str, float] = {}
+    tables = open_tables(out_dir, settings, map_ms) if files_ok else {}
+    files = {name: {"source": "shared", "ms": map_ms[name]} for name in tables}
+
+    handles = {name: h for name, h in lazy_tables(data_dir).items() if name not in tables}
+    frames: Dict[str, pd.DataFrame] = {}
+    workers = 0
+    if handles:
+        _schema_registry(data_dir)  # 스레드마다 중복 생성 방지
+        sources = {name: _source(h) for name, h in handles.items()}
+        loaded, load_ms = run_timed({name: (lambda h=h: _load_uncached(h)) for name, h in handles.items()},
+                                    max_workers)
+        workers = min(len(handles), max_workers or 1)
+        files.update({name: {"source": sources[name], "ms": load_ms[name]} for name in handles})
+        frames = {name: prepare_frame(df)[0] for name, df in loaded.items()}  # 표준화·코드 정렬 (파일에 쓰는 모양)
+        if files_ok:
+            try:
+                write_tables(frames, out_dir, settings)
+                prune(root, keep=out_dir.name)
+            except OSError:
+                pass  # 읽기 전용 data/ 등: 프로세스 안 공유만
+            mapped = open_tables(out_dir, settings, map_ms)
+            for name in handles:
+                if name in mapped:
+                    tables[name] = mapped[name]
+                    del frames[name]
+                    files[name]["source"] += "→shared"
+                    files[name]["ms"] += map_ms[name]
+
+    store = SharedTables(frames, version, {}, out_dir if files_ok else None, tables)
+    for name, info in files.items():
+        info["rows"] = store.rows(name)
+    store.timings = {"files": files, "wall_ms": (time.perf_counter() - t0) * 1000.0, "workers": workers}
+    return store
+
+
+def _source(handle: LazyTable) -> str:
+    """_load_uncached가 읽을 곳: snapshot / csv."""
+    fresh = snapshot.is_fresh(snapshot.snapshot_dir(handle.data_dir), handle.name, handle.path, loader_settings(),
+                              handle.schema_path)
+    return "snapshot" if fresh else "csv"
+
+
+def _load_uncached(handle: LazyTable) -> pd.DataFrame:
+    # 로더 캐시를 거치지 않아야 공유 인스턴스 밖에 같은 표가 한 벌 더 남지 않는다
+    df = snapshot.read_fresh_table(snapshot.snapshot_dir(handle.data_dir), handle.name, handle.path,
+                                   loader_settings(), handle.schema_path)
+    if df is None:
+        df = handle.loader.uncached(handle.data_dir)
+    return df if df is not None else pd.DataFrame()
+
+
+@timed()
+def open_shared(data_dir: Union[str, Path], use_files: bool = True) -> SharedTables:
+    """data_dir의 현재 버전 공유 인스턴스 (프로세스 전역 CACHE, 버전이 바뀌면 교체)."""
+    data_dir = Path(data_dir)
+    version = data_version(data_dir)
+    return CACHE.get_or_load(("shared_tables", str(data_dir), use_files), (version, sorted(loader_settings().items())),
+                             lambda: _build(data_dir, version, use_files))
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    사용법: python shared.py [DATA_DIR]
+    DATA_DIR 현재 버전의 공유 파일(DATA_DIR/.shared/<버전>/)을 만들고(이미 있으면 매핑만) 표별 출처와 크기를 출력한다.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+    tables = open_shared(data_dir)
+    print(f"shared: {tables.path or '(파일 없음: 프로세스 안에서만 공유)'} · {tables.timings['wall_ms']:.1f} ms")
+    tables.index  # 크기는 전체 컬럼 기준
+    mem = tables.memory()
+    for name, info in tables.timings["files"].items():
+        print(f"  {name:<14} {info['source']:<15} {int(mem.loc[name, 'rows']):>8} rows {mem.loc[name, 'MB']:>8.2f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE
+from district_index import _canon_code
+from instrument import timed
+from metrics import LABELS, trend_long
+from tensor import election_order
+
+DEFAULT_DRAWS = 100_000
+# 한 번에 뽑는 시나리오 수. 지역구 × CHUNK × 계열 float32 배열 몇 개가 메모리 상한을 정한다 (전국 ~20MB씩)
+CHUNK = 4_096
+# 지역구 스윙 공분산을 전체(풀링) 공분산 쪽으로 당기는 가상 관측 수. 선거가 적은 지역구일수록 전체 값에 가깝다.
+PRIOR_WEIGHT = 3.0
+# 당선을 다투는 계열 (기타는 여러 정당의 합이라 '1위'로 치지 않는다)
+CONTENDERS = ["민주", "보수", "진보"]
+QUANTILES = (5.0, 50.0, 95.0)
+
+
+# ---------- 입력: 지역구 × 선거 × 계열 득표율 ----------
+
+class BlocShares:
+    """지역구 × 선거 × 계열 득표율(%) 배열 values[d, e, l] (없는 칸은 NaN). 선거는 시간 순."""
+
+    def __init__(self, codes: np.ndarray, elections: Sequence[str], labels: Sequence[str], values: np.ndarray):
+        self.codes = np.asarray(codes, dtype=object)
+        self.elections = list(elections)
+        self.labels = list(labels)
+        # 주요 계열이 모두 0인 선거(원자료에 그 선거가 빠져 '기타'만 100으로 남은 칸)는 관측 없음으로 본다
+        ci = [self.labels.index(c) for c in CONTENDERS if c in self.labels]
+        values = np.array(values, dtype=float)
+        if ci and values.size:
+            values[np.nan_to_num(values[:, :, ci]).sum(axis=2) <= 0.0] = np.nan
+        self.values = values
+
+    @classmethod
+    def from_trend(cls, df_trend: pd.DataFrame) -> "BlocShares":
+        """vote_trend(지역구 단위 계열 득표율)에서."""
+        long = trend_long(df_trend)
+        if long.empty:
+            return cls(np.array([], dtype=object), [], LABELS, np.zeros((0, 0, len(LABELS))))
+        wide = long.pivot_table(index="코드", columns=["election", "label"], values="prop", aggfunc="sum")
+        elections = election_order(wide.columns.get_level_values("election").unique())
+        wide = wide.reindex(columns=pd.MultiIndex.from_product([elections, LABELS]))
+        values = wide.to_numpy(dtype=float).reshape(len(wide), len(elections), len(LABELS))
+        return cls(wide.index.to_numpy(), elections, LABELS, values)
+
+    @classmethod
+    def from_tensor(cls, vt) -> "BlocShares":
+        """행정동 원자료 텐서(tensor.VoteTensor)의 지역구 합에서."""
+        return cls(vt.district_codes, list(vt.elections), vt.labels, vt.shares("district"))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def baseline(self) -> np.ndarray:
+        """지역구별 가장 최근 관측 선거의 득표율 [D, L] (계열 결측은 0)."""
+        observed = ~np.isnan(self.values).all(axis=2)  # [D, E]
+        last = np.where(observed.any(axis=1), observed.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1), 0)
+        base = self.values[np.arange(len(self.codes)), last] if len(self.codes) else np.zeros((0, len(self.labels)))
+        return np.nan_to_num(base)
+
+    def swings(self) -> np.ndarray:
+        """연속한 두 선거 간 득표율 변화(%p) [D, E-1, L]. 어느 한쪽이 없으면 NaN."""
+        return np.diff(self.values, axis=1)
+
+
+# ---------- 스윙 분포 ----------
+
+def _sqrtm(cov: np.ndarray) -> np.ndarray:
+    """대칭 양의 준정부호 행렬(들)의 A (A @ A.T = cov). 계열 합이 100이라 특이에 가까워 촐레스키 대신 고윳값 분해."""
+    w, v = np.linalg.eigh(cov)
+    return v * np.sqrt(np.clip(w, 0.0, None))[..., None, :]
+
+
+def swing_model(shares: BlocShares, prior_weight: float = PRIOR_WEIGHT) -> Dict[str, np.ndarray]:
+    """
+    선거 간 스윙을 전국 공통 성분과 지역구 고유 성분으로 나눠 공분산을 추정.
+    - 전국 스윙: 선거 쌍마다 지역구 평균 스윙 → 그 선거 쌍들 사이의 계열 공분산 nat [L, L]
+    - 지역 스윙: 지역구 스윙 − 전국 스윙 → 지역구별 공분산을 풀링 공분산 쪽으로 수축 local [D, L, L]
+    반환: {"national": A_nat [L, L], "local": A_loc [D, L, L], "steps": 지역구별 관측 스윙 수 [D]}
+    (A는 공분산의 제곱근. 표본 z ~ N(0, I)에 곱하면 해당 공분산의 스윙이 된다.)
+    """
+    d = shares.swings()
+    n_labels = len(shares.labels)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 관측 없는 선거 쌍
+        national = np.nanmean(d, axis=0)  # [E-1, L]
+    ok_nat = np.isfinite(national).all(axis=1)
+    nat_cov = np.cov(national[ok_nat], rowvar=False) if ok_nat.sum() >= 2 else np.zeros((n_labels, n_labels))
+
+    resid = d - national[None]
+    ok = np.isfinite(resid).all(axis=2)  # [D, E-1]
+    r = np.where(ok[..., None], resid, 0.0)
+    steps = ok.sum(axis=1)
+    scatter = np.einsum("dei,dej->dij", r, r)  # 지역구별 Σ r rᵀ (평균 스윙 0 가정)
+    pooled = scatter.sum(axis=0) / max(int(steps.sum()), 1)
+    local = (scatter + prior_weight * pooled) / (steps + prior_weight)[:, None, None]
+    return {"national": _sqrtm(nat_cov), "local": _sqrtm(local), "steps": steps}
+
+
+# ---------- 시뮬레이션 ----------
+
+class SimulationResult:
+    """지역구별 계열 승리 확률과 득표율 분위수."""
+
+    def __init__(self, codes: np.ndarray, labels: List[str], contenders: List[str], leader: np.ndarray,
+                 p_win: np.ndarray, quantiles: np.ndarray, draws: int, seconds: float):
+        self.codes = codes
+        self.labels = labels
+        self.contenders = contenders
+        self.leader = leader          # [D] 최근 선거 1위 계열 (contenders 위치)
+        self.p_win = p_win            # [D, C]
+        self.quantiles = quantiles    # [D, L, len(QUANTILES)]
+        self.draws = draws
+        self.seconds = seconds
+        self._pos = {c: i for i, c in enumerate(codes)}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def flip(self) -> np.ndarray:
+        """최근 1위 계열이 지는 확률 [D]."""
+        return 1.0 - self.p_win[np.arange(len(self.codes)), self.leader]
+
+    def table(self) -> pd.DataFrame:
+        """일괄 표 (index=표준 코드): 최근 1위, 계열별 승리확률(%), 뒤집힐 확률(%), 계열별 p5/p50/p95 득표율."""
+        out = pd.DataFrame(index=pd.Index(self.codes, name="코드"))
+        out["최근 1위"] = np.asarray(self.contenders, dtype=object)[self.leader] if len(self.codes) else []
+        for j, c in enumerate(self.contenders):
+            out[f"{c} 승리확률(%)"] = self.p_win[:, j] * 100.0
+        out["뒤집힐 확률(%)"] = self.flip * 100.0
+        for i, lab in enumerate(self.labels):
+            for k, q in enumerate(QUANTILES):
+                out[f"{lab} p{q:g}"] = self.quantiles[:, i, k]
+        return out
+
+    def district(self, code: Hashable) -> Optional[dict]:
+        """지역구 하나: {leader, flip, p_win: {계열: 확률}, intervals: DataFrame[계열 × 분위수]}. 없으면 None."""
+        i = self._pos.get(_canon_code(code))
+        if i is None:
+            return None
+        return {
+            "leader": self.contenders[self.leader[i]],
+            "flip": float(self.flip[i]),
+            "p_win": dict(zip(self.contenders, self.p_win[i].tolist())),
+            "intervals": pd.DataFrame(self.quantiles[i], index=pd.Index(self.labels, name="계열"),
+                                      columns=[f"p{q:g}" for q in QUANTILES]),
+        }
+
+
+@timed()
+def simulate(shares: BlocShares, draws: int = DEFAULT_DRAWS, seed: int = 0,
+             contenders: Sequence[str] = CONTENDERS, chunk: int = CHUNK) -> SimulationResult:
+    """
+    모든 지역구를 한 번에: 시나리오마다 전국 스윙 하나(모든 지역구 공통) + 지역구별 스윙을 뽑아
+    최근 득표율에 더하고, 지역구마다 1위 계열 횟수를 센다. chunk개 시나리오씩 [D, chunk, C] 배열로
+    처리하므로 메모리는 draws와 무관하다.
+    득표율 구간은 같은 모형의 주변분포(정규, 0~100 클리핑은 단조라 분위수가 그대로 옮겨감)에서 바로 계산한다.
+    """
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    keep = ~np.isnan(shares.values).all(axis=(1, 2))
+    codes = shares.codes[keep]
+    sub = BlocShares(codes, shares.elections, shares.labels, shares.values[keep])
+    base = sub.baseline()  # [D, L]
+    model = swing_model(sub)
+    ci = [sub.labels.index(c) for c in contenders if c in sub.labels]
+    n_d, n_c = len(codes), len(ci)
+
+    # 1위 판정에는 다투는 계열 열만 필요하고, 계열 합이 100이라 스윙 공분산의 계수는 L-1 이하:
+    # 고윳값이 0인 방향은 난수를 뽑지 않는다
+    a_nat = model["national"][ci].T.astype(np.float32)                      # [L, C]
+    a_loc = np.swapaxes(model["local"], 1, 2)[:, :, ci]                     # [D, L, C]
+    scale = np.abs(a_loc).max(axis=(0, 2)) if n_d else np.zeros(0)
+    a_loc = a_loc[:, scale > 1e-4 * max(float(scale.max(initial=0.0)), 1e-12), :].astype(np.float32)
+    base_c = base[:, None, ci].astype(np.float32)                            # [D, 1, C]
+
+    wins = np.zeros((n_d, n_c), dtype=np.int64)
+    for start in range(0, draws if n_d and n_c else 0, chunk):
+        n = min(chunk, draws - start)
+        x = rng.standard_normal((n_d, n, a_loc.shape[1]), dtype=np.float32) @ a_loc          # [D, n, C] 지역
+        x += rng.standard_normal((n, a_nat.shape[0]), dtype=np.float32) @ a_nat              # [n, C] 전국 공통
+        x += base_c
+        # 1위 계열: 짧은 축 argmax보다 계열별 비교가 훨씬 빠르다 (동률은 앞 계열)
+        best = x[:, :, 0].copy()
+        winner = np.zeros((n_d, n), dtype=np.int8)
+        for j in range(1, n_c):
+            better = x[:, :, j] > best
+            winner[better] = j
+            np.maximum(best, x[:, :, j], out=best)
+        for j in range(n_c):
+            wins[:, j] += np.count_nonzero(winner == j, axis=1)
+
+    sd = np.sqrt(np.einsum("ij,ij->i", model["national"], model["national"])[None, :]
+                 + np.einsum("dij,dij->di", model["local"], model["local"]))       # [D, L]
+    z = np.array([NormalDist().inv_cdf(q / 100.0) for q in QUANTILES])
+    quantiles = np.clip(base[:, :, None] + sd[:, :, None] * z, 0.0, 100.0)      # [D, L, Q]
+    p_win = wins / max(draws, 1)
+    leader = np.argmax(base[:, ci], axis=1) if n_d else np.zeros(0, dtype=int)
+    return SimulationResult(codes, sub.labels, [sub.labels[i] for i in ci], leader, p_win, quantiles,
+                            draws, time.perf_counter() - t0)
+
+
+def win_probabilities(df_trend: pd.DataFrame, draws: int = DEFAULT_DRAWS, seed: int = 0) -> SimulationResult:
+    """vote_trend 기준 시뮬레이션. 입력 프레임 객체(id) + draws/seed 단위로 캐시 (ranking_model과 같은 방식)."""
+    version = (id(df_trend), int(draws), int(seed))
+    return CACHE.get_or_load("win_probabilities", version, lambda: (
+        df_trend, simulate(BlocShares.from_trend(df_trend), draws, seed)
+    ))[1]
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    사용법: python simulation.py [--data-dir data] [--source trend|dong] [--draws 100000] [--seed 0] [--out 결과.csv]
+    전 지역구 승리 확률/득표율 구간을 계산해 뒤집힐 확률 순으로 출력한다.
+    """
+    parser = argparse.ArgumentParser(description="지역구별 승리 확률 몬테카를로 시뮬레이션")
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--source", choices=["trend", "dong"], default="trend",
+                        help="trend: vote_trend.csv / dong: 행정동 원자료 합")
+    parser.add_argument("--draws", type=int, default=DEFAULT_DRAWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=20, help="출력할 행 수")
+    parser.add_argument("--out", type=Path, help="전체 표 CSV 경로")
+    args = parser.parse_args(argv)
+
+    if args.source == "dong":
+        from tensor import load_vote_tensor
+        shares = BlocShares.from_tensor(load_vote_tensor(args.data_dir))
+    else:
+        from data_loader import load_vote_trend
+        shares = BlocShares.from_trend(load_vote_trend(args.data_dir))
+    result = simulate(shares, args.draws, args.seed)
+    print(f"{len(result)} districts × {result.draws:,} draws · {result.seconds:.2f} s")
+    table = result.table().sort_values("뒤집힐 확률(%)", ascending=False)
+    with pd.option_context("display.width", 200, "display.max_columns", 30):
+        print(table.head(args.top).round(1).to_string())
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        table.to_csv(args.out, encoding="utf-8-sig")
+        print(f"results: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
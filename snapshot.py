@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from data_cache import file_fingerprint
+
+# Arrow(Feather v2)가 없으면 스냅샷 기능만 꺼지고 CSV 경로는 그대로 동작
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except Exception:
+    pa = None
+    feather = None
+
+SNAPSHOT_DIRNAME = ".snapshot"
+MANIFEST_NAME = "manifest.json"
+# 로더 후처리(컬럼 정리/타입) 규칙이 바뀌면 올려서 기존 스냅샷을 무효화
+SNAPSHOT_FORMAT = 4
+# 모든 테이블의 컬럼 타입을 정하는 스키마 원본 (sources의 이 항목이 바뀌면 전 테이블이 오래된 것)
+SCHEMA_SOURCE = "bookmark"
+
+
+def snapshot_dir(data_dir: Union[str, Path]) -> Path:
+    return Path(data_dir) / SNAPSHOT_DIRNAME
+
+
+def available() -> bool:
+    return feather is not None
+
+
+# ---------- Write ----------
+
+def write_snapshot(frames: Dict[str, pd.DataFrame],
+                   sources: Dict[str, Optional[Path]],
+                   out_dir: Union[str, Path],
+                   settings: dict) -> dict:
+    """
+    로더 결과 프레임을 테이블별 무압축 Feather 파일로 저장하고 manifest를 쓴다.
+    settings(data_loader.loader_settings: COMPACT 등 로더 결과 모양을 바꾸는 설정)도 manifest에 남겨,
+    읽을 때 현재 설정과 다르면 스냅샷 전체를 오래된 것으로 본다.
+    테이블마다 자기 CSV 지문과 함께 스키마(bookmark.csv) 지문도 남겨, 스키마만 바뀌어도 다시 읽게 한다.
+    무압축이어야 읽을 때 memory-map으로 바로 매핑된다.
+    Arrow로 변환할 수 없는 테이블은 manifest에서 빠지고, 읽을 때 CSV로 처리된다.
+    파일 이름에 원본 지문을 넣고 임시 파일 → os.replace로 쓰며 manifest는 마지막에 교체하므로,
+    컴파일 도중이거나 중단돼도 읽는 쪽은 늘 manifest와 맞는 파일 묶음(이전 것 또는 새 것)만 본다.
+    """
+    if feather is None:
+        raise RuntimeError("pyarrow가 없어 스냅샷을 만들 수 없습니다.")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tables = {}
+    skipped = {}
+    schema_digest = _digest(sources.get(SCHEMA_SOURCE))
+    for name, df in frames.items():
+        src = sources.get(name)
+        fp = file_fingerprint(src) if src is not None else None
+        if fp is None or df is None or df.empty:
+            continue
+        target = out_dir / f"{name}-{fp.digest[:16]}.feather"
+        tmp = target.with_suffix(".feather.tmp")
+        try:
+            feather.write_feather(df.reset_index(drop=True), tmp, compression="uncompressed")
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            tmp.unlink(missing_ok=True)
+            skipped[name] = str(e)
+            continue
+        os.replace(tmp, target)
+        tables[name] = {
+            "file": target.name,
+            "source": fp.path,
+            "source_digest": fp.digest,
+            "schema_digest": schema_digest,
+            "rows": int(len(df)),
+            "columns": [str(c) for c in df.columns],
+        }
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "settings": settings,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tables": tables,
+        "skipped": skipped,
+    }
+    tmp = out_dir / f"{MANIFEST_NAME}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+    # 새 manifest가 가리키지 않는 옛 파일 정리 (이미 매핑 중인 파일은 OS가 닫힐 때까지 유지)
+    keep = {meta["file"] for meta in tables.values()}
+    for old in out_dir.glob("*.feather"):
+        if old.name not in keep:
+            old.unlink(missing_ok=True)
+    return manifest
+
+
+# ---------- Read ----------
+
+def read_manifest(out_dir: Union[str, Path], settings: dict) -> Optional[dict]:
+    """형식 번호와 로더 설정이 모두 현재와 같은 manifest만 반환 (아니면 None = 스냅샷 없음)."""
+    path = Path(out_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("settings") != settings:
+        return None
+    return manifest
+
+
+def _digest(path: Optional[Path]) -> Optional[str]:
+    fp = file_fingerprint(path) if path is not None else None
+    return fp.digest if fp is not None else None
+
+
+def _fresh_meta(manifest: dict, name: str, source: Optional[Path],
+                schema_source: Optional[Path]) -> Optional[dict]:
+    """원본 CSV와 스키마 파일 지문이 모두 manifest 항목과 같으면 그 항목, 아니면 None."""
+    meta = manifest.get("tables", {}).get(name)
+    fp = file_fingerprint(source) if source is not None else None
+    if meta is None or fp is None or fp.path != meta.get("source") or fp.digest != meta.get("source_digest"):
+        return None
+    if _digest(schema_source) != meta.get("schema_digest"):
+        return None
+    return meta
+
+
+def to_frame(table: "pa.Table", self_destruct: bool = False) -> pd.DataFrame:
+    """
+    매핑한 Arrow 표 → DataFrame. split_blocks로 컬럼마다 따로 변환해 결측 없는 숫자/범주 코드는
+    매핑된 페이지를 그대로(읽기 전용) 가리키고, 문자열 컬럼만 파이썬 객체로 복사된다.
+    self_destruct면 변환한 Arrow 버퍼를 바로 놓는다 (이후 table은 쓸 수 없음).
+    """
+    df = table.to_pandas(split_blocks=True, self_destruct=self_destruct)
+    # Arrow의 문자열 결측은 None으로 나온다 → CSV 로더와 같은 NaN으로 (astype(str) 결과가 달라지지 않게)
+    for c in df.columns:
+        if df[c].dtype == object and df[c].isna().any():
+            df[c] = df[c].where(df[c].notna(), np.nan)
+    return df
+
+
+def _read_feather(out_dir: Path, meta: dict, columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+    if columns is not None:
+        columns = [c for c in meta.get("columns", []) if c in set(columns)]
+    try:
+        table = feather.read_table(out_dir / meta["file"], columns=columns, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return to_frame(table, self_destruct=True)
+
+
+def read_fresh_tables(out_dir: Union[str, Path],
+                      sources: Dict[str, Optional[Path]],
+                      settings: dict) -> Dict[str, pd.DataFrame]:
+    """
+    원본 CSV와 스키마(sources[SCHEMA_SOURCE]) 지문이 manifest와 같은(=신선한) 테이블만 memory-map으로 읽어 반환.
+    오래된/없는 테이블은 결과에서 빠지므로 호출측이 CSV로 읽으면 된다.
+    """
+    if feather is None:
+        return {}
+    manifest = read_manifest(out_dir, settings)
+    if manifest is None:
+        return {}
+    out_dir = Path(out_dir)
+    fresh = {}
+    for name in manifest.get("tables", {}):
+        meta = _fresh_meta(manifest, name, sources.get(name), sources.get(SCHEMA_SOURCE))
+        df = _read_feather(out_dir, meta) if meta is not None else None
+        if df is not None:
+            fresh[name] = df
+    return fresh
+
+
+def is_fresh(out_dir: Union[str, Path], name: str, source: Optional[Path], settings: dict,
+             schema_source: Optional[Path]) -> bool:
+    """테이블 스냅샷이 있고 원본/스키마 지문과 같은지 (읽지는 않음)."""
+    if feather is None:
+        return False
+    manifest = read_manifest(out_dir, settings)
+    return manifest is not None and _fresh_meta(manifest, name, source, schema_source) is not None
+
+
+def read_fresh_table(out_dir: Union[str, Path], name: str, source: Optional[Path], settings: dict,
+                     schema_source: Optional[Path],
+                     columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    테이블 하나만, columns가 있으면 그 컬럼만 읽는다 (Feather는 컬럼 단위로 매핑되므로 나머지는 건드리지 않음).
+    신선하지 않거나 없으면 None.
+    """
+    if feather is None:
+        return None
+    manifest = read_manifest(out_dir, settings)
+    meta = _fresh_meta(manifest, name, source, schema_source) if manifest is not None else None
+    return _read_feather(Path(out_dir), meta, columns) if meta is not None else None
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """
+    사용법: python snapshot.py [DATA_DIR]
+    DATA_DIR의 CSV를 읽어 DATA_DIR/.snapshot 에 Feather + manifest로 컴파일하고,
+    CSV 경로 대비 로드 시간을 출력한다.
+    """
+    from data_loader import DATA_FILES, compile_snapshot, load_all_uncached
+
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+
+    manifest = compile_snapshot(data_dir)
+    print(f"snapshot: {snapshot_dir(data_dir)} ({len(manifest['tables'])}/{len(DATA_FILES)} tables)")
+    for name, reason in manifest["skipped"].items():
+        print(f"  skipped {name}: {reason}")
+
+    t0 = time.perf_counter()
+    load_all_uncached(data_dir, use_snapshot=False)
+    t1 = time.perf_counter()
+    load_all_uncached(data_dir, use_snapshot=True)
+    t2 = time.perf_counter()
+    print(f"csv: {(t1 - t0) * 1000:.1f} ms / snapshot: {(t2 - t1) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
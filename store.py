@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from data_cache import content_version, file_fingerprint
+from data_loader import _source_paths, load_party_labels, load_population_agg, load_results_2024
+from district_index import canon_codes, ensure_code_col
+from ingest import DEFAULT_LABEL, ID_COLS, build_label_map, election_tallies, list_election_files, melt_election_file
+from instrument import timed
+
+# 원자료/표를 담는 로컬 SQLite 파일 (data_dir/.store/archive.sqlite, 재생성 가능하므로 git 제외)
+STORE_DIRNAME = ".store"
+STORE_NAME = "archive.sqlite"
+# 테이블 구조가 바뀌면 올려서 기존 파일을 새로 만든다
+STORE_FORMAT = 1
+
+# 원자료 외에 같이 넣는 표: 로더 이름 → 로더
+SIDE_TABLES = {
+    "population": load_population_agg,
+    "results_2024": load_results_2024,
+    "party_labels": load_party_labels,
+}
+
+VOTE_COLS = ID_COLS + ["election", "file", "party", "column", "votes"]
+TALLY_COLS = ID_COLS + ["election", "file", "선거인수", "투표수", "계", "무효투표수", "기권수"]
+# query_votes/query_tallies의 필터 인자 → 컬럼
+FILTERS = {"sido": "시/도", "district": "지역구코드", "dong": "행정동코드", "election": "election", "file": "file"}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, path TEXT, digest TEXT, rows INTEGER, synced TEXT);
+CREATE TABLE IF NOT EXISTS dong_votes ({", ".join(f'"{c}" {"REAL" if c == "votes" else "TEXT"}' for c in VOTE_COLS)});
+CREATE TABLE IF NOT EXISTS dong_tallies ({", ".join(f'"{c}" {"TEXT" if c in ID_COLS + ["election", "file"] else "REAL"}' for c in TALLY_COLS)});
+CREATE TABLE IF NOT EXISTS party_map (election TEXT, party TEXT, label TEXT, PRIMARY KEY (election, party));
+CREATE INDEX IF NOT EXISTS ix_dong_votes_district ON dong_votes ("지역구코드", election);
+CREATE INDEX IF NOT EXISTS ix_dong_votes_dong ON dong_votes ("행정동코드");
+CREATE INDEX IF NOT EXISTS ix_dong_votes_file ON dong_votes (file);
+CREATE INDEX IF NOT EXISTS ix_dong_tallies_district ON dong_tallies ("지역구코드", election);
+CREATE INDEX IF NOT EXISTS ix_dong_tallies_dong ON dong_tallies ("행정동코드");
+CREATE INDEX IF NOT EXISTS ix_dong_tallies_file ON dong_tallies (file);
+"""
+
+
+def store_path(data_dir: Union[str, Path]) -> Path:
+    return Path(data_dir) / STORE_DIRNAME / STORE_NAME
+
+
+def _q(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _as_list(value) -> list:
+    if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+        return [value]
+    return list(value)
+
+
+def _where(filters: Dict[str, object], alias: str = "") -> Tuple[str, list]:
+    """{컬럼: 값 또는 목록} → ("WHERE ...", params). 지역구코드는 표준 코드로 비교."""
+    clauses, params = [], []
+    for col, value in filters.items():
+        if value is None:
+            continue
+        values = _as_list(value)
+        if col in ("지역구코드", "코드"):
+            values = canon_codes(pd.Series(values, dtype=object)).tolist()
+        clauses.append(f"{alias}{_q(col)} IN ({', '.join('?' * len(values))})")
+        params.extend(str(v) for v in values)
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+# ---------- 저장소 ----------
+
+class ArchiveStore:
+    """
+    동 단위 원자료(득표 long / 집계 컬럼) + 인구/24년 결과/라벨 표를 담은 SQLite 파일.
+    sync()는 파일 지문이 바뀐 원자료만 지우고 다시 넣는다 (원자료 하나 = file 값 하나).
+    계열(label)은 party_map과 조회 시점에 조인하므로 party_labels.csv가 바뀌어도 득표 행은 그대로다.
+    연결은 호출마다 새로 열어 스레드(Streamlit rerun) 간에 공유하지 않는다.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._sync_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return sqlite3.connect(self.path)
+
+    # ----- 동기화 -----
+    @timed("ArchiveStore.sync")
+    def sync(self, data_dir: Union[str, Path]) -> Dict[str, str]:
+        """
+        data_dir와 맞춘다. 반환: {원본 이름: "added" / "updated" / "removed"} (바뀐 것만).
+        """
+        data_dir = Path(data_dir)
+        with self._sync_lock, closing(self.connect()) as con:
+            self._ensure_schema(con)
+            known = {name: digest for name, digest in con.execute("SELECT name, digest FROM sources")}
+            changes: Dict[str, str] = {}
+
+            files = {p.stem: p for p in list_election_files(data_dir)}
+            for stem, path in files.items():
+                fp = file_fingerprint(path)
+                if known.get(stem) == fp.digest:
+                    continue
+                changes[stem] = "updated" if stem in known else "added"
+                with con:
+                    self._replace_file(con, stem, path, fp.digest)
+
+            side = {name: path for name, path in _source_paths(data_dir).items() if name in SIDE_TABLES}
+            for name, path in side.items():
+                fp = file_fingerprint(path) if path is not None else None
+                if fp is None or known.get(name) == fp.digest:
+                    continue
+                changes[name] = "updated" if name in known else "added"
+                with con:
+                    self._replace_side_table(con, name, data_dir, path, fp.digest)
+
+            for name in set(known) - set(files) - set(SIDE_TABLES):
+                changes[name] = "removed"
+                with con:
+                    for table in ("dong_votes", "dong_tallies"):
+                        con.execute(f"DELETE FROM {table} WHERE file = ?", (name,))
+                    con.execute("DELETE FROM sources WHERE name = ?", (name,))
+            return changes
+
+    def _ensure_schema(self, con: sqlite3.Connection) -> None:
+        row = None
+        try:
+            row = con.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        except sqlite3.OperationalError:
+            pass
+        if row is not None and row[0] != str(STORE_FORMAT):
+            tables = [r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            with con:
+                for t in tables:
+                    con.execute(f"DROP TABLE IF EXISTS {_q(t)}")
+        with con:
+            con.executescript(_SCHEMA)
+            con.execute("INSERT OR REPLACE INTO meta VALUES ('format', ?)", (str(STORE_FORMAT),))
+
+    def _replace_file(self, con: sqlite3.Connection, stem: str, path: Path, digest: str) -> None:
+        long = melt_election_file(path)
+        tallies = election_tallies(path)
+        for table, df, cols in (("dong_votes", long, VOTE_COLS), ("dong_tallies", tallies, TALLY_COLS)):
+            con.execute(f"DELETE FROM {table} WHERE file = ?", (stem,))
+            if df.empty:
+                continue
+            df = df.reindex(columns=cols)
+            df["지역구코드"] = canon_codes(df["지역구코드"])
+            con.executemany(
+                f"INSERT INTO {table} VALUES ({', '.join('?' * len(cols))})",
+                df.astype(object).where(df.notna(), None).itertuples(index=False, name=None),
+            )
+        con.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                    (stem, str(path), digest, int(len(long)), time.strftime("%Y-%m-%dT%H:%M:%S")))
+
+    def _replace_side_table(self, con: sqlite3.Connection, name: str, data_dir: Path,
+                            path: Path, digest: str) -> None:
+        df = SIDE_TABLES[name](data_dir)
+        if name == "party_labels":
+            labels = build_label_map(df)
+            con.execute("DELETE FROM party_map")
+            con.executemany("INSERT OR REPLACE INTO party_map VALUES (?, ?, ?)",
+                            labels[["election", "party", "label"]].astype(str).itertuples(index=False, name=None))
+        else:
+            df = ensure_code_col(df)
+            if "코드" in df.columns:
+                df = df.assign(코드=canon_codes(df["코드"]))
+        df = df.apply(lambda s: s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s)
+        df.to_sql(name, con, if_exists="replace", index=False)
+        for col in ("코드", "행정동코드"):
+            if col in df.columns:
+                con.execute(f"CREATE INDEX IF NOT EXISTS {_q(f'ix_{name}_{col}')} ON {_q(name)} ({_q(col)})")
+        con.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                    (name, str(path), digest, int(len(df)), time.strftime("%Y-%m-%dT%H:%M:%S")))
+
+    # ----- 조회 -----
+    def sql(self, query: str, params: Sequence = ()) -> pd.DataFrame:
+        """읽기 전용 SQL을 그대로 실행 (분석용)."""
+        with closing(self.connect()) as con:
+            return pd.read_sql_query(query, con, params=list(params))
+
+    @timed("ArchiveStore.votes")
+    def votes(self, by: Optional[Sequence[str]] = ("지역구코드", "election", "label"),
+              label=None, **filters) -> pd.DataFrame:
+        """
+        득표 조회. 필터(sido/district/dong/election/file)와 label은 SQL WHERE로, 합계는 GROUP BY로 처리한다.
+        by=None이면 합산하지 않은 행 (ingest.load_dong_votes와 같은 컬럼).
+        """
+        label_expr = f"COALESCE(m.label, '{DEFAULT_LABEL}')"
+        where, params = _where({FILTERS[k]: v for k, v in filters.items()}, alias="v.")
+        if label is not None:
+            labels = _as_list(label)
+            where += (" AND " if where else "WHERE ") + f"{label_expr} IN ({', '.join('?' * len(labels))})"
+            params += [str(x) for x in labels]
+        source = f"FROM dong_votes v LEFT JOIN party_map m ON m.election = v.election AND m.party = v.party {where}"
+        if by is None:
+            cols = ", ".join(f"v.{_q(c)}" for c in VOTE_COLS)
+            return self.sql(f"SELECT {cols}, {label_expr} AS label {source}", params)
+        keys = [label_expr if c == "label" else f"v.{_q(c)}" for c in by]
+        select = ", ".join(f"{k} AS {_q(c)}" for k, c in zip(keys, by))
+        return self.sql(f"SELECT {select}, SUM(v.votes) AS votes {source} GROUP BY {', '.join(keys)}", params)
+
+    @timed("ArchiveStore.tallies")
+    def tallies(self, by: Optional[Sequence[str]] = ("지역구코드", "election"), **filters) -> pd.DataFrame:
+        """선거인수/투표수/무효투표수 등 집계 컬럼 조회 (by로 합산, None이면 행 그대로)."""
+        where, params = _where({FILTERS[k]: v for k, v in filters.items()})
+        if by is None:
+            return self.sql(f"SELECT * FROM dong_tallies {where}", params)
+        measures = ", ".join(f"SUM({_q(c)}) AS {_q(c)}" for c in TALLY_COLS[len(ID_COLS) + 2:])
+        keys = ", ".join(_q(c) for c in by)
+        return self.sql(f"SELECT {keys}, {measures} FROM dong_tallies {where} GROUP BY {keys}", params)
+
+    def table(self, name: str, code=None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """population / results_2024 / party_labels 표 조회 (code는 표준 코드 비교)."""
+        if name not in SIDE_TABLES:
+            raise KeyError(f"알 수 없는 표: {name}")
+        where, params = _where({"코드": code})
+        cols = ", ".join(_q(c) for c in columns) if columns else "*"
+        return self.sql(f"SELECT {cols} FROM {_q(name)} {where}", params)
+
+    def sources(self) -> pd.DataFrame:
+        return self.sql("SELECT * FROM sources ORDER BY name")
+
+
+def store_version(data_dir: Union[str, Path]) -> Tuple:
+    """원자료 + 같이 넣는 표들의 내용 버전 (바뀌었을 때만 sync)."""
+    data_dir = Path(data_dir)
+    paths = list_election_files(data_dir) + [
+        p for name, p in _source_paths(data_dir).items() if name in SIDE_TABLES and p is not None
+    ]
+    return tuple(content_version(file_fingerprint(p)) for p in paths)
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """사용법: python store.py [DATA_DIR]  → data_dir/.store/archive.sqlite 동기화"""
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+    store = ArchiveStore(store_path(data_dir))
+    t0 = time.perf_counter()
+    changes = store.sync(data_dir)
+    print(f"store: {store.path} ({(time.perf_counter() - t0) * 1000.0:.0f} ms)")
+    for name, change in sorted(changes.items()):
+        print(f"  {change:<8} {name}")
+    if not changes:
+        print("  (변경 없음)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import warnings
+from pathlib import Path
+from typing import Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE, LRUCache, content_version, file_fingerprint, first_existing
+from data_loader import DATA_FILES, query_votes
+from district_index import _canon_code, canon_codes
+from ingest import LABEL_ORDER, list_election_files, load_dong_votes
+from instrument import timed
+
+# 같은 해 선거의 시간 순서 (2022: 대선 3월 → 지방선거 6월)
+KIND_ORDER = {"president": 0, "na_pro": 1}
+LEVELS = ("dong", "district")
+
+
+def election_order(elections: Iterable[str]) -> List[str]:
+    """'2022_president' 형식 선거 키를 연도 → 같은 해 안의 시기 순으로 정렬."""
+    def key(e: str):
+        year, _, kind = str(e).partition("_")
+        return (int(year) if year.isdigit() else 0, KIND_ORDER.get(kind, 2), kind)
+    return sorted(set(elections), key=key)
+
+
+# ---------- 텐서 ----------
+
+class VoteTensor:
+    """
+    행정동 × 선거 × 계열 득표 텐서 (votes[d, e, l]) + 행정동별 지역구/시도 조회 배열.
+    행정동은 (지역구, 행정동코드) 순으로 정렬되어 있어 지역구 d의 행정동은 연속 구간
+    [district_starts[k], district_starts[k+1]) 이고, 지역구 집계는 np.add.reduceat 한 번이다.
+    present[d, e]는 해당 선거 원자료에 그 행정동 행이 있었는지 (분동/합동으로 없을 수 있음).
+    """
+
+    def __init__(self, votes: np.ndarray, present: np.ndarray, elections: List[str], labels: List[str],
+                 dong_codes: np.ndarray, dong_names: np.ndarray, dong_district: np.ndarray, dong_sido: np.ndarray):
+        self.votes = votes
+        self.present = present
+        self.elections = np.asarray(elections, dtype=object)
+        self.years = np.array([int(str(e)[:4]) for e in elections], dtype=float)
+        self.labels = list(labels)
+        self.dong_codes = dong_codes
+        self.dong_names = dong_names
+        self.dong_district = dong_district
+        self.dong_sido = dong_sido
+
+        starts = np.flatnonzero(np.r_[True, dong_district[1:] != dong_district[:-1]]) if len(dong_district) else np.array([], int)
+        self.district_starts = starts
+        self.district_codes = dong_district[starts]
+        self.district_sido = dong_sido[starts]
+        self._district_pos = {c: i for i, c in enumerate(self.district_codes)}
+        self._district_votes = None
+
+    # ----- 모양/조회 -----
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.votes.shape
+
+    def label_index(self, label: str) -> int:
+        return self.labels.index(label)
+
+    def dongs_of(self, district_code: Hashable) -> slice:
+        """지역구 코드 → 행정동 축 구간 (없으면 빈 구간)."""
+        k = self._district_pos.get(_canon_code(district_code))
+        if k is None:
+            return slice(0, 0)
+        stop = self.district_starts[k + 1] if k + 1 < len(self.district_starts) else len(self.dong_codes)
+        return slice(int(self.district_starts[k]), int(stop))
+
+    def district_votes(self) -> np.ndarray:
+        """지역구 × 선거 × 계열 득표 (행정동 합)."""
+        if self._district_votes is None:
+            if len(self.district_starts):
+                self._district_votes = np.add.reduceat(self.votes, self.district_starts, axis=0)
+            else:
+                self._district_votes = np.zeros((0,) + self.votes.shape[1:])
+        return self._district_votes
+
+    def level_votes(self, level: str) -> np.ndarray:
+        if level not in LEVELS:
+            raise ValueError(f"level은 {LEVELS} 중 하나여야 합니다: {level}")
+        return self.votes if level == "dong" else self.district_votes()
+
+    def subset(self, kinds: Iterable[str]) -> "VoteTensor":
+        """선거 종류(president / na_pro / loc_gov / loc_pro)만 남긴 텐서 (같은 종류끼리 비교할 때)."""
+        kinds = set(kinds)
+        keep = np.array([str(e).partition("_")[2] in kinds for e in self.elections])
+        return VoteTensor(self.votes[:, keep], self.present[:, keep], list(self.elections[keep]), self.labels,
+                          self.dong_codes, self.dong_names, self.dong_district, self.dong_sido)
+
+    # ----- 지표 (모든 단위 한 번에) -----
+    def shares(self, level: str = "dong") -> np.ndarray:
+        """계열 득표율(%) [N, E, L]. 득표가 없는 (단위, 선거)는 NaN."""
+        v = self.level_votes(level)
+        total = v.sum(axis=2, keepdims=True)
+        return np.divide(v * 100.0, total, out=np.full(v.shape, np.nan), where=total > 0)
+
+    def swing(self, level: str = "dong") -> np.ndarray:
+        """연속한 두 선거 간 득표율 변화(%p) [N, E-1, L]. 어느 한쪽이 없으면 NaN."""
+        return np.diff(self.shares(level), axis=1)
+
+    def volatility(self, level: str = "dong") -> np.ndarray:
+        """선거 간 득표율 표준편차(%p) [N, L]. 관측 2개 미만은 NaN."""
+        s = self.shares(level)
+        n = np.sum(~np.isnan(s), axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            out = np.nanstd(s, axis=1)
+        return np.where(n >= 2, out, np.nan)
+
+    def trend_slope(self, level: str = "dong") -> np.ndarray:
+        """득표율의 연도 대비 최소제곱 기울기(%p/년) [N, L]. 결측 선거는 빼고 단위별로 적합."""
+        y = self.shares(level)
+        m = ~np.isnan(y)
+        x = np.broadcast_to(self.years[None, :, None], y.shape)
+        n = m.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            xbar = np.where(m, x, 0.0).sum(axis=1) / n
+            ybar = np.where(m, y, 0.0).sum(axis=1) / n
+            dx = np.where(m, x - xbar[:, None, :], 0.0)
+            dy = np.where(m, y - ybar[:, None, :], 0.0)
+            var = (dx * dx).sum(axis=1)
+            slope = (dx * dy).sum(axis=1) / var
+        return np.where((n >= 2) & (var > 0), slope, np.nan)
+
+    def summary(self, level: str = "dong", label: str = "진보") -> pd.DataFrame:
+        """단위별 요약: 최근/평균 득표율, 변동성, 추세 기울기, 최근 스윙 (한 계열)."""
+        li = self.label_index(label)
+        s = self.shares(level)[:, :, li]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean = np.nanmean(s, axis=1)
+        has = ~np.isnan(s)
+        last_i = np.where(has.any(axis=1), s.shape[1] - 1 - np.argmax(has[:, ::-1], axis=1), -1)
+        rows = np.arange(len(s))
+        last = np.where(last_i >= 0, s[rows, np.maximum(last_i, 0)], np.nan)
+        sw = self.swing(level)[:, :, li]
+        last_swing = sw[:, -1] if sw.shape[1] else np.full(len(s), np.nan)
+        if level == "dong":
+            index = pd.Index(self.dong_codes, name="행정동코드")
+            head = {"행정동": self.dong_names, "지역구코드": self.dong_district}
+        else:
+            index = pd.Index(self.district_codes, name="코드")
+            head = {"시/도": self.district_sido}
+        return pd.DataFrame({
+            **head,
+            "최근 득표율": last,
+            "평균 득표율": mean,
+            "변동성": self.volatility(level)[:, li],
+            "추세(%p/년)": self.trend_slope(level)[:, li],
+            "최근 스윙": last_swing,
+        }, index=index)
+
+    def dong_table(self, district_code: Hashable, label: str = "진보") -> pd.DataFrame:
+        """지역구 하나의 행정동별 요약 (드릴다운용)."""
+        return self.summary("dong", label).iloc[self.dongs_of(district_code)].drop(columns=["지역구코드"])
+
+    def dong_shares_long(self, district_code: Hashable, label: str = "진보") -> pd.DataFrame:
+        """지역구 하나의 [행정동, election, prop] long 표 (히트맵용)."""
+        sl = self.dongs_of(district_code)
+        s = self.shares("dong")[sl, :, self.label_index(label)]
+        names = self.dong_names[sl]
+        return pd.DataFrame({
+            "행정동": np.repeat(names, s.shape[1]),
+            "election": np.tile(self.elections, len(names)),
+            "prop": s.ravel(),
+        }).dropna(subset=["prop"])
+
+
+# ---------- 생성 ----------
+
+def _dong_keys(uniq: pd.DataFrame) -> np.ndarray:
+    """
+    고유 (지역구코드, 행정동, 행정동코드) 조합 → 행정동 키.
+    행정동코드, 코드가 빈 행(분동 전 옛 동 등)은 같은 지역구·이름의 코드로 채우고
+    그래도 없으면 '지역구코드:행정동' 이름 키.
+    """
+    code = uniq["행정동코드"].astype("string").str.strip().replace("", pd.NA)
+    name = uniq["행정동"].astype(str).str.strip()
+    has = code.notna()
+    by_name = pd.Series(code[has].to_numpy(), index=pd.MultiIndex.from_arrays([uniq["지역구코드"][has], name[has]]))
+    by_name = by_name[~by_name.index.duplicated(keep="last")]
+    fill = by_name.reindex(pd.MultiIndex.from_arrays([uniq["지역구코드"], name])).to_numpy()
+    code = code.where(has, pd.Series(fill, index=uniq.index, dtype="string"))
+    return code.where(code.notna(), uniq["지역구코드"].astype(str) + ":" + name).astype(object).to_numpy()
+
+
+@timed("build_vote_tensor")
+def build_vote_tensor(long: pd.DataFrame) -> VoteTensor:
+    """
+    ingest.load_dong_votes 결과(long) → VoteTensor.
+    문자열 정리는 고유 행정동 조합(수천 개)에서만 하고, 셀 채우기는 bincount 한 번.
+    """
+    labels = list(LABEL_ORDER)
+    if long is None or long.empty:
+        empty = np.array([], dtype=object)
+        return VoteTensor(np.zeros((0, 0, len(labels))), np.zeros((0, 0), bool), [], labels,
+                          empty, empty, empty, empty)
+    long = long.dropna(subset=["지역구코드"])
+    labels += sorted(set(long["label"].astype(str).unique()) - set(labels))
+    elections = election_order(long["election"].astype(str).unique())
+    e_idx = long["election"].astype(str).map({e: i for i, e in enumerate(elections)}).to_numpy()
+    l_idx = long["label"].astype(str).map({lab: i for i, lab in enumerate(labels)}).to_numpy()
+
+    id_cols = ["지역구코드", "행정동", "행정동코드"] + (["시/도"] if "시/도" in long.columns else [])
+    group = long.groupby(id_cols, dropna=False, sort=False, observed=True).ngroup().to_numpy()
+    first = np.unique(group, return_index=True)[1]
+    uniq = long[id_cols].iloc[first].reset_index(drop=True)
+    last_e = np.full(len(uniq), -1)
+    np.maximum.at(last_e, group, e_idx)
+
+    # 행정동 속성은 가장 최근 선거 기준(현재 선거구 획정)
+    keys = _dong_keys(uniq)
+    attrs = pd.DataFrame({
+        "dong": keys, "e": last_e,
+        "district": canon_codes(uniq["지역구코드"]).to_numpy(),
+        "name": uniq["행정동"].astype(str).str.strip().to_numpy(),
+        "sido": uniq["시/도"].astype(str).str.strip().to_numpy() if "시/도" in uniq.columns else "",
+    }).sort_values("e", kind="stable").drop_duplicates("dong", keep="last")
+    attrs = attrs.sort_values(["district", "dong"], kind="stable").reset_index(drop=True)
+    key_pos = pd.Series(np.arange(len(attrs)), index=attrs["dong"].to_numpy()).reindex(keys).to_numpy()
+    d_idx = key_pos[group]
+
+    D, E, L = len(attrs), len(elections), len(labels)
+    votes = np.bincount((d_idx * E + e_idx) * L + l_idx,
+                        weights=long["votes"].to_numpy(dtype=float), minlength=D * E * L).reshape(D, E, L)
+    present = np.bincount(d_idx * E + e_idx, minlength=D * E).reshape(D, E) > 0
+    return VoteTensor(votes, present, elections, labels,
+                      attrs["dong"].to_numpy(), attrs["name"].to_numpy(),
+                      attrs["district"].to_numpy(), attrs["sido"].to_numpy())
+
+
+# ---------- 증분 갱신 (원자료 한 파일 단위) ----------
+
+def dong_positions(vt: VoteTensor, part: pd.DataFrame) -> np.ndarray:
+    """
+    원자료 행 → vt 행정동 축 위치 (모르는 행정동은 -1).
+    행정동코드가 빈 행은 같은 지역구·이름의 텐서 행정동으로 맞춘다 (build_vote_tensor와 같은 키).
+    """
+    if part is None or part.empty or not len(vt.dong_codes):
+        return np.full(0 if part is None else len(part), -1)
+    id_cols = ["지역구코드", "행정동", "행정동코드"]
+    group = part.groupby(id_cols, dropna=False, sort=False).ngroup().to_numpy()
+    first = np.unique(group, return_index=True)[1]
+    uniq = part[id_cols].iloc[first].reset_index(drop=True)
+
+    code = uniq["행정동코드"].astype("string").str.strip().replace("", pd.NA)
+    name = uniq["행정동"].astype(str).str.strip()
+    district = canon_codes(uniq["지역구코드"])
+    # 텐서 쪽 (지역구, 이름) → 키. 코드가 있는 키를 우선 (이름 키는 코드가 한 번도 없던 동)
+    named = pd.Series(vt.dong_codes, index=pd.MultiIndex.from_arrays([vt.dong_district, vt.dong_names]))
+    named = named.iloc[np.argsort([":" not in str(k) for k in named.to_numpy()], kind="stable")]
+    named = named[~named.index.duplicated(keep="last")]
+    by_name = named.reindex(pd.MultiIndex.from_arrays([district.to_numpy(), name.to_numpy()])).to_numpy()
+    keys = np.where(code.notna().to_numpy(), code.astype(object).to_numpy(), by_name)
+
+    pos = pd.Series(np.arange(len(vt.dong_codes)), index=vt.dong_codes)
+    found = pos.reindex(keys).to_numpy()
+    return np.where(pd.isna(found), -1, found).astype(int)[group]
+
+
+def realign_elections(values: np.ndarray, old: Sequence[str], new: Sequence[str]) -> np.ndarray:
+    """[D, E_old, ...] → [D, E_new, ...] (새 선거 칸은 0). old는 new의 부분집합이어야 한다."""
+    pos = {e: i for i, e in enumerate(new)}
+    out = np.zeros((values.shape[0], len(new)) + values.shape[2:], dtype=values.dtype)
+    out[:, [pos[e] for e in old]] = values
+    return out
+
+
+def replace_cells(values: np.ndarray, vt: VoteTensor, old_part: Optional[pd.DataFrame],
+                  new_part: Optional[pd.DataFrame], columns: Sequence[str],
+                  index_col: Optional[str] = None, index_map: Optional[dict] = None) -> Optional[np.ndarray]:
+    """
+    values[D, E, K]에서 old_part가 차지하던 (행정동, 선거) 칸을 비우고 new_part를 더한 복사본.
+    K축은 index_col(예: label → index_map 위치)로 고르거나, 없으면 columns 각각이 한 칸이다.
+    모르는 행정동/선거/계열이 있으면 None (호출측이 전체 재생성).
+    """
+    e_pos = {e: i for i, e in enumerate(vt.elections)}
+    out = values.copy()
+    for part, fill in ((old_part, False), (new_part, True)):
+        if part is None or part.empty:
+            continue
+        d = dong_positions(vt, part)
+        e = part["election"].astype(str).map(e_pos).to_numpy()
+        if (d < 0).any() or pd.isna(e).any():
+            return None
+        e = e.astype(int)
+        if not fill:
+            out[d, e] = 0
+            continue
+        if index_col is None:
+            np.add.at(out, (d, e), part[list(columns)].to_numpy(dtype=float))
+        else:
+            k = part[index_col].astype(str).map(index_map).to_numpy()
+            if pd.isna(k).any():
+                return None
+            np.add.at(out, (d, e, k.astype(int)), part[columns[0]].to_numpy(dtype=float))
+    return out
+
+
+@timed("update_vote_tensor")
+def update_vote_tensor(vt: VoteTensor, old_part: Optional[pd.DataFrame],
+                       new_part: Optional[pd.DataFrame]) -> Optional[VoteTensor]:
+    """
+    원자료 한 파일의 라벨 붙은 long(old → new)만 반영한 새 텐서 (vt는 공유 객체라 건드리지 않음).
+    새 선거는 시간 순 위치에 칸을 끼워 넣는다. 새 행정동/계열이 생기거나 선거 칸이 비게 되면 None.
+    """
+    new_part = new_part.dropna(subset=["지역구코드"]) if new_part is not None else None
+    old_part = old_part.dropna(subset=["지역구코드"]) if old_part is not None else None
+    incoming = set(new_part["election"].astype(str)) if new_part is not None else set()
+    elections = election_order(list(vt.elections) + sorted(incoming))
+    grown = VoteTensor(realign_elections(vt.votes, vt.elections, elections),
+                       realign_elections(vt.present, vt.elections, elections), elections, vt.labels,
+                       vt.dong_codes, vt.dong_names, vt.dong_district, vt.dong_sido)
+    votes = replace_cells(grown.votes, grown, old_part, new_part, ["votes"],
+                          index_col="label", index_map={lab: i for i, lab in enumerate(vt.labels)})
+    if votes is None:
+        return None
+    present = grown.present.copy()
+    for part, flag in ((old_part, False), (new_part, True)):
+        if part is not None and not part.empty:
+            e = part["election"].astype(str).map({x: i for i, x in enumerate(elections)}).to_numpy().astype(int)
+            present[dong_positions(grown, part), e] = flag
+    if not present.any(axis=0).all():
+        return None
+    return VoteTensor(votes, present, elections, vt.labels,
+                      vt.dong_codes, vt.dong_names, vt.dong_district, vt.dong_sido)
+
+
+def tensor_version(data_dir: Union[str, Path]) -> Tuple:
+    """원자료 파일들 + party_labels.csv의 내용 버전."""
+    data_dir = Path(data_dir)
+    files = list_election_files(data_dir)
+    labels = first_existing([data_dir / DATA_FILES["party_labels"], Path("/mnt/data") / DATA_FILES["party_labels"]])
+    return tuple(content_version(file_fingerprint(p)) for p in files + ([labels] if labels else []))
+
+
+def load_vote_tensor(data_dir: Union[str, Path]) -> VoteTensor:
+    """원자료 지문이 그대로면 이전 텐서 재사용 (파일별 melt도 ingest 캐시를 탄다)."""
+    data_dir = Path(data_dir)
+    return CACHE.get_or_load(("vote_tensor", str(data_dir)), tensor_version(data_dir),
+                             lambda: build_vote_tensor(load_dong_votes(data_dir)))
+
+
+# SQLite 백엔드: 지역구 하나의 행만 SQL로 읽어 만든 작은 텐서 (지역구 × 저장소 버전 단위)
+DISTRICT_TENSORS = LRUCache(maxsize=64)
+
+
+def district_vote_tensor(data_dir: Union[str, Path], district_code: Hashable) -> VoteTensor:
+    """원자료 전체 대신 선택 지역구의 행정동 행만 저장소에서 읽어 VoteTensor를 만든다."""
+    import store
+    data_dir = Path(data_dir)
+    key = (str(data_dir), _canon_code(district_code), store.store_version(data_dir))
+    return DISTRICT_TENSORS.get_or_build(
+        key, lambda: build_vote_tensor(query_votes(data_dir, by=None, district=district_code)))
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURE_DATA = Path(__file__).resolve().parent / "fixtures" / "data"
+
+# 모듈들이 저장소 최상위에 평평하게 있으므로 pytest를 어디서 실행해도 import되게 한다
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    """fixtures/data(서울 2411·2412, 경기 2421·2425만 남긴 작은 사본)를 테스트마다 새로 복사한 data 디렉터리."""
+    out = tmp_path / "data"
+    shutil.copytree(FIXTURE_DATA, out)
+    return out
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from http import HTTPStatus
+
+import pytest
+
+from api import ApiError, DistrictApi
+
+
+@pytest.fixture
+def api(data_dir):
+    return DistrictApi(data_dir)
+
+
+def test_etag_round_trip(api):
+    status, body, headers = api.respond("/district/2411/results", {})
+    assert status == HTTPStatus.OK
+    assert json.loads(body)["code"] == "2411"
+    assert headers["X-Cache"] == "miss"
+
+    status, body, again = api.respond("/district/2411/results", {}, headers["ETag"])
+    assert status == HTTPStatus.NOT_MODIFIED and body == b""
+    assert again["ETag"] == headers["ETag"]
+    assert api.respond("/district/2411/results", {}, '"stale", ' + headers["ETag"])[0] == HTTPStatus.NOT_MODIFIED
+    assert api.respond("/district/2411/results", {}, '"stale"')[0] == HTTPStatus.OK
+
+
+def test_etag_changes_with_data(api, data_dir):
+    etag = api.respond("/trend", {"code": "2411"})[2]["ETag"]
+    assert api.respond("/trend", {"code": "2411"}, etag)[0] == HTTPStatus.NOT_MODIFIED
+    path = data_dir / "vote_trend.csv"
+    rows = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(b"".join(r for r in rows if b",2411,2016_na_pro," not in r))
+    status, _, headers = api.respond("/trend", {"code": "2411"}, etag)
+    assert status == HTTPStatus.OK and headers["ETag"] != etag
+
+
+def test_star_matches_existing_resource(api):
+    status, body, headers = api.respond("/district/2421/results", {}, "*")
+    assert status == HTTPStatus.NOT_MODIFIED and body == b""
+    assert "ETag" in headers
+
+
+@pytest.mark.parametrize("path, query", [
+    ("/district/9999/results", {}),
+    ("/trend", {"code": "9999"}),
+])
+def test_star_on_missing_resource_is_404(api, path, query):
+    with pytest.raises(ApiError) as e:
+        api.respond(path, query, "*")
+    assert e.value.status == HTTPStatus.NOT_FOUND
+
+
+def test_unknown_path_is_404(api):
+    with pytest.raises(ApiError) as e:
+        api.respond("/nope", {}, "*")
+    assert e.value.status == HTTPStatus.NOT_FOUND
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.run import compare, measure
+from benchmarks.synth import ELECTIONS, Scale, generate
+from data_loader import load_all_uncached, sniff_encoding
+
+TINY = Scale(districts=2, dongs=10, elections=3)
+
+
+@pytest.fixture
+def synth_dir(tmp_path):
+    generate(tmp_path, TINY, seed=1)
+    return tmp_path
+
+
+def test_synthetic_data_loads(synth_dir):
+    frames = load_all_uncached(synth_dir)
+    assert all(frames[name] is not None for name in frames)
+    assert len(frames["population"]) == TINY.dongs
+    assert frames["current_info"]["코드"].nunique() == TINY.districts
+    trend = frames["vote_trend"]
+    assert trend["code"].nunique() == TINY.districts
+    assert trend["election"].nunique() == TINY.elections
+    assert trend.groupby(["code", "election"], observed=True)["prop"].sum().round(3).eq(100.0).all()
+
+
+def test_synthetic_raw_files_mix_encodings(synth_dir):
+    raw = sorted(p for p in synth_dir.glob("20*_*_*.csv"))
+    assert len(raw) == 2 * TINY.elections
+    assert {sniff_encoding(p) for p in raw} == {"utf-8-sig", "cp949"}
+
+
+def test_generate_is_deterministic(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    generate(a, TINY, seed=3)
+    generate(b, TINY, seed=3)
+    for p in a.iterdir():
+        assert p.read_bytes() == (b / p.name).read_bytes(), p.name
+
+
+def test_generate_rejects_too_many_elections(tmp_path):
+    with pytest.raises(ValueError):
+        generate(tmp_path, Scale(districts=1, dongs=2, elections=len(ELECTIONS) + 1))
+
+
+def test_measure_and_compare():
+    stats = measure(lambda: sum(range(100)), repeat=3, warmup=0)
+    assert stats["n"] == 3 and 0 <= stats["min_ms"] <= stats["median_ms"]
+    lines = compare({"results": {"a": {"median_ms": 2.0}, "b": {"median_ms": 1.0}}},
+                    {"results": {"a": {"median_ms": 1.0}}})
+    assert len(lines) == 1 and "x2.00" in lines[0]
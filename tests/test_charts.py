@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from charts import (_pct_scale, _to_pct_float, build_prg_view, build_results_2024_view, build_vote_trend_spec,
+                    cached_spec)
+from data_loader import load_all_uncached
+from metrics import compute_trend_series
+
+
+@pytest.mark.parametrize("col, values, scale", [
+    ("후보1_득표율", [0.63, 48.2], 1.0),        # 이미 % (작은 값도 그대로)
+    ("후보1_득표율", [0.63, 0.41], 1.0),        # '~율'은 값 범위와 상관없이 %
+    ("고령층비율", [0.077, 0.259], 100.0),      # '~비율'은 컬럼 전체가 0~1이면 비율
+    ("고령층비율", [7.7, 0.9], 1.0),
+    ("진보당 득표력", [5.6, 0.8], 1.0),
+    ("1st_share", ["0.4", "0.35%"], 1.0),       # '%'가 붙은 값이 있으면 %
+    ("1st_share", ["0.4", "0.35"], 100.0),
+])
+def test_pct_scale_per_column(col, values, scale):
+    assert _pct_scale(pd.DataFrame({col: values}), col) == scale
+
+
+def test_to_pct_float_keeps_explicit_percent():
+    assert _to_pct_float("0.5%", scale=100.0) == 0.5
+    assert _to_pct_float(0.5, scale=100.0) == 50.0
+    assert _to_pct_float("1,234", scale=1.0) == 1234.0
+    assert _to_pct_float("집계중", default="N/A") == "N/A"
+
+
+def test_results_view_keeps_small_shares():
+    df_24 = pd.DataFrame({"코드": ["2411", "2412"], "후보1_이름": ["가", "나"], "후보1_득표율": [52.1, 0.63],
+                          "후보2_이름": ["다", "라"], "후보2_득표율": [40.0, 0.41]})
+    view = build_results_2024_view(df_24.iloc[[1]], df_24, "2412")
+    assert (view["share1"], view["share2"], view["gap"]) == (0.63, 0.41, 0.22)
+
+
+def test_prg_view_unit_from_full_table():
+    pop = pd.DataFrame({"코드": ["2411", "2412"], "고령층비율": [0.2, 0.9], "청년층비율": [0.35, 0.4]})
+    prg = pd.DataFrame({"코드": ["2411", "2412"], "진보당 득표력": [0.8, 6.4]})
+    view = build_prg_view(prg.iloc[[0]], pop.iloc[[0]], prg, pop)
+    assert view["strength"] == "0.80%"
+    assert (view["elder"], view["youth"]) == ("20.00%", "35.00%")
+
+
+def test_cached_spec_keys_on_code_kind_and_version():
+    calls = []
+    build = lambda: calls.append(1) or len(calls)
+    first = cached_spec("2411", "test_kind", ("v", 1), build)
+    assert cached_spec(2411, "test_kind", ("v", 1), build) == first
+    assert cached_spec("2411", "test_kind", ("v", 2), build) != first
+    assert cached_spec("2411", "other_kind", ("v", 1), build) != first
+    cached_spec("2411", "test_kind", None, build)  # 버전을 모르면 캐시하지 않는다
+    cached_spec("2411", "test_kind", None, build)
+    assert len(calls) == 5
+
+
+def test_vote_trend_spec_from_fixture(data_dir):
+    df_trend = load_all_uncached(data_dir, use_snapshot=False)["vote_trend"]
+    spec = build_vote_trend_spec(compute_trend_series(df_trend, "2411"))
+    assert spec.kind == "vega"
+    rows = next(iter(spec.payload["datasets"].values()))
+    assert {r["label"] for r in rows} >= {"민주", "보수"}
+    assert build_vote_trend_spec(compute_trend_series(df_trend, "9999")).kind in ("info", "warning")
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from charts import _fmt_pct, build_comparison_table, build_results_2024_view
+from data_loader import load_all_uncached
+from district_index import DistrictIndex
+from metrics import compute_summary_many, compute_summary_metrics, compute_trend_many, compute_trend_series
+
+CODES = ["2412", "02411", "9999", "2421"]
+
+
+@pytest.fixture
+def frames(data_dir):
+    return load_all_uncached(data_dir, use_snapshot=False)
+
+
+def test_batched_metrics_match_single_lookups(frames):
+    df_trend, df_24, df_idx = frames["vote_trend"], frames["results_2024"], frames["index_sample"]
+    many = compute_summary_many(df_trend, df_24, df_idx, CODES)
+    assert many.index.tolist() == ["2412", "2411", "9999", "2421"]
+    for code in CODES:
+        single = compute_summary_metrics(df_trend, df_24, df_idx, code)
+        row = many.loc[code.lstrip("0")]
+        assert {k: (None if pd.isna(v) else v) for k, v in row.items()} == pytest.approx(single)
+
+    trends = compute_trend_many(df_trend, CODES)
+    expected = pd.concat([compute_trend_series(df_trend, c) for c in CODES])
+    pd.testing.assert_frame_equal(trends, expected)
+
+
+def test_comparison_table_matches_cards(frames):
+    districts = DistrictIndex({k: v for k, v in frames.items() if k != "bookmark"})
+    summary = compute_summary_many(frames["vote_trend"], frames["results_2024"], frames["index_sample"], CODES)
+    table = build_comparison_table(districts, CODES, summary, names={"2411": "서울 강서구병"})
+    assert table.index.tolist() == ["2412", "2411", "9999", "2421"]
+    assert table.loc["2411", "지역구"] == "서울 강서구병"
+
+    card = build_results_2024_view(districts.get("results_2024", "2411"), frames["results_2024"], "2411")
+    assert table.loc["2411", "24년 1위"] == f"{card['name1']} ({_fmt_pct(card['share1'])})"
+    assert table.loc["2411", "24년 격차(%p)"] == card["gap"]
+    assert table.loc["9999"].drop("지역구").isna().all()
+
+    pop = districts.get("population", "2411")
+    assert table.loc["2411", "전체 유권자"] == pop["전체 유권자"].sum()
+    assert table.loc["2411", "2030 비율(%)"] == round(pop["2030"].sum() / pop["전체 유권자"].sum() * 100.0, 2)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+
+import pandas as pd
+import pytest
+
+from data_loader import CsvReadError, load_all_timed, load_all_uncached, run_timed
+
+
+def test_run_timed_runs_jobs_concurrently():
+    barrier = threading.Barrier(3, timeout=5)  # 세 작업이 동시에 돌지 않으면 BrokenBarrierError
+
+    def job(k):
+        barrier.wait()
+        return k
+    results, ms = run_timed({k: (lambda k=k: job(k)) for k in "abc"}, max_workers=3)
+    assert results == {"a": "a", "b": "b", "c": "c"} and set(ms) == set("abc")
+
+
+def test_run_timed_sequential_and_errors():
+    order = []
+    run_timed({k: (lambda k=k: order.append(k)) for k in "abc"}, max_workers=1)
+    assert order == ["a", "b", "c"]
+
+    def fail():
+        raise CsvReadError("x.csv", "utf-8", "parse", "boom")
+    with pytest.raises(CsvReadError):
+        run_timed({"ok": lambda: 1, "bad": fail}, max_workers=2)
+
+
+def test_parallel_load_matches_sequential(data_dir):
+    parallel = load_all_uncached(data_dir, use_snapshot=False, max_workers=4)
+    sequential = load_all_uncached(data_dir, use_snapshot=False, max_workers=1)
+    assert list(parallel) == list(sequential)
+    for name in parallel:
+        pd.testing.assert_frame_equal(parallel[name], sequential[name])
+
+
+def test_load_all_timings(data_dir):
+    frames, timings = load_all_timed(data_dir, use_snapshot=False, max_workers=4)
+    assert set(timings["files"]) == set(frames)
+    assert all(info["source"] == "csv" and info["rows"] == len(frames[name])
+               for name, info in timings["files"].items())
+    assert 1 < timings["workers"] <= 4
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import load_vote_cube
+from ingest import load_dong_tallies
+
+
+@pytest.fixture
+def cube(data_dir):
+    return load_vote_cube(data_dir)
+
+
+def test_sido_slice_matches_groupby(cube, data_dir):
+    tallies = load_dong_tallies(data_dir)
+    expected = tallies.groupby(["시/도", "election"])[["선거인수", "투표수"]].sum().astype(float)
+    got = cube.slice().set_index(["시/도", "선거"])[["선거인수", "투표수"]]
+    pd.testing.assert_frame_equal(got.sort_index(), expected.sort_index(), check_names=False)
+    assert cube.district_counts().to_dict() == {"경기": 2, "서울": 2}
+
+
+def test_levels_sum_up(cube):
+    election = cube.elections[-1]
+    districts = cube.slice(sido="서울", election=election, level="district", label="진보")
+    sido = cube.slice(sido="서울", election=election, label="진보")
+    assert sorted(districts["지역구코드"]) == ["2411", "2412"]
+    assert districts["득표"].sum() == pytest.approx(sido["득표"].iloc[0])
+    dongs = cube.slice(district=2411, election=election, level="dong")
+    assert (dongs["지역구코드"] == "2411").all()
+    assert dongs["선거인수"].sum() == pytest.approx(districts.set_index("지역구코드").loc["2411", "선거인수"])
+    np.testing.assert_allclose(dongs["투표율"], dongs["투표수"] / dongs["선거인수"] * 100.0)
+
+
+def test_slice_label_shares(cube):
+    table = cube.slice(district=["2411", "2412"])
+    assert set(table["지역구코드"]) == {"2411", "2412"} and len(table) == 2 * len(cube.elections)
+    shares = cube.slice(district="2411", label=cube.labels)
+    np.testing.assert_allclose(shares.groupby("선거")["득표율"].sum(), 100.0)
+
+
+def test_slice_rejects_bad_arguments(cube):
+    with pytest.raises(ValueError):
+        cube.slice(dong="x", level="district")
+    with pytest.raises(KeyError):
+        cube.slice(election="1999_na_pro")
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+
+from data_cache import LoaderCache, LRUCache, cached_loader, content_version, file_fingerprint
+from data_loader import load_population_agg
+
+
+def test_loader_cache_keeps_one_version_per_slot():
+    cache, calls = LoaderCache(), []
+    build = lambda v: (lambda: calls.append(v) or v)
+    assert cache.get_or_load("s", 1, build(1)) == 1
+    assert cache.get_or_load("s", 1, build(1)) == 1
+    assert cache.get_or_load("s", 2, build(2)) == 2
+    assert calls == [1, 2]
+    assert cache.stats()["by_name"]["s"] == {"hits": 1, "misses": 2}
+    assert cache.peek("s") == (2, 2) and not cache.has("s", 1)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    for key in ["a", "b", "a", "c"]:
+        cache.get_or_build(key, lambda: key.upper())
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats()["evictions"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_fingerprint_ignores_touch(tmp_path):
+    path = tmp_path / "x.csv"
+    path.write_text("a\n1\n")
+    before = file_fingerprint(path)
+    os.utime(path, ns=(before.mtime_ns + 10**9, before.mtime_ns + 10**9))
+    after = file_fingerprint(path)
+    assert after.mtime_ns != before.mtime_ns and content_version(after) == content_version(before)
+    path.write_text("a\n2\n")
+    assert file_fingerprint(path).digest != before.digest
+    assert file_fingerprint(tmp_path / "missing.csv") is None
+
+
+def test_cached_loader_reloads_only_on_content_change(tmp_path):
+    calls = []
+
+    @cached_loader("t.csv", fallback_dirs=())
+    def load_t(data_dir):
+        calls.append(1)
+        return pd.read_csv(data_dir / "t.csv")
+
+    (tmp_path / "t.csv").write_text("a\n1\n")
+    first = load_t(tmp_path)
+    assert load_t(tmp_path) is first and len(calls) == 1
+    (tmp_path / "t.csv").write_text("a\n2\n")
+    assert load_t(tmp_path)["a"].tolist() == [2] and len(calls) == 2
+    assert load_t.uncached(tmp_path)["a"].tolist() == [2] and len(calls) == 3
+
+
+def test_public_loader_is_cached(data_dir):
+    assert load_population_agg(data_dir) is load_population_agg(data_dir)
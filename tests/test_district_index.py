@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from data_loader import load_all_uncached
+from district_index import DistrictIndex, _canon_code, ensure_code_col, get_by_code
+
+
+@pytest.mark.parametrize("raw, canon", [("02411", "2411"), (" 24-11 ", "2411"), (2411, "2411"), ("AB01", "ab01")])
+def test_canon_code(raw, canon):
+    assert _canon_code(raw) == canon
+
+
+def test_get_matches_full_scan(data_dir):
+    frames = load_all_uncached(data_dir, use_snapshot=False)
+    index = DistrictIndex({k: v for k, v in frames.items() if k != "bookmark"})
+    for name in ["population", "vote_trend", "results_2024", "current_info"]:
+        assert len(index.get(name, "2411")) > 0
+        for code in ["2411", "02412", 2421, "9999"]:
+            got = index.get(name, code)
+            expected = ensure_code_col(get_by_code(frames[name], code))
+            assert len(got) == len(expected), (name, code)
+            if len(got):
+                pd.testing.assert_frame_equal(got.reset_index(drop=True), expected.reset_index(drop=True),
+                                              check_dtype=False)
+
+
+def test_rows_keep_original_order_within_code():
+    df = pd.DataFrame({"코드": ["2412", "2411", "2412", "2411"], "v": [1, 2, 3, 4]})
+    index = DistrictIndex({"t": df})
+    assert index.get("t", "2411")["v"].tolist() == [2, 4]
+    assert index.codes("t") == ["2411", "2412"]
+    assert index.get_many("t", ["2412", "9999", "2411", "2412"])["v"].tolist() == [1, 3, 2, 4]
+    assert index.get(df, "2412")["v"].tolist() == [1, 3]  # 미등록 프레임은 전체 스캔
+    assert index.get("t", "9999").empty
+
+
+def test_view_shares_spans_and_projects_columns():
+    df = pd.DataFrame({"코드": ["2411", "2412"], "a": [1, 2], "b": [3, 4]})
+    index = DistrictIndex({"t": df})
+    view = index.view({"t": ["a"], "missing": None})
+    assert list(view["t"].columns) == ["a"] and "missing" not in view
+    assert view.get("t", "2412")["a"].tolist() == [2]
+    with pytest.raises(ValueError):
+        index.replace_columns("t", df.iloc[:1])
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from data_loader import load_all_uncached
+from ecology import EcologicalModel
+from tensor import load_vote_tensor
+
+
+@pytest.fixture
+def model(data_dir) -> EcologicalModel:
+    return EcologicalModel(load_vote_tensor(data_dir), load_all_uncached(data_dir, use_snapshot=False)["population"])
+
+
+def _lstsq(model: EcologicalModel, dongs: np.ndarray, e: int, li: int) -> np.ndarray:
+    """행정동 하나씩 √가중치를 곱해 푼 기준 해 (득표 수 가중 최소제곱)."""
+    w = model.total[:, e] * dongs
+    ok = (w > 0) & np.isfinite(model.y[:, e, li])
+    sw = np.sqrt(w[ok])
+    return np.linalg.lstsq(model.x[ok] * sw[:, None], model.y[ok, e, li] * sw, rcond=None)[0]
+
+
+@pytest.mark.parametrize("sido", [None, "서울"])
+def test_fit_matches_weighted_lstsq(model, sido):
+    fit = model.fit(sido=sido, ridge=0.0)
+    for j, e in enumerate(fit._e):
+        if fit.n[j] <= fit.coef.shape[1]:
+            assert np.isnan(fit.coef[j]).all()
+            continue
+        for li in range(len(model.vt.labels)):
+            np.testing.assert_allclose(fit.coef[j, :, li], _lstsq(model, fit.dongs, e, li), rtol=1e-6, atol=1e-8)
+
+
+def test_fit_filters_and_tables(model):
+    fit = model.fit(kinds=["president"])
+    assert fit.elections == [e for e in model.vt.elections if e.endswith("_president")]
+    table = fit.district_table()
+    assert {"2411", "2412"} <= set(table.index)
+    assert (table["실제(%)"] - table["기대(%)"] - table["차이(%p)"]).abs().max() < 1e-9
+    coefs = fit.coefficients()
+    assert list(coefs.columns[:2]) == ["절편", "2030 비율"] and (coefs["행정동 수"] > 0).all()
+    dongs = fit.dong_table("2411")
+    assert len(dongs) > 0 and dongs["실제(%)"].between(0, 100).all()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import codecs
+
+import pytest
+
+import data_loader
+from data_loader import CsvReadError, _read_csv_safe, sniff_encoding
+
+TEXT = "코드,지역구\n2411,강서구병\n"
+
+
+@pytest.mark.parametrize("body, enc", [
+    (TEXT.encode("utf-8"), "utf-8"),
+    (codecs.BOM_UTF8 + TEXT.encode("utf-8"), "utf-8-sig"),
+    (TEXT.encode("cp949"), "cp949"),
+    (TEXT.encode("utf-16"), "utf-16"),
+    (b"a,b\n1,2\n", "utf-8"),
+])
+def test_sniff_and_read(tmp_path, body, enc):
+    path = tmp_path / "t.csv"
+    path.write_bytes(body)
+    assert sniff_encoding(path) == enc
+    df = _read_csv_safe(path, dtype=str)
+    assert len(df) == 1 and df.iloc[0, 0] in ("2411", "1")
+
+
+def test_non_ascii_after_first_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, "_SNIFF_CHUNK", 16)
+    path = tmp_path / "t.csv"
+    path.write_bytes(("a,b\n" + "1,2\n" * 20 + "3,서울\n").encode("cp949"))
+    assert sniff_encoding(path) == "cp949"
+
+
+def test_undecodable_file_raises_structured_error(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_bytes(b"a,b\n\xff\xfe\xfa,1\n" + "가".encode("utf-8"))
+    with pytest.raises(CsvReadError) as err:
+        sniff_encoding(path, ["utf-8", "ascii"])
+    assert err.value.stage == "encoding" and err.value.as_dict()["path"] == str(path)
+
+
+def test_missing_and_empty_files(tmp_path):
+    assert _read_csv_safe(tmp_path / "missing.csv").empty
+    (tmp_path / "empty.csv").write_bytes(b"")
+    assert _read_csv_safe(tmp_path / "empty.csv").empty
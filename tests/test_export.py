@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+import re
+
+import pytest
+
+import export
+from export import ASSETS_DIRNAME, VEGA_SCRIPTS, VEGA_SHA256, bundle_scripts
+
+
+def test_script_urls_are_pinned():
+    assert set(VEGA_SCRIPTS) == set(VEGA_SHA256)
+    for url in VEGA_SCRIPTS.values():
+        assert re.search(r"@\d+\.\d+\.\d+/", url), url
+
+
+@pytest.fixture
+def fake_scripts(tmp_path, monkeypatch):
+    """실제 빌드 대신 작은 가짜 파일과 그 해시로 바꿔 둔 source 디렉터리."""
+    source = tmp_path / "vendor"
+    source.mkdir()
+    digests = {}
+    for name in VEGA_SCRIPTS:
+        body = f"/* {name} */".encode()
+        (source / name).write_bytes(body)
+        digests[name] = hashlib.sha256(body).hexdigest()
+    monkeypatch.setattr(export, "VEGA_SHA256", digests)
+    return source
+
+
+def test_bundle_copies_verified_scripts(tmp_path, fake_scripts):
+    out = tmp_path / "out"
+    scripts = bundle_scripts(out, fake_scripts)
+    assert scripts == tuple(f"{ASSETS_DIRNAME}/{name}" for name in VEGA_SCRIPTS)
+    assert sorted(p.name for p in (out / ASSETS_DIRNAME).iterdir()) == sorted(VEGA_SCRIPTS)
+
+
+def test_bundle_rejects_hash_mismatch_and_cleans_up(tmp_path, fake_scripts, capsys):
+    (fake_scripts / "vega-embed.min.js").write_bytes(b"tampered")
+    out = tmp_path / "out"
+    assert bundle_scripts(out, fake_scripts) == tuple(VEGA_SCRIPTS.values())
+    assert not (out / ASSETS_DIRNAME).exists()
+    assert "sha256" in capsys.readouterr().err
+
+
+def test_bundle_keeps_preexisting_assets_dir(tmp_path, fake_scripts):
+    assets = tmp_path / "out" / ASSETS_DIRNAME
+    assets.mkdir(parents=True)
+    (assets / "keep.txt").write_text("x")
+    (fake_scripts / "vega-embed.min.js").write_bytes(b"tampered")
+    assert bundle_scripts(tmp_path / "out", fake_scripts) == tuple(VEGA_SCRIPTS.values())
+    assert [p.name for p in assets.iterdir()] == ["keep.txt"]
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ingest import aggregate_trend, election_key, load_dong_votes, party_key
+
+
+@pytest.mark.parametrize("stem, key", [("2022_S_president", "2022_president"), ("2024_G_na_pro", "2024_na_pro"),
+                                       ("2022_president", "2022_president")])
+def test_election_key(stem, key):
+    assert election_key(stem) == key
+
+
+def test_party_key_matches_candidate_columns():
+    assert party_key("더불어민주당\n이재명") == party_key("더불어민주당") == "더불어민주당"
+
+
+def test_trend_sums_raw_votes(data_dir):
+    long = load_dong_votes(data_dir)
+    trend = aggregate_trend(long)
+    expected = long.groupby([long["지역구코드"].astype("int64"), "election", "label"])["votes"].sum()
+    got = trend.set_index(["code", "election", "label"])["votes"]
+    assert got[got > 0].sort_index().to_dict() == expected[expected > 0].sort_index().to_dict()
+    np.testing.assert_allclose(trend.groupby(["code", "election"])["prop"].sum(), 100.0)
+    assert trend.loc[trend["code"] == 2411, "region"].unique().tolist() == ["서울 강서구병"]
+
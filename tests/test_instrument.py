@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import instrument
+from instrument import begin_run, end_run, read_log, stage, summarize, timed
+
+
+@timed("make_frame")
+def _make_frame(n):
+    return pd.DataFrame({"a": range(n)})
+
+
+@pytest.fixture
+def profiling(tmp_path):
+    log = tmp_path / "profile.jsonl"
+    instrument.enable(log_path=log)
+    yield log
+    instrument.end_run()
+    instrument.disable()
+
+
+def test_disabled_is_noop():
+    instrument.disable()  # DSS_PROFILE로 켜고 돌려도 같은 결과
+    with stage("x") as s:
+        s.rows = 3
+    assert s is instrument._NULL
+    begin_run("page")
+    assert end_run() is None
+
+
+def test_run_records_nested_stages(profiling):
+    begin_run("지역별 분석", session="s1")
+    with stage("page") as s:
+        _make_frame(4)
+        s.rows = 1
+    run = end_run()
+    assert [(r["stage"], r["depth"], r.get("rows")) for r in run["stages"]] == [("make_frame", 1, 4), ("page", 0, 1)]
+    assert run["page"] == "지역별 분석" and run["total_ms"] >= run["stages"][-1]["ms"]
+    assert read_log(profiling) == [run]
+
+
+def test_unfinished_run_is_marked_stopped(profiling):
+    begin_run("a")
+    _make_frame(1)
+    begin_run("b")
+    end_run()
+    runs = read_log(profiling)
+    assert [r["page"] for r in runs] == ["a", "b"] and runs[0]["stopped"] and "stopped" not in runs[1]
+
+    table = summarize(runs)
+    assert table.loc["make_frame", "calls"] == 1 and table.loc["(rerun total)", "calls"] == 2
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import snapshot
+from data_cache import CACHE
+from data_loader import KEY_COLUMNS, LazyTable, compile_snapshot, load_all_uncached, load_tables_timed
+
+
+def test_projection_keeps_key_columns(data_dir):
+    handle = LazyTable(data_dir, "population")
+    header = handle.columns
+    cols = handle.projection(["2030"])
+    assert "2030" in cols and "전체 유권자" not in cols
+    assert set(cols) - {"2030"} <= set(KEY_COLUMNS)
+    assert list(cols) == [c for c in header if c in cols]  # 헤더 순서
+    assert handle.projection(None) is None and handle.projection(header) is None
+
+
+def test_projected_load_matches_full_load(data_dir):
+    full = load_all_uncached(data_dir, use_snapshot=False)["population"]
+    df = LazyTable(data_dir, "population").load(["2030", "65세 이상"])
+    assert "전체 유권자" not in df.columns
+    pd.testing.assert_frame_equal(df, full[list(df.columns)])
+
+
+def test_sources_cache_then_csv(data_dir):
+    CACHE.clear()
+    page = {"population": ["2030"], "vote_trend": None}
+    _, timings = load_tables_timed(data_dir, page)
+    assert {info["source"] for info in timings["files"].values()} == {"csv"}
+    assert timings["files"]["population"]["cols"] < len(LazyTable(data_dir, "population").columns)
+    _, again = load_tables_timed(data_dir, page)
+    assert {info["source"] for info in again["files"].values()} == {"cache"}
+
+
+@pytest.mark.skipif(not snapshot.available(), reason="pyarrow 없음")
+def test_projected_snapshot_read(data_dir):
+    page = {"population": ["2030"], "vote_trend": None}
+    compile_snapshot(data_dir)
+    CACHE.clear()
+    frames, snap = load_tables_timed(data_dir, page)
+    assert {info["source"] for info in snap["files"].values()} == {"snapshot"}
+    pd.testing.assert_frame_equal(frames["population"], LazyTable(data_dir, "population").load(["2030"]))
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from memory import compare_memory, read_both
+
+
+def test_compact_tables_are_smaller(data_dir):
+    table = compare_memory(data_dir)
+    assert table.loc["(total)", "compact_MB"] < table.loc["(total)", "current_MB"]
+    assert (table["ratio"] <= 1.0).all()
+    assert table.loc["vote_trend", "ratio"] < 0.5
+
+
+def test_compact_keeps_values(data_dir):
+    for name, both in read_both(data_dir).items():
+        cur, new = both["current"], both["compact"]
+        assert list(cur.columns) == list(new.columns), name
+        assert len(cur) == len(new), name
+        for col in cur.columns:
+            a, b = cur[col], new[col]
+            if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+                pd.testing.assert_series_equal(a.astype("float64"), b.astype("float64"),
+                                               check_names=False, rtol=1e-6)
+            else:
+                # 코드 컬럼은 문자열 → 정수, 라벨은 → category로 바뀌므로 문자열로 맞춰 비교
+                assert a.astype(str).tolist() == b.astype(str).tolist(), (name, col)
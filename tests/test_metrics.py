@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import load_all_uncached
+from metrics import (compute_24_gap_table, compute_metrics_table, compute_summary_metrics, compute_trend_metrics,
+                     trend_long, update_metrics_table)
+
+
+def _trend(rows):
+    return pd.DataFrame(rows, columns=["코드", "election", "label", "prop"])
+
+
+TREND = _trend([
+    ("2411", "2020_na_pro", "민주", 40.0), ("2411", "2020_na_pro", "보수", 35.0), ("2411", "2020_na_pro", "진보", 10.0),
+    ("2411", "2022_president", "민주", 30.0), ("2411", "2022_president", "보수", 50.0), ("2411", "2022_president", "진보", 4.0),
+    ("2411", "2024_na_pro", "민주", 45.0), ("2411", "2024_na_pro", "보수", 40.0), ("2411", "2024_na_pro", "진보", 7.0),
+    ("02412", "2024_na_pro", "민주", 20.0), ("02412", "2024_na_pro", "보수", 60.0), ("02412", "2024_na_pro", "진보", 3.0),
+])
+
+
+def test_trend_metrics_by_hand():
+    table = compute_trend_metrics(trend_long(TREND))
+    assert table.loc["2411", "PL_prg_str"] == pytest.approx(7.0)
+    assert table.loc["2411", "PL_swing_B"] == 2      # 민주 → 보수 → 민주
+    assert table.loc["2411", "PL_gap_B"] == pytest.approx((5 + 20 + 5) / 3)
+    assert table.loc["2412", "PL_swing_B"] == 0 and table.loc["2412", "PL_gap_B"] == pytest.approx(40.0)
+
+
+def test_gap_prefers_2024_rows():
+    df_24 = pd.DataFrame({"코드": ["2411", "2411", "2412"], "연도": [2024, 2020, 2020],
+                          "후보1_득표율": [50.0, 60.0, "45%"], "후보2_득표율": [48.5, 30.0, "44%"],
+                          "후보3_득표율": [1.5, np.nan, np.nan]})
+    gap = compute_24_gap_table(df_24)
+    assert gap.to_dict() == {"2411": 1.5, "2412": 1.0}
+
+
+def test_index_overrides_take_precedence():
+    df_idx = pd.DataFrame({"코드": ["2411"], "진보정당 득표력": [9.9]})
+    table = compute_metrics_table(TREND, None, df_idx)
+    assert table.loc["2411", "PL_prg_str"] == pytest.approx(9.9)
+    assert table.loc["2412", "PL_prg_str"] == pytest.approx(3.0)
+    assert compute_summary_metrics(TREND, None, df_idx, "02411")["PL_prg_str"] == pytest.approx(9.9)
+
+
+def test_update_matches_full_recompute(data_dir):
+    f = load_all_uncached(data_dir, use_snapshot=False)
+    df_trend, df_24 = f["vote_trend"], f["results_2024"]
+    prev = compute_metrics_table(df_trend, df_24)
+    changed = df_trend.copy()
+    hit = changed["code"].astype(str) == "2411"
+    changed.loc[hit, "prop"] = changed.loc[hit, "prop"] * 0.5
+    updated = update_metrics_table(prev, changed, df_24, None, ["2411"])
+    assert updated.loc["2411", "PL_gap_B"] != prev.loc["2411", "PL_gap_B"]
+    pd.testing.assert_frame_equal(updated, compute_metrics_table(changed, df_24).sort_index())
+    # 외부 지표가 있는 코드는 그 값이 계속 우선
+    df_idx = f["index_sample"]
+    with_idx = update_metrics_table(compute_metrics_table(df_trend, df_24, df_idx), changed, df_24, df_idx, ["2411"])
+    pd.testing.assert_frame_equal(with_idx, compute_metrics_table(changed, df_24, df_idx).sort_index())
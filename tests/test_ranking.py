@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import load_all_uncached
+from ranking import DEFAULT_WEIGHTS, FEATURES, RankingModel, build_feature_table, top_n
+
+
+@pytest.mark.parametrize("n", [0, 1, 5, 99, 100, 250])
+def test_top_n_matches_full_sort(n):
+    scores = np.random.default_rng(7).permutation(100).astype(float)
+    expected = np.argsort(-scores, kind="stable")[:n]
+    np.testing.assert_array_equal(top_n(scores, n), expected)
+
+
+def test_top_n_with_ties_and_negative_n():
+    scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0])
+    top = top_n(scores, 3)
+    assert sorted(top.tolist()) == [1, 2, 4]
+    assert top_n(scores, -2).size == 0
+
+
+def test_rank_orders_by_weighted_z_score():
+    features = pd.DataFrame({c: np.nan for c in FEATURES}, index=pd.Index(["a", "b", "c"], name="코드"))
+    features["PL_prg_str"] = [5.0, 9.0, 7.0]
+    features["gap_24"] = [1.0, 20.0, 2.0]  # 방향 -1: 격차가 작을수록 유리
+
+    by_strength = RankingModel(features).rank({"PL_prg_str": 1.0})
+    assert by_strength.index.tolist() == ["b", "c", "a"]
+    assert by_strength["순위"].tolist() == [1, 2, 3]
+    by_gap = RankingModel(features).rank({"gap_24": 1.0}, n=2)
+    assert by_gap.index.tolist() == ["a", "c"]
+
+
+def test_rank_on_fixture_tables(data_dir):
+    frames = load_all_uncached(data_dir, use_snapshot=False)
+    features = build_feature_table(frames["vote_trend"], frames["results_2024"],
+                                   frames["index_sample"], frames["population"])
+    assert {"2411", "2412"} <= set(features.index)
+    table = RankingModel(features).rank(DEFAULT_WEIGHTS)
+    assert len(table) == len(features)
+    assert table["점수"].is_monotonic_decreasing
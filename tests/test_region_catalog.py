@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from data_loader import load_all_uncached
+from district_index import RegionCatalog, build_regions
+
+
+def _catalog(data_dir):
+    f = load_all_uncached(data_dir, use_snapshot=False)
+    tables = (f["population"], f["vote_trend"], f["results_2024"], f["current_info"])
+    return RegionCatalog.build(*tables), tables
+
+
+def test_catalog_matches_build_regions(data_dir):
+    catalog, tables = _catalog(data_dir)
+    pd.testing.assert_frame_equal(catalog.regions.reset_index(drop=True), build_regions(*tables).reset_index(drop=True))
+
+
+def test_cascade_sido_district_dong(data_dir):
+    catalog, (df_pop, *_) = _catalog(data_dir)
+    assert catalog.sidos() == ["경기", "서울"]
+    seoul = catalog.districts("서울")
+    assert seoul["라벨"].tolist() == ["서울 강서구병", "서울 관악구을"]
+    assert catalog.districts("제주").empty
+    dongs = catalog.dongs("02411")
+    expected = df_pop.loc[df_pop["지역구코드"].astype(str) == "2411", "행정동"].astype(str).str.strip().unique()
+    assert dongs["행정동"].tolist() == list(expected)
+
+
+def test_label_code_lookups(data_dir):
+    catalog, _ = _catalog(data_dir)
+    code = catalog.code_of("서울 관악구을")
+    assert str(code) == "2412"
+    assert catalog.label_of("02412") == "서울 관악구을"
+    assert catalog.sido_of(2421) == "경기"
+    assert catalog.code_of("없는 지역") is None and catalog.label_of("9999", "?") == "?"
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from schema import TableSchema, classify_column, compact_frame
+
+
+@pytest.mark.parametrize("col, kind", [
+    ("코드", "id"), ("후보1_이름", "id"), ("정당", "category"), ("총선경력", "text"),
+    ("투표율", "percent"), ("prop", "float"), ("전체 유권자", "int"), ("더불어민주연합", "int"),
+])
+def test_classify_column(col, kind):
+    assert classify_column(col) == kind
+
+
+def _apply(columns, rows, **kwargs):
+    schema = TableSchema.from_columns("t", columns)
+    return schema.apply(pd.DataFrame(rows, columns=columns).astype(object), **kwargs)
+
+
+def test_apply_parses_counts_and_percents():
+    df = _apply(["코드", "선거인수", "투표율", "prop"],
+                [["2411", "211,333", "44%", "27.5"], ["2412", " 1,014 ", "48.1%", None]])
+    assert df["코드"].tolist() == ["2411", "2412"]
+    assert df["선거인수"].dtype == np.int64 and df["선거인수"].tolist() == [211333, 1014]
+    np.testing.assert_allclose(df["투표율"], [44.0, 48.1])
+    assert df["prop"].isna().tolist() == [False, True]
+
+
+def test_apply_keeps_free_text_in_unknown_column():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df = _apply(["코드", "비고"], [["2411", " 재보궐 "], ["2412", None]])
+    assert df["비고"].tolist()[0] == "재보궐"
+    assert df["비고"].isna().tolist() == [False, True]
+
+
+def test_apply_warns_when_values_are_dropped():
+    with pytest.warns(UserWarning, match=r"t\.득표수: 숫자가 아닌 값 1개"):
+        df = _apply(["코드", "득표수"], [["2411", "1,200"], ["2412", "집계중"], ["2413", ""]])
+    assert df["득표수"].tolist()[0] == 1200
+    assert df["득표수"].isna().tolist() == [False, True, True]
+
+
+def test_apply_compact_dtypes():
+    df = _apply(["코드", "지역", "선거인수", "투표율"],
+                [["02411", "서울", "100", "40%"], ["2412", "서울", "200", "41%"]], compact=True)
+    assert df["코드"].dtype == np.int32 and df["코드"].tolist() == [2411, 2412]
+    assert df["지역"].dtype == "category"
+    assert df["선거인수"].dtype == np.int32
+    assert df["투표율"].dtype == np.float32
+
+
+def test_compact_frame_leaves_text_columns():
+    df = compact_frame(pd.DataFrame({"비고": ["a", "b"]}))
+    assert df["비고"].dtype == object
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import shared
+from charts import INCUMBENT_COLUMNS
+from data_cache import CACHE
+from data_loader import load_tables_timed
+from district_index import DistrictIndex
+from ecology import DEMOGRAPHIC_COLUMNS
+
+pytestmark = pytest.mark.skipif(not shared.available(), reason="pyarrow 없음")
+
+PAGES = [
+    {"population": [], "vote_trend": [], "current_info": []},
+    {"population": None, "party_labels": None, "vote_trend": None, "current_info": INCUMBENT_COLUMNS},
+    {"population": DEMOGRAPHIC_COLUMNS, "vote_trend": [], "results_2024": []},
+]
+
+
+def _fresh_store(data_dir, use_files: bool = True):
+    """같은 프로세스 캐시를 거치지 않고, 공유 파일이 이미 있으면 매핑만 하는 새 인스턴스."""
+    version = shared.data_version(data_dir)
+    return shared._build(data_dir, version, use_files=use_files)
+
+
+@pytest.mark.parametrize("use_files", [True, False])
+@pytest.mark.parametrize("page", PAGES)
+def test_view_matches_projected_load(data_dir, page, use_files):
+    shared.open_shared(data_dir)  # 공유 파일 생성
+    store = _fresh_store(data_dir, use_files)
+    view = store.view(page)
+    CACHE.clear()
+    expected = DistrictIndex(load_tables_timed(data_dir, page)[0])
+    for name in page:
+        pd.testing.assert_frame_equal(view[name], expected[name], check_dtype=True)
+
+
+def test_view_materializes_only_requested_columns(data_dir):
+    shared.open_shared(data_dir)
+    store = _fresh_store(data_dir)
+    assert all(info["source"] == "shared" for info in store.timings["files"].values())
+    everything = store.columns("population")
+
+    store.view({"population": ["전체 유권자"]})
+    built = list(store.memory().index)
+    have = set(store._index["population"].columns)
+    assert "전체 유권자" in have and "2030" not in have
+    assert len(have) < len(everything)
+    assert "population" in built
+
+    store.view({"population": ["2030"]})
+    assert {"전체 유권자", "2030"} <= set(store._index["population"].columns)
+    assert list(store.index["population"].columns) == everything
+
+
+def test_page_timings_without_materializing(data_dir):
+    store = shared.open_shared(data_dir)
+    page = {"population": ["전체 유권자"], "vote_trend": None}
+    timings = store.page_timings(page)
+    assert "전체 유권자" not in store._index["population"].columns
+    assert timings["files"]["vote_trend"]["cols"] == len(store.columns("vote_trend"))
+    assert timings["files"]["population"]["rows"] == store.rows("population")
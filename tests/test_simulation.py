@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from data_loader import load_vote_trend
+from metrics import LABELS
+from simulation import BlocShares, simulate, win_probabilities
+
+
+def _shares() -> BlocShares:
+    """지역구 3개 × 선거 4번: 2411은 민주 압도, 2412는 민주·보수 박빙(스윙 대칭), 2421은 최근 선거만 관측."""
+    rng = np.random.default_rng(1)
+    values = np.full((3, 4, len(LABELS)), np.nan)
+    for e in range(4):
+        swing = rng.normal(0.0, 2.0)
+        values[0, e] = [70 + swing, 20 - swing, 5, 5]
+        values[1, e] = [45 + (-1) ** e * 2, 45 - (-1) ** e * 2, 5, 5]
+    values[1, 3] = [45, 45, 5, 5]
+    values[2, 3] = [30, 50, 15, 5]
+    return BlocShares(np.array(["2411", "2412", "2421"], dtype=object), ["e1", "e2", "e3", "e4"], LABELS, values)
+
+
+def test_win_counts_sum_to_draws_and_are_seeded():
+    draws = 10_000 + 123  # 청크 경계에 맞지 않는 수
+    result = simulate(_shares(), draws=draws, seed=3, chunk=1_000)
+    np.testing.assert_allclose(result.p_win.sum(axis=1), 1.0)
+    assert np.all(result.p_win * draws == np.round(result.p_win * draws))
+    again = simulate(_shares(), draws=draws, seed=3, chunk=1_000)
+    np.testing.assert_array_equal(result.p_win, again.p_win)
+
+
+def test_win_probabilities_follow_margins():
+    result = simulate(_shares(), draws=20_000, seed=0)
+    a, b, c = (result.district(code) for code in ["2411", "2412", "2421"])
+    assert a["leader"] == "민주" and a["p_win"]["민주"] > 0.99
+    assert b["p_win"]["민주"] == pytest.approx(0.5, abs=0.05)
+    assert b["p_win"]["민주"] + b["p_win"]["보수"] == pytest.approx(1.0, abs=0.01)
+    assert c["leader"] == "보수" and c["flip"] == pytest.approx(1 - c["p_win"]["보수"])
+    assert list(a["intervals"].columns) == ["p5", "p50", "p95"]
+    assert a["intervals"].loc["민주", "p50"] == pytest.approx(_shares().baseline()[0, 0])
+
+
+def test_fixture_trend_simulation(data_dir):
+    result = win_probabilities(load_vote_trend(data_dir), draws=2_000, seed=0)
+    assert len(result) > 0
+    np.testing.assert_allclose(result.p_win.sum(axis=1), 1.0)
+    table = result.table()
+    assert ((table["뒤집힐 확률(%)"] >= 0) & (table["뒤집힐 확률(%)"] <= 100)).all()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import data_loader
+import shared
+import snapshot
+from data_loader import _source_paths, compile_snapshot, loader_settings
+
+pytestmark = pytest.mark.skipif(not snapshot.available(), reason="pyarrow 없음")
+
+
+def _touch(path):
+    """내용을 바꿔 지문이 달라지게 한다 (마지막 행 복제)."""
+    rows = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(b"".join(rows + rows[-1:]))
+
+
+def test_snapshot_fresh_until_source_changes(data_dir):
+    manifest = compile_snapshot(data_dir)
+    assert manifest["settings"] == loader_settings()
+    out, sources = snapshot.snapshot_dir(data_dir), _source_paths(data_dir)
+    assert snapshot.is_fresh(out, "population", sources["population"], loader_settings(), sources["bookmark"])
+
+    _touch(sources["population"])
+    assert not snapshot.is_fresh(out, "population", sources["population"], loader_settings(), sources["bookmark"])
+    assert snapshot.is_fresh(out, "vote_trend", sources["vote_trend"], loader_settings(), sources["bookmark"])
+    assert "population" not in snapshot.read_fresh_tables(out, sources, loader_settings())
+
+
+def test_snapshot_stale_when_compact_differs(data_dir, monkeypatch):
+    compile_snapshot(data_dir)
+    out, sources = snapshot.snapshot_dir(data_dir), _source_paths(data_dir)
+    monkeypatch.setattr(data_loader, "COMPACT", not data_loader.COMPACT)
+    assert not snapshot.is_fresh(out, "population", sources["population"], loader_settings(), sources["bookmark"])
+    assert snapshot.read_fresh_tables(out, sources, loader_settings()) == {}
+
+
+def test_snapshot_stale_when_schema_changes(data_dir):
+    """bookmark.csv(스키마)만 바뀌어도 모든 테이블을 CSV로 다시 읽는다."""
+    compile_snapshot(data_dir)
+    out, sources = snapshot.snapshot_dir(data_dir), _source_paths(data_dir)
+    assert set(snapshot.read_fresh_tables(out, sources, loader_settings())) >= {"population", "vote_trend"}
+    _touch(sources["bookmark"])
+    assert not snapshot.is_fresh(out, "vote_trend", sources["vote_trend"], loader_settings(), sources["bookmark"])
+    assert snapshot.read_fresh_tables(out, sources, loader_settings()) == {}
+
+
+def test_snapshot_frames_match_csv(data_dir):
+    compile_snapshot(data_dir)
+    out, sources = snapshot.snapshot_dir(data_dir), _source_paths(data_dir)
+    frames = snapshot.read_fresh_tables(out, sources, loader_settings())
+    csv = data_loader.load_all_uncached(data_dir, use_snapshot=False)
+    for name, df in frames.items():
+        pd.testing.assert_frame_equal(df, csv[name].reset_index(drop=True), check_dtype=True)
+
+
+def test_snapshot_stale_when_format_differs(data_dir, monkeypatch):
+    compile_snapshot(data_dir)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_FORMAT", snapshot.SNAPSHOT_FORMAT + 1)
+    assert snapshot.read_manifest(snapshot.snapshot_dir(data_dir), loader_settings()) is None
+
+
+def test_shared_version_key_covers_settings_and_formats(monkeypatch):
+    version = (("population", "abc"),)
+    base = shared.version_key(version, {"compact": True})
+    assert shared.version_key(version, {"compact": True}) == base
+    assert shared.version_key(version, {"compact": False}) != base
+    monkeypatch.setattr(snapshot, "SNAPSHOT_FORMAT", snapshot.SNAPSHOT_FORMAT + 1)
+    assert shared.version_key(version, {"compact": True}) != base
+
+
+def test_shared_store_per_compact_setting(data_dir, monkeypatch):
+    compact = shared.open_shared(data_dir)
+    assert compact.path is not None
+    assert shared.read_manifest(compact.path, loader_settings())["settings"] == loader_settings()
+
+    monkeypatch.setattr(data_loader, "COMPACT", not data_loader.COMPACT)
+    wide = shared.open_shared(data_dir)
+    assert wide.path != compact.path
+    assert shared.read_manifest(compact.path, loader_settings()) is None
+    assert all(info["source"] != "shared" for info in wide.timings["files"].values())
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import load_dong_tallies, load_dong_votes
+from store import ArchiveStore, store_path
+
+
+@pytest.fixture
+def store(data_dir):
+    store = ArchiveStore(store_path(data_dir))
+    changes = store.sync(data_dir)
+    assert set(changes.values()) == {"added"}
+    return store
+
+
+def _sorted(df, keys):
+    return df.sort_values(keys).reset_index(drop=True)
+
+
+def test_grouped_votes_match_pandas(store, data_dir):
+    long = load_dong_votes(data_dir)
+    keys = ["지역구코드", "election", "label"]
+    expected = long.groupby(keys, as_index=False)["votes"].sum()
+    got = store.votes(by=keys)
+    pd.testing.assert_frame_equal(_sorted(got, keys), _sorted(expected, keys).astype({"votes": float}),
+                                  check_dtype=False)
+
+
+def test_filters_are_pushed_down(store, data_dir):
+    long = load_dong_votes(data_dir)
+    sel = long[(long["지역구코드"] == "2411") & (long["label"] == "진보") & (long["election"] == "2024_na_pro")]
+    got = store.votes(by=("행정동",), district="02411", label="진보", election="2024_na_pro")
+    expected = sel.groupby("행정동", as_index=False)["votes"].sum()
+    np.testing.assert_allclose(_sorted(got, ["행정동"])["votes"], _sorted(expected, ["행정동"])["votes"])
+
+    tallies = load_dong_tallies(data_dir)
+    t = store.tallies(by=("시/도",), election="2024_na_pro")
+    want = tallies[tallies["election"] == "2024_na_pro"].groupby("시/도")["선거인수"].sum()
+    assert dict(zip(t["시/도"], t["선거인수"])) == want.astype(float).to_dict()
+    assert set(store.table("population", code="2412")["코드"]) == {"2412"}
+
+
+def test_sync_only_touches_changed_files(store, data_dir):
+    assert store.sync(data_dir) == {}
+    path = data_dir / "2024_S_na_pro.csv"
+    body = path.read_bytes()
+    path.unlink()
+    assert store.sync(data_dir) == {"2024_S_na_pro": "removed"}
+    path.write_bytes(body)
+    assert store.sync(data_dir) == {"2024_S_na_pro": "added"}
+    assert store.votes(by=None, file="2024_S_na_pro")["votes"].sum() == load_dong_votes(data_dir).query(
+        "file == '2024_S_na_pro'")["votes"].sum()
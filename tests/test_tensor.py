@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import load_dong_votes
+from tensor import build_vote_tensor, election_order, update_vote_tensor
+
+
+@pytest.fixture
+def long(data_dir) -> pd.DataFrame:
+    return load_dong_votes(data_dir)
+
+
+def test_election_order():
+    assert election_order(["2024_na_pro", "2022_loc_gov", "2022_president", "2020_na_pro", "2022_president"]) == \
+        ["2020_na_pro", "2022_president", "2022_loc_gov", "2024_na_pro"]
+
+
+def test_district_votes_match_groupby(long):
+    vt = build_vote_tensor(long)
+    expected = long.groupby(["지역구코드", "election", "label"])["votes"].sum()
+    got = pd.Series(vt.district_votes().ravel(), index=pd.MultiIndex.from_product(
+        [vt.district_codes, vt.elections, vt.labels], names=expected.index.names))
+    pd.testing.assert_series_equal(got[got > 0], expected.astype(float).reindex(got[got > 0].index), check_names=False)
+    assert got.sum() == long["votes"].sum()
+
+
+def test_dongs_of_and_shares(long):
+    vt = build_vote_tensor(long)
+    sl = vt.dongs_of("2411")
+    assert sl.stop > sl.start and set(vt.dong_district[sl]) == {"2411"}
+    assert vt.dongs_of("9999") == slice(0, 0)
+    shares = vt.shares("district")
+    np.testing.assert_allclose(np.nansum(shares, axis=2)[vt.district_votes().sum(axis=2) > 0], 100.0)
+
+
+def test_trend_slope_matches_polyfit(long):
+    vt = build_vote_tensor(long)
+    li = vt.label_index("진보")
+    s = vt.shares("district")[0, :, li]
+    ok = ~np.isnan(s)
+    assert vt.trend_slope("district")[0, li] == pytest.approx(np.polyfit(vt.years[ok], s[ok], 1)[0])
+
+
+def test_update_equals_rebuild(long):
+    # 원자료 한 파일(같은 선거의 다른 파일이 행정동을 이미 만들어 둠)을 추가 → 변경
+    last = (long["file"] == "2024_S_na_pro").to_numpy()
+    vt = build_vote_tensor(long[~last])
+    bumped = long[last].copy()
+    bumped["votes"] = bumped["votes"] * 2
+    added = update_vote_tensor(vt, None, long[last])
+    changed = update_vote_tensor(added, long[last], bumped)
+    ref = build_vote_tensor(pd.concat([long[~last], bumped], ignore_index=True))
+    assert list(changed.elections) == list(ref.elections)
+    np.testing.assert_array_equal(changed.dong_codes, ref.dong_codes)
+    np.testing.assert_allclose(changed.votes, ref.votes)
+    np.testing.assert_array_equal(changed.present, ref.present)
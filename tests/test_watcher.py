@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from data_loader import _read_csv_safe
+from ingest import aggregate_trend, load_dong_votes, update_trend
+from tensor import build_vote_tensor
+from watcher import Changes, DataWatcher, LiveTables
+
+ELECTION = "2024_S_na_pro.csv"
+
+
+def _bump_first_row(path, amount: int = 1000) -> None:
+    """첫 행정동 행의 첫 정당 득표를 amount만큼 늘린다 (원자료와 같은 BOM/CRLF/천 단위 쉼표 유지)."""
+    rows = list(csv.reader(io.StringIO(path.read_bytes().decode("utf-8-sig"), newline="")))
+    col = rows[0].index("투표수") + 1
+    rows[1][col] = f"{int(rows[1][col].replace(',', '')) + amount:,}"
+    buf = io.StringIO(newline="")
+    csv.writer(buf, lineterminator="\r\n").writerows(rows)
+    path.write_bytes(buf.getvalue().encode("utf-8-sig"))
+
+
+def _rebuilt(live: LiveTables):
+    return build_vote_tensor(pd.concat([p[0] for p in live.parts.values()], ignore_index=True))
+
+
+def _assert_same_tensor(vt, ref):
+    assert list(vt.elections) == list(ref.elections)
+    assert vt.labels == ref.labels
+    np.testing.assert_array_equal(vt.dong_codes, ref.dong_codes)
+    np.testing.assert_array_equal(vt.present, ref.present)
+    np.testing.assert_allclose(vt.votes, ref.votes)
+
+
+def test_added_file_updates_tensor_incrementally(data_dir):
+    path = data_dir / ELECTION
+    body = path.read_bytes()
+    path.unlink()
+    live = LiveTables(data_dir, write_trend=False)
+    path.write_bytes(body)
+
+    assert live.apply(Changes(added=(ELECTION,))) == {ELECTION: "incremental"}
+    _assert_same_tensor(live.cube.tensor, _rebuilt(live))
+
+
+def test_changed_file_updates_trend_rows(data_dir):
+    trend_path = data_dir / "vote_trend.csv"
+    before = trend_path.read_bytes()
+    live = LiveTables(data_dir, write_trend=True)
+    _bump_first_row(data_dir / ELECTION)
+
+    assert live.apply(Changes(changed=(ELECTION,))) == {ELECTION: "incremental"}
+    _assert_same_tensor(live.cube.tensor, _rebuilt(live))
+
+    trend = _read_csv_safe(trend_path)
+    expected = aggregate_trend(live.parts[ELECTION][0])
+    got = trend.merge(expected[["code", "election", "label"]], on=["code", "election", "label"])
+    np.testing.assert_allclose(got.sort_values(["code", "label"])["votes"].to_numpy(),
+                               expected.sort_values(["code", "label"])["votes"].to_numpy())
+
+    # 손대지 않은 (지역구, 선거) 행은 바이트 그대로, 원본과 같은 CRLF로 저장된다
+    after = trend_path.read_bytes()
+    assert after.count(b"\r\n") == after.count(b"\n")
+    untouched = [r for r in before.splitlines(keepends=True) if b",2024_na_pro," not in r]
+    assert all(r in after for r in untouched)
+    assert sorted(p.name for p in data_dir.iterdir() if p.is_file() and not p.name.endswith(".csv")) == []
+
+
+def test_watcher_settles_before_applying(data_dir):
+    watcher = DataWatcher(data_dir, interval=0, write_trend=False)
+    assert watcher.check() is None
+    _bump_first_row(data_dir / ELECTION)
+    assert watcher.check() is None  # 처음 본 변경은 보류
+    record = watcher.check()
+    assert record["changed"] == [ELECTION]
+    assert record["files"] == {ELECTION: "incremental"}
+
+
+def test_update_trend_replaces_one_file(data_dir):
+    long = load_dong_votes(data_dir)
+    one = (long["file"] == ELECTION.removesuffix(".csv")).to_numpy()
+    bumped = long[one].assign(votes=long[one]["votes"] * 3)
+    base = aggregate_trend(long)
+    pd.testing.assert_frame_equal(update_trend(base, long[one], bumped),
+                                  aggregate_trend(pd.concat([long[~one], bumped], ignore_index=True)))
+    removed = update_trend(base, long[one], None)  # 파일 삭제: 같은 선거의 다른 파일 행만 남는다
+    pd.testing.assert_frame_equal(removed, aggregate_trend(long[~one]))
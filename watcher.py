@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from cube import VoteCube, load_vote_cube, tally_array, update_tally_array
+from data_cache import CACHE, file_fingerprint
+from data_loader import DATA_FILES, LazyTable, _read_csv_safe
+from ingest import (ELECTION_FILE_RE, TREND_COLUMNS, aggregate_trend, build_label_map, election_tallies, label_votes,
+                    list_election_files, load_party_labels, melt_election_file_cached, update_trend)
+from tensor import build_vote_tensor, tensor_version, update_vote_tensor
+
+# 폴링 간격(초). 파일 지문은 stat(mtime, size)이 바뀔 때만 다시 해시하므로 짧게 잡아도 가볍다.
+DEFAULT_INTERVAL = 2.0
+HISTORY = 50
+
+
+@dataclass(frozen=True)
+class Changes:
+    """한 번의 폴링에서 확정된 변경 (파일명 기준)."""
+    added: Tuple[str, ...] = ()
+    changed: Tuple[str, ...] = ()
+    removed: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return self.added + self.changed + self.removed
+
+
+# ---------- 파생 표 증분 갱신 ----------
+
+class LiveTables:
+    """
+    원자료 파일별 조각(라벨 붙은 득표 long / 집계 컬럼)과 그로부터 만든 텐서·큐브·추이 표.
+    파일 하나가 추가/변경/삭제되면 그 파일만 다시 읽어, 텐서/큐브는 해당 (행정동, 선거) 칸만,
+    추이 표는 해당 (지역구, 선거) 행만 바꾼다. 결과는 새 지문 버전으로 CACHE에 넣어 두므로
+    실행 중인 세션은 다음 rerun에서 load_vote_tensor / load_vote_cube가 바로 hit한다.
+    (지표 표는 metrics._metrics_table이 vote_trend의 코드별 해시를 비교해 바뀐 코드만 다시 계산한다.)
+    """
+
+    def __init__(self, data_dir: Union[str, Path], write_trend: bool = True):
+        self.data_dir = Path(data_dir)
+        self.write_trend = write_trend
+        self.labels = build_label_map(load_party_labels(self.data_dir))
+        self.parts: Dict[str, Tuple[pd.DataFrame, pd.DataFrame]] = {
+            p.name: self._read_part(p) for p in list_election_files(self.data_dir)
+        }
+        self.cube: VoteCube = load_vote_cube(self.data_dir)
+
+    def _read_part(self, path: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        return label_votes(melt_election_file_cached(path), self.labels), election_tallies(path)
+
+    @property
+    def trend_path(self) -> Path:
+        return self.data_dir / DATA_FILES["vote_trend"]
+
+    def apply(self, changes: Changes) -> Dict[str, str]:
+        """
+        변경을 반영하고 {파일명: "incremental" / "rebuild" / "skipped"}를 반환.
+        party_labels.csv가 바뀌면 모든 행의 계열이 바뀌므로 텐서와 추이 표를 전체 재생성한다.
+        """
+        result: Dict[str, str] = {}
+        elections = [n for n in changes.names if ELECTION_FILE_RE.match(n)]
+        if DATA_FILES["party_labels"] in changes.names:
+            self.labels = build_label_map(load_party_labels(self.data_dir))
+            self.parts = {p.name: self._read_part(p) for p in list_election_files(self.data_dir)}
+            self._rebuild()
+            if self.write_trend:
+                self._store_trend(aggregate_trend(pd.concat([p[0] for p in self.parts.values()], ignore_index=True)))
+            return {n: "rebuild" for n in [DATA_FILES["party_labels"]] + elections}
+        if not elections:
+            return {n: "skipped" for n in changes.names}
+
+        trend = self._read_trend()
+        vt, tallies = self.cube.tensor, self.cube.dong_tallies
+        incremental = True
+        for name in elections:
+            old = self.parts.pop(name, None)
+            path = self.data_dir / name
+            new = self._read_part(path) if name not in changes.removed else None
+            if new is not None:
+                self.parts[name] = new
+            if incremental:
+                nvt = update_vote_tensor(vt, old[0] if old else None, new[0] if new else None)
+                nta = (update_tally_array(tallies, vt, nvt, old[1] if old else None, new[1] if new else None)
+                       if nvt is not None else None)
+                if nvt is None or nta is None:
+                    incremental = False  # 새 행정동/계열 등 → 아래에서 전체 재생성
+                else:
+                    vt, tallies = nvt, nta
+            if trend is not None:
+                trend = update_trend(trend, old[0] if old else None, new[0] if new else None)
+            result[name] = "incremental"
+
+        if incremental:
+            self._install(VoteCube(vt, tallies))
+        else:
+            self._rebuild()
+            result = {n: "rebuild" for n in result}
+        if trend is not None:
+            self._store_trend(trend)
+        return result
+
+    def _rebuild(self) -> None:
+        longs = [p[0] for p in self.parts.values()]
+        tallies = [p[1] for p in self.parts.values() if not p[1].empty]
+        vt = build_vote_tensor(pd.concat(longs, ignore_index=True) if longs else None)
+        self._install(VoteCube(vt, tally_array(vt, pd.concat(tallies, ignore_index=True) if tallies else None)))
+
+    def _install(self, cube: VoteCube) -> None:
+        self.cube = cube
+        version = tensor_version(self.data_dir)
+        CACHE.put(("vote_tensor", str(self.data_dir)), version, cube.tensor)
+        CACHE.put(("vote_cube", str(self.data_dir)), version, cube)
+
+    # ----- vote_trend.csv -----
+    def _read_trend(self) -> Optional[pd.DataFrame]:
+        if not self.write_trend:
+            return None
+        if not self.trend_path.exists():
+            return pd.DataFrame(columns=TREND_COLUMNS)
+        # 수치 칸은 글자 그대로 읽어, 손대지 않은 행이 다시 쓸 때 바이트 단위로 같게 (float 재파싱/0 → 0.0 방지)
+        return _read_csv_safe(self.trend_path, dtype={"votes": str, "prop": str})
+
+    def _store_trend(self, trend: pd.DataFrame) -> None:
+        """
+        추이 표를 원자료와 같은 형식(utf-8 BOM, CRLF)으로 쓰고, 로더 캐시를 미리 채워 다음 rerun이 파싱하지 않게 한다.
+        임시 파일은 프로세스마다 다른 이름이라 같은 data/를 감시하는 프로세스끼리 서로의 반쯤 쓴 파일을 덮지 않는다.
+        """
+        if not self.write_trend:
+            return
+        with tempfile.NamedTemporaryFile(dir=self.data_dir, prefix=".vote_trend-", suffix=".tmp", delete=False) as f:
+            tmp = Path(f.name)
+        try:
+            trend.to_csv(tmp, index=False, encoding="utf-8-sig", lineterminator="\r\n")
+            os.replace(tmp, self.trend_path)  # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 교체
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        LazyTable(self.data_dir, "vote_trend").load()
+
+
+# ---------- 폴링 감시 ----------
+
+class DataWatcher:
+    """
+    data_dir의 *.csv 지문을 주기적으로 비교하는 감시자 (OS별 파일 알림 없이 stat + 해시만 사용).
+    바뀐 파일은 다음 폴링에서도 지문이 같을 때(복사가 끝났을 때) 확정하고 LiveTables에 넘긴다.
+    """
+
+    def __init__(self, data_dir: Union[str, Path], interval: float = DEFAULT_INTERVAL, write_trend: bool = True):
+        self.data_dir = Path(data_dir)
+        self.interval = interval
+        self.write_trend = write_trend
+        self._seen = self.scan()
+        self._pending: Dict[str, Optional[str]] = {}
+        self._live: Optional[LiveTables] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.polls = 0
+        self.history: Deque[dict] = deque(maxlen=HISTORY)
+
+    def scan(self) -> Dict[str, str]:
+        out = {}
+        for p in sorted(self.data_dir.glob("*.csv")):
+            fp = file_fingerprint(p)
+            if fp is not None:
+                out[p.name] = fp.digest
+        return out
+
+    def poll(self) -> Changes:
+        """지난 확정 상태와 비교. 이번에 처음 보인 변경은 보류했다가 다음 폴링에서 같으면 확정한다."""
+        current = self.scan()
+        names = set(current) | set(self._seen)
+        diff = {n: current.get(n) for n in names if current.get(n) != self._seen.get(n)}
+        settled = {n: d for n, d in diff.items() if n in self._pending and self._pending[n] == d}
+        self._pending = {n: d for n, d in diff.items() if n not in settled}
+        self.polls += 1
+        changes = Changes(
+            added=tuple(sorted(n for n, d in settled.items() if d is not None and n not in self._seen)),
+            changed=tuple(sorted(n for n, d in settled.items() if d is not None and n in self._seen)),
+            removed=tuple(sorted(n for n, d in settled.items() if d is None)),
+        )
+        for n, d in settled.items():
+            if d is None:
+                self._seen.pop(n, None)
+            else:
+                self._seen[n] = d
+        return changes
+
+    def check(self) -> Optional[dict]:
+        """폴링 한 번 + 확정된 변경 반영. 반영했으면 기록(dict)을 반환."""
+        with self._lock:
+            # 파일별 조각은 변경 전 상태로 먼저 잡아 두어야 바뀐 파일의 이전 값을 뺄 수 있다
+            if self._live is None:
+                self._live = LiveTables(self.data_dir, self.write_trend)
+            changes = self.poll()
+            if not changes:
+                return None
+            t0 = time.perf_counter()
+            record = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "added": list(changes.added),
+                      "changed": list(changes.changed), "removed": list(changes.removed)}
+            try:
+                record["files"] = self._live.apply(changes)
+            except Exception as e:  # 반쯤 쓴 파일 등: 기록만 하고 다음 변경 때 다시 시도
+                record["files"] = {}
+                record["error"] = f"{type(e).__name__}: {e}"
+                self._live = None
+            record["ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+            # 직접 쓴 vote_trend.csv는 변경으로 다시 잡지 않는다
+            trend = self.data_dir / DATA_FILES["vote_trend"]
+            fp = file_fingerprint(trend) if self.write_trend else None
+            if fp is not None:
+                self._seen[trend.name] = fp.digest
+                self._pending.pop(trend.name, None)
+            self.history.append(record)
+            return record
+
+    # ----- 백그라운드 스레드 -----
+    def start(self) -> "DataWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def status(self) -> dict:
+        return {"running": self.running, "interval": self.interval, "polls": self.polls,
+                "pending": sorted(self._pending), "last": self.history[-1] if self.history else None}
+
+
+# 프로세스당 data_dir 하나에 감시자 하나 (Streamlit rerun마다 호출해도 같은 객체)
+_watchers: Dict[str, DataWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def ensure_watcher(data_dir: Union[str, Path], interval: float = DEFAULT_INTERVAL,
+                   write_trend: bool = True) -> DataWatcher:
+    key = str(Path(data_dir))
+    with _watchers_lock:
+        w = _watchers.get(key)
+        if w is None:
+            w = _watchers[key] = DataWatcher(data_dir, interval, write_trend)
+        return w.start()
+
+
+# ---------- CLI ----------
+
+def main(argv: Optional[list] = None) -> int:
+    """사용법: python watcher.py [DATA_DIR] [INTERVAL]  → 변경을 감지할 때마다 반영 결과 출력 (Ctrl+C 종료)"""
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = Path(argv[0]) if argv else Path("data")
+    interval = float(argv[1]) if len(argv) > 1 else DEFAULT_INTERVAL
+    w = DataWatcher(data_dir, interval)
+    print(f"watching {data_dir} every {interval:g}s")
+    try:
+        while True:
+            time.sleep(interval)
+            record = w.check()
+            if record:
+                print(record, flush=True)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())